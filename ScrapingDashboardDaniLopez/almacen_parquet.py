@@ -0,0 +1,78 @@
+"""
+Almacenamiento columnar (Parquet / Arrow) del catálogo de libros
+Guarda el dataset particionado por categoría con tipos compactos y permite
+leer solo las columnas que necesita cada vista
+"""
+
+import os
+import shutil
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+
+RUTA_PARQUET = 'libros_parquet'
+RUTA_CSV = 'libros_completo.csv'
+
+# Tipos del dataset: `id` es la posición original del libro y sirve para
+# alinear lecturas con columnas distintas
+TIPOS = {
+    'id': 'int32',
+    'precio': 'float32',
+    'rating': 'int8',
+    'categoria': 'category',
+}
+
+
+def preparar_tipos(df):
+    """Devuelve una copia del DataFrame con los tipos del dataset y la columna `id`"""
+    df = df.reset_index(drop=True)
+    df.insert(0, 'id', df.index)
+    return df.astype(TIPOS)
+
+
+def guardar_parquet(df, ruta=RUTA_PARQUET):
+    """Escribe el catálogo como dataset Parquet particionado por categoría"""
+    if not PYARROW_DISPONIBLE:
+        raise RuntimeError("La salida Parquet necesita pyarrow (pip install pyarrow)")
+
+    tabla = pa.Table.from_pandas(preparar_tipos(df), preserve_index=False)
+
+    # Se reescribe completo: write_to_dataset añadiría ficheros a los de la ejecución anterior
+    temporal = ruta + '.tmp'
+    shutil.rmtree(temporal, ignore_errors=True)
+    pq.write_to_dataset(tabla, temporal, partition_cols=['categoria'])
+    shutil.rmtree(ruta, ignore_errors=True)
+    os.replace(temporal, ruta)
+
+
+def parquet_vigente(ruta_parquet=RUTA_PARQUET, ruta_csv=RUTA_CSV):
+    """True si existe el dataset Parquet y no es más antiguo que el CSV"""
+    if not PYARROW_DISPONIBLE or not os.path.isdir(ruta_parquet):
+        return False
+    return not os.path.exists(ruta_csv) or os.path.getmtime(ruta_parquet) >= os.path.getmtime(ruta_csv)
+
+
+def leer_libros(columnas=None, ruta_parquet=RUTA_PARQUET, ruta_csv=RUTA_CSV):
+    """
+    Lee el catálogo, preferentemente desde Parquet.
+    Args:
+        columnas: Columnas a cargar (None = todas). Con Parquet solo se leen del disco esas columnas
+    Returns:
+        DataFrame indexado por `id`, de modo que lecturas con distintas columnas se pueden alinear
+    """
+    if parquet_vigente(ruta_parquet, ruta_csv):
+        proyeccion = None if columnas is None else ['id'] + [c for c in columnas if c != 'id']
+        df = pd.read_parquet(ruta_parquet, columns=proyeccion)
+        # Las particiones se leen agrupadas por categoría: se recupera el orden original
+        return df.sort_values('id').set_index('id')
+
+    df = pd.read_csv(ruta_csv, usecols=columnas)
+    df.index.name = 'id'
+    return df.astype({c: t for c, t in TIPOS.items() if c in df.columns})
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark de los backends de parseo HTML
+Parsea las páginas guardadas en benchmarks/fixtures con cada backend
+disponible y compara el tiempo medio por página
+Uso: python benchmarks/bench_parsers.py [--repeticiones N]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers import backends_disponibles, extraer_libros_listado, extraer_detalle  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+BASE_URL = 'https://books.toscrape.com/'
+
+
+def cargar_fixtures():
+    """Lee los HTML guardados como bytes, igual que response.content"""
+    def leer(patron):
+        paginas = []
+        for ruta in sorted(glob.glob(os.path.join(FIXTURES, patron))):
+            with open(ruta, 'rb') as f:
+                paginas.append(f.read())
+        return paginas
+    return leer('listado_*.html'), leer('detalle_*.html')
+
+
+def medir(funcion, paginas, repeticiones):
+    """Tiempo medio por página en milisegundos (mejor de las repeticiones)"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for html in paginas:
+            funcion(html)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor / len(paginas) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de backends de parseo HTML")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    listados, detalles = cargar_fixtures()
+    print(f"Fixtures: {len(listados)} listados, {len(detalles)} detalles")
+
+    referencia = None
+    resultados = []
+    for backend in backends_disponibles():
+        # Todos los backends deben extraer exactamente los mismos datos
+        salida = ([extraer_libros_listado(h, BASE_URL, backend) for h in listados],
+                  [extraer_detalle(h, backend) for h in detalles])
+        if referencia is None:
+            referencia = salida
+        coincide = salida == referencia
+
+        ms_listado = medir(lambda h: extraer_libros_listado(h, BASE_URL, backend), listados, args.repeticiones)
+        ms_detalle = medir(lambda h: extraer_detalle(h, backend), detalles, args.repeticiones)
+        resultados.append((backend, ms_listado, ms_detalle, coincide))
+
+    base_listado, base_detalle = resultados[0][1], resultados[0][2]
+    print(f"\n{'Backend':<14}{'Listado (ms)':>14}{'Detalle (ms)':>14}{'Aceleración':>14}  Resultados")
+    print("-" * 72)
+    for backend, ms_listado, ms_detalle, coincide in resultados:
+        # Un catálogo tiene 1 listado por cada 20 detalles
+        aceleracion = (base_listado + 20 * base_detalle) / (ms_listado + 20 * ms_detalle)
+        print(f"{backend:<14}{ms_listado:>14.2f}{ms_detalle:>14.2f}{aceleracion:>13.1f}x  "
+              f"{'OK' if coincide else 'DIFERENTES'}")
+
+
+if __name__ == "__main__":
+    main()
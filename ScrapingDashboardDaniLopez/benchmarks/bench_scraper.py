@@ -0,0 +1,217 @@
+"""
+Benchmark de extremo a extremo del scraper contra un servidor local
+Ejecuta scrape_books_to_scrape en cada modo (secuencial, concurrente e
+incremental) contra benchmarks/servidor_fixtures.py y mide páginas/s,
+latencia p50/p99, tiempo de parseo por página y memoria máxima (RSS).
+Cada modo corre en un subproceso para que el pico de memoria sea el suyo
+Uso: python benchmarks/bench_scraper.py [--paginas 10] [--latencia 20] [--errores 0.02]
+                                        [--guardar base.json] [--comparar base.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DIRECTORIO_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_PROYECTO)
+
+MODOS = ['secuencial', 'concurrente', 'incremental']
+
+# Métricas comparadas con --comparar y si un valor mayor es mejor
+METRICAS = {
+    'paginas_por_segundo': True,
+    'latencia_p50_ms': False,
+    'latencia_p99_ms': False,
+    'parseo_ms_por_pagina': False,
+    'rss_max_mb': False,
+}
+
+
+def memoria_maxima_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB y macOS en bytes
+    return rss / 1024 ** 2 if sys.platform == 'darwin' else rss / 1024
+
+
+def medir_parseo(modulo):
+    """Envuelve los extractores que usa el scraper para acumular su tiempo"""
+    medida = {'segundos': 0.0, 'paginas': 0}
+
+    def cronometrar(funcion):
+        def envoltura(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                medida['segundos'] += time.perf_counter() - inicio
+                medida['paginas'] += 1
+        return envoltura
+
+    modulo.extraer_libros_listado = cronometrar(modulo.extraer_libros_listado)
+    modulo.extraer_detalle = cronometrar(modulo.extraer_detalle)
+    return medida
+
+
+def ejecutar_modo(modo, base_url, paginas, concurrencia, backoff):
+    """Corre un modo en este proceso y devuelve sus métricas"""
+    import scraping_books
+    from cache_http import CacheHTTP
+    from http_client import configurar_cliente
+
+    def scrape(cliente, cache=None):
+        if modo == 'secuencial':
+            return scraping_books.scrape_books_to_scrape(
+                paginas, scraping_books.LimitadorPorHost(0), base_url, cliente, cache)
+        return scraping_books.scrape_books_concurrente(
+            paginas, concurrencia, 0, base_url, cliente, cache)
+
+    with tempfile.TemporaryDirectory() as temporal, contextlib.redirect_stdout(io.StringIO()):
+        cache = None
+        if modo == 'incremental':
+            # Primera pasada para llenar la cache; se mide la revalidación
+            cache = CacheHTTP(os.path.join(temporal, 'cache.sqlite'), max_edad=0)
+            scrape(configurar_cliente(tamano_pool=concurrencia, backoff=backoff), cache)
+
+        cliente = configurar_cliente(tamano_pool=concurrencia, backoff=backoff)
+        parseo = medir_parseo(scraping_books)
+        inicio = time.perf_counter()
+        libros = scrape(cliente, cache)
+        segundos = time.perf_counter() - inicio
+        if cache:
+            cache.cerrar()
+
+    http = cliente.estadisticas.resumen()
+    return {
+        'modo': modo,
+        'libros': len(libros),
+        'peticiones': http['peticiones'],
+        'errores': http['errores'],
+        'reintentos': http['reintentos'],
+        'segundos': segundos,
+        'paginas_por_segundo': http['peticiones'] / segundos if segundos else 0.0,
+        'latencia_p50_ms': http['latencia_p50_ms'],
+        'latencia_p99_ms': http['latencia_p99_ms'],
+        'paginas_parseadas': parseo['paginas'],
+        'parseo_ms_por_pagina': parseo['segundos'] / parseo['paginas'] * 1000 if parseo['paginas'] else 0.0,
+        'rss_max_mb': memoria_maxima_mb(),
+    }
+
+
+def lanzar_modo(modo, base_url, args):
+    """Ejecuta un modo en un subproceso y recoge su resultado en JSON"""
+    comando = [sys.executable, os.path.abspath(__file__), '--interno', modo, '--base-url', base_url,
+               '--paginas', str(args.paginas), '--concurrencia', str(args.concurrencia),
+               '--backoff', str(args.backoff)]
+    proceso = subprocess.run(comando, capture_output=True, text=True, cwd=DIRECTORIO_PROYECTO)
+    if proceso.returncode != 0:
+        raise RuntimeError(f"El modo {modo} ha fallado:\n{proceso.stderr}")
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def mostrar_resultados(resultados):
+    print(f"\n{'Modo':<13}{'Págs/s':>9}{'p50 (ms)':>10}{'p99 (ms)':>10}{'Parseo (ms)':>13}"
+          f"{'RSS (MB)':>10}{'Libros':>8}{'Reint.':>8}")
+    print("-" * 81)
+    for r in resultados:
+        rss = f"{r['rss_max_mb']:.1f}" if r['rss_max_mb'] is not None else 'n/d'
+        print(f"{r['modo']:<13}{r['paginas_por_segundo']:>9.1f}{r['latencia_p50_ms']:>10.1f}"
+              f"{r['latencia_p99_ms']:>10.1f}{r['parseo_ms_por_pagina']:>13.2f}{rss:>10}"
+              f"{r['libros']:>8}{r['reintentos']:>8}")
+
+
+def comparar(resultados, ruta, tolerancia):
+    """Compara con una ejecución guardada; devuelve las regresiones superiores a la tolerancia"""
+    with open(ruta, encoding='utf-8') as f:
+        referencia = {r['modo']: r for r in json.load(f)['resultados']}
+
+    regresiones = []
+    for r in resultados:
+        anterior = referencia.get(r['modo'])
+        if anterior is None:
+            continue
+        for metrica, mayor_es_mejor in METRICAS.items():
+            actual, base = r.get(metrica), anterior.get(metrica)
+            if not actual or not base:
+                continue
+            cambio = (base - actual) / base if mayor_es_mejor else (actual - base) / base
+            if cambio > tolerancia:
+                regresiones.append(f"{r['modo']}: {metrica} {base:.2f} -> {actual:.2f} ({cambio:+.0%})")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del scraper con un servidor local")
+    parser.add_argument('--modos', nargs='+', choices=MODOS, default=MODOS)
+    parser.add_argument('--paginas', type=int, default=5)
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--latencia', type=float, default=20.0, help="Latencia del servidor en ms")
+    parser.add_argument('--jitter', type=float, default=5.0, help="Variación de la latencia en ms")
+    parser.add_argument('--errores', type=float, default=0.0, help="Fracción de respuestas 503")
+    parser.add_argument('--backoff', type=float, default=0.05,
+                        help="Backoff de los reintentos (el del scraper real dominaría la medida)")
+    parser.add_argument('--repeticiones', type=int, default=1,
+                        help="Ejecuciones por modo; se informa la mediana por páginas/s")
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--guardar', metavar='RUTA', help="Guarda los resultados en JSON")
+    parser.add_argument('--comparar', metavar='RUTA', help="Compara con resultados guardados")
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help="Empeoramiento relativo permitido al comparar")
+    parser.add_argument('--interno', choices=MODOS, help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        print(json.dumps(ejecutar_modo(args.interno, args.base_url, args.paginas,
+                                       args.concurrencia, args.backoff)))
+        return
+
+    from servidor_fixtures import ServidorFixtures
+
+    configuracion = {'paginas': args.paginas, 'concurrencia': args.concurrencia, 'latencia_ms': args.latencia,
+                     'jitter_ms': args.jitter, 'tasa_error': args.errores, 'repeticiones': args.repeticiones}
+    print(f"Configuración: {configuracion}")
+
+    resultados = []
+    for modo in args.modos:
+        print(f"Midiendo modo {modo}...")
+        ejecuciones = []
+        for _ in range(args.repeticiones):
+            # Servidor nuevo por ejecución para que todas vean la misma secuencia de errores
+            with ServidorFixtures(latencia_ms=args.latencia, jitter_ms=args.jitter,
+                                  tasa_error=args.errores, semilla=args.semilla) as servidor:
+                ejecuciones.append(lanzar_modo(modo, servidor.base_url, args))
+        ejecuciones.sort(key=lambda r: r['paginas_por_segundo'])
+        resultados.append(ejecuciones[len(ejecuciones) // 2])
+
+    mostrar_resultados(resultados)
+
+    if args.guardar:
+        with open(args.guardar, 'w', encoding='utf-8') as f:
+            json.dump({'configuracion': configuracion, 'resultados': resultados}, f, indent=2)
+        print(f"\n✓ Resultados guardados en {args.guardar}")
+
+    if args.comparar:
+        regresiones = comparar(resultados, args.comparar, args.tolerancia)
+        if regresiones:
+            print(f"\n✗ Regresiones respecto a {args.comparar}:")
+            for regresion in regresiones:
+                print(f"  - {regresion}")
+            sys.exit(1)
+        print(f"\n✓ Sin regresiones respecto a {args.comparar} (tolerancia {args.tolerancia:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Servidor HTTP local que imita Books to Scrape con las páginas de benchmarks/fixtures
+Permite medir el scraper sin tocar el sitio real, con latencia y errores
+inyectados. Las páginas del listado se sirven cíclicamente a partir de los
+fixtures, así que se puede pedir cualquier número de páginas
+Uso: python benchmarks/servidor_fixtures.py [--puerto 8765] [--latencia 50] [--errores 0.05]
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+RUTA_LISTADO = re.compile(r'^/catalogue/page-(\d+)\.html$')
+RUTA_DETALLE = re.compile(r'^/catalogue/([^/]+)/index\.html$')
+
+
+def cargar_paginas(directorio=FIXTURES):
+    """Devuelve (listados ordenados, {slug: html del detalle}) con su ETag precalculado"""
+    def con_etag(ruta):
+        with open(ruta, 'rb') as f:
+            contenido = f.read()
+        return contenido, '"%s"' % hashlib.sha1(contenido).hexdigest()
+
+    listados = [con_etag(ruta) for ruta in sorted(glob.glob(os.path.join(directorio, 'listado_page-*.html')),
+                                                  key=lambda r: int(re.search(r'(\d+)\.html$', r).group(1)))]
+    detalles = {os.path.basename(ruta)[len('detalle_'):-len('.html')]: con_etag(ruta)
+                for ruta in glob.glob(os.path.join(directorio, 'detalle_*.html'))}
+    return listados, detalles
+
+
+class ServidorFixtures:
+    """
+    Servidor en un hilo aparte con la estructura de URLs de Books to Scrape.
+    Args:
+        puerto: Puerto de escucha (0 = uno libre)
+        latencia_ms: Retardo añadido a cada respuesta
+        jitter_ms: Variación aleatoria máxima sobre la latencia
+        tasa_error: Fracción de peticiones que responden 503
+        semilla: Semilla del generador aleatorio para ejecuciones reproducibles
+    """
+
+    def __init__(self, puerto=0, latencia_ms=0.0, jitter_ms=0.0, tasa_error=0.0, semilla=None):
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.tasa_error = tasa_error
+        self.listados, self.detalles = cargar_paginas()
+        self.peticiones = 0
+        self.errores_inyectados = 0
+        self._aleatorio = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', puerto), self._manejador())
+        self._servidor.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}/"
+
+    def _sortear(self):
+        """Latencia de esta petición y si debe fallar"""
+        with self._lock:
+            self.peticiones += 1
+            retardo = self.latencia_ms + self._aleatorio.uniform(0, self.jitter_ms)
+            fallo = self._aleatorio.random() < self.tasa_error
+            if fallo:
+                self.errores_inyectados += 1
+        return retardo / 1000, fallo
+
+    def _pagina(self, ruta):
+        encontrada = RUTA_LISTADO.match(ruta)
+        if encontrada and self.listados:
+            return self.listados[(int(encontrada.group(1)) - 1) % len(self.listados)]
+        encontrada = RUTA_DETALLE.match(ruta)
+        if encontrada:
+            return self.detalles.get(encontrada.group(1))
+        return None
+
+    def _manejador(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, como el sitio real
+            # Cabeceras y cuerpo en un solo envío: con escrituras sueltas, Nagle y
+            # el ACK retardado añadirían ~40 ms a cada respuesta
+            wbufsize = 64 * 1024
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                retardo, fallo = servidor._sortear()
+                if retardo:
+                    time.sleep(retardo)
+                if fallo:
+                    self._responder(503)
+                    return
+
+                pagina = servidor._pagina(self.path)
+                if pagina is None:
+                    self._responder(404)
+                    return
+
+                contenido, etag = pagina
+                if self.headers.get('If-None-Match') == etag:
+                    self._responder(304, cabeceras={'ETag': etag})
+                    return
+                self._responder(200, contenido, {'ETag': etag, 'Content-Type': 'text/html; charset=utf-8'})
+
+            def _responder(self, estado, contenido=b'', cabeceras=None):
+                self.send_response(estado)
+                for nombre, valor in (cabeceras or {}).items():
+                    self.send_header(nombre, valor)
+                self.send_header('Content-Length', str(len(contenido)))
+                self.end_headers()
+                self.wfile.write(contenido)
+
+            def log_message(self, *args):
+                pass
+
+        return Manejador
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def servir(self):
+        """Atiende peticiones en el hilo actual hasta que se interrumpe"""
+        self._servidor.serve_forever()
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.detener()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local de fixtures de Books to Scrape")
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--latencia', type=float, default=0.0, help="Latencia añadida en ms")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Variación aleatoria de la latencia en ms")
+    parser.add_argument('--errores', type=float, default=0.0, help="Fracción de respuestas 503")
+    args = parser.parse_args()
+
+    servidor = ServidorFixtures(args.puerto, args.latencia, args.jitter, args.errores)
+    print(f"Sirviendo {len(servidor.listados)} listados y {len(servidor.detalles)} detalles "
+          f"en {servidor.base_url} (Ctrl+C para parar)")
+    try:
+        servidor.servir()
+    except KeyboardInterrupt:
+        servidor.detener()
@@ -0,0 +1,131 @@
+"""
+Cache HTTP en disco (SQLite) para el scraping incremental
+Guarda por URL el ETag, el Last-Modified, un hash del contenido
+y los datos ya parseados de la página. Cada scraper usa su propio espacio
+de claves, porque la misma URL se parsea con forma distinta en cada uno
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# Ventana de frescura por defecto: una página validada hace menos de 12 horas
+# se reutiliza sin preguntar al servidor. Revalidar también cuesta una petición
+# sujeta al limitador del host (~9 minutos para todo Books to Scrape a 2 pet/s),
+# a cambio de detectar al momento los cambios del sitio
+MAX_EDAD_POR_DEFECTO = 12 * 3600
+
+
+def hash_contenido(contenido):
+    """Huella SHA-256 del cuerpo de la respuesta"""
+    return hashlib.sha256(contenido).hexdigest()
+
+
+class CacheHTTP:
+    """
+    Almacén de validadores HTTP y datos parseados por (espacio, URL).
+    El espacio identifica al scraper y extractor que generó los datos, para
+    que dos scrapers que comparten fichero no lean resultados ajenos.
+    Args:
+        ruta: Fichero SQLite donde se guarda la cache
+        max_edad: Segundos durante los que una entrada se da por buena sin
+                  volver a preguntar al servidor (0 = revalidar siempre)
+    """
+
+    def __init__(self, ruta='cache_scraping.sqlite', max_edad=MAX_EDAD_POR_DEFECTO):
+        self.ruta = ruta
+        self.max_edad = max_edad
+        self.sin_cambios = 0
+        self.modificadas = 0
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        columnas = [fila[1] for fila in self._conexion.execute("PRAGMA table_info(paginas)")]
+        if columnas and 'espacio' not in columnas:
+            # Cache de formato anterior, indexada solo por URL: no se sabe qué
+            # scraper escribió cada entrada, así que se descarta
+            self._conexion.execute("DROP TABLE paginas")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS paginas (
+                espacio TEXT NOT NULL,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                hash TEXT NOT NULL,
+                datos TEXT NOT NULL,
+                validado REAL NOT NULL,
+                PRIMARY KEY (espacio, url)
+            )
+        """)
+        self._conexion.commit()
+
+    def obtener(self, url, espacio):
+        """Devuelve la entrada cacheada de la URL en el espacio o None"""
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT etag, last_modified, hash, datos, validado FROM paginas "
+                "WHERE espacio = ? AND url = ?",
+                (espacio, url)
+            ).fetchone()
+        if fila is None:
+            return None
+        etag, last_modified, huella, datos, validado = fila
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'hash': huella,
+            'datos': json.loads(datos),
+            'validado': validado
+        }
+
+    def vigente(self, entrada):
+        """Indica si la entrada puede usarse sin revalidar con el servidor"""
+        return self.max_edad > 0 and time.time() - entrada['validado'] < self.max_edad
+
+    def cabeceras_condicionales(self, entrada):
+        """Cabeceras If-None-Match / If-Modified-Since para una entrada"""
+        cabeceras = {}
+        if entrada and entrada['etag']:
+            cabeceras['If-None-Match'] = entrada['etag']
+        if entrada and entrada['last_modified']:
+            cabeceras['If-Modified-Since'] = entrada['last_modified']
+        return cabeceras
+
+    def guardar(self, url, espacio, etag, last_modified, huella, datos):
+        """Inserta o sustituye la entrada de una URL en el espacio"""
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO paginas "
+                "(espacio, url, etag, last_modified, hash, datos, validado) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (espacio, url, etag, last_modified, huella, json.dumps(datos, ensure_ascii=False),
+                 time.time())
+            )
+            self._conexion.commit()
+            self.modificadas += 1
+
+    def revalidar(self, url, espacio, etag=None, last_modified=None):
+        """Marca la entrada como vigente (respuesta 304 o mismo hash)"""
+        with self._lock:
+            self._conexion.execute(
+                "UPDATE paginas SET etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified), validado = ? WHERE espacio = ? AND url = ?",
+                (etag, last_modified, time.time(), espacio, url)
+            )
+            self._conexion.commit()
+            self.sin_cambios += 1
+
+    def contar_sin_cambios(self):
+        """Registra una entrada usada sin revalidar por estar vigente"""
+        with self._lock:
+            self.sin_cambios += 1
+
+    def mostrar(self):
+        print(f"\n🗄️  Cache: {self.sin_cambios} páginas sin cambios, "
+              f"{self.modificadas} nuevas o modificadas")
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
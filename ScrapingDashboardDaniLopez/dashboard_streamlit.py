@@ -3,13 +3,16 @@ Dashboard Interactivo de Libros con Streamlit
 Visualiza y analiza datos de Books to Scrape
 """
 
+import math
+
+import numpy as np
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from PIL import Image
-import requests
-from io import BytesIO
+
+from almacen_parquet import leer_libros
+from miniaturas import CacheMiniaturas
 
 # Configuración de la página
 st.set_page_config(
@@ -40,25 +43,136 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Columnas que usan filtros, métricas y gráficos; el catálogo carga aparte el resto
+COLUMNAS_ANALISIS = ('titulo', 'precio', 'rating', 'categoria', 'disponibilidad')
+COLUMNAS_CATALOGO = ('descripcion', 'url_imagen', 'url_libro')
+
+# Por encima de este número de filas el scatter se agrega en el servidor
+UMBRAL_PUNTOS = 5000
+
 @st.cache_data
 def cargar_datos():
-    """Carga los datos desde los archivos CSV"""
+    """Carga las columnas de análisis (Parquet si está disponible, si no CSV) y las estadísticas"""
     try:
-        df_completo = pd.read_csv('libros_completo.csv')
+        df_completo = leer_libros(list(COLUMNAS_ANALISIS))
+        df_completo['en_stock'] = df_completo['disponibilidad'].str.contains('In stock', na=False)
         df_stats = pd.read_csv('estadisticas_categorias.csv')
         return df_completo, df_stats
     except FileNotFoundError:
-        st.error("❌ No se encontraron los archivos CSV. Por favor, ejecuta primero 'scraping_libros.py'")
+        st.error("❌ No se encontraron los archivos CSV. Por favor, ejecuta primero 'scraping_books.py'")
         st.stop()
 
+@st.cache_data
+def cargar_columnas(columnas):
+    """Carga solo las columnas indicadas, indexadas por `id` para alinearlas con cargar_datos"""
+    return leer_libros(list(columnas))
+
+@st.cache_resource
+def obtener_cache_miniaturas():
+    """Cache de miniaturas compartida por todas las sesiones (rellenada por el scraper)"""
+    return CacheMiniaturas()
+
+@st.cache_resource
+def construir_indices():
+    """
+    Índices de solo lectura que se construyen una vez por dataset:
+    posiciones por categoría, precios ordenados para búsqueda por rango
+    y los vectores de rating y disponibilidad
+    """
+    df, _ = cargar_datos()
+    precios = df['precio'].to_numpy()
+    orden_precio = np.argsort(precios, kind='stable')
+    codigos = df['categoria'].astype('category').cat.codes.to_numpy()
+    categorias = df['categoria'].astype('category').cat.categories
+    return {
+        'por_categoria': {cat: np.flatnonzero(codigos == i) for i, cat in enumerate(categorias)},
+        'orden_precio': orden_precio,
+        'precios_ordenados': precios[orden_precio],
+        'precios': precios,
+        'ratings': df['rating'].to_numpy(),
+        'en_stock': df['en_stock'].to_numpy(),
+    }
+
+@st.cache_data
+def posiciones_filtradas(categoria, rango_precio, rating_minimo, solo_disponibles):
+    """Posiciones (en orden original) de los libros que cumplen los filtros"""
+    indices = construir_indices()
+    if categoria != 'Todas':
+        posiciones = indices['por_categoria'].get(categoria, np.array([], dtype=np.intp))
+        precios = indices['precios'][posiciones]
+        posiciones = posiciones[(precios >= rango_precio[0]) & (precios <= rango_precio[1])]
+    else:
+        # Búsqueda binaria sobre los precios ordenados en lugar de recorrer todo el dataset
+        desde = np.searchsorted(indices['precios_ordenados'], rango_precio[0], side='left')
+        hasta = np.searchsorted(indices['precios_ordenados'], rango_precio[1], side='right')
+        posiciones = np.sort(indices['orden_precio'][desde:hasta])
+
+    mascara = indices['ratings'][posiciones] >= rating_minimo
+    if solo_disponibles:
+        mascara &= indices['en_stock'][posiciones]
+    return posiciones[mascara]
+
+@st.cache_data
+def calcular_agregados(filtros):
+    """Métricas, conteos, histograma y tops del subconjunto filtrado, cacheados por filtros"""
+    df, _ = cargar_datos()
+    df_filtrado = df.iloc[posiciones_filtradas(*filtros)]
+
+    conteos, bordes = np.histogram(df_filtrado['precio'].to_numpy(dtype=np.float64), bins=20)
+    categoria_counts = df_filtrado['categoria'].value_counts()
+    columnas_top = ['titulo', 'rating', 'precio', 'categoria']
+    return {
+        'total': len(df_filtrado),
+        'precio_medio': df_filtrado['precio'].mean(),
+        'rating_medio': df_filtrado['rating'].mean(),
+        'num_categorias': df_filtrado['categoria'].nunique(),
+        'histograma_precio': (conteos, bordes),
+        'rating_counts': df_filtrado['rating'].value_counts().sort_index(),
+        'categoria_counts': categoria_counts[categoria_counts > 0].head(10),
+        'top_rating': df_filtrado.nlargest(5, 'rating')[columnas_top],
+        'top_precio': df_filtrado.nlargest(5, 'precio')[columnas_top],
+    }
+
+@st.cache_data
+def preparar_scatter(filtros, max_puntos, modo):
+    """
+    Datos del gráfico precio-rating con tamaño acotado:
+    - por debajo de max_puntos se devuelven todas las filas
+    - 'Muestra estratificada': muestra proporcional por categoría de max_puntos filas
+    - 'Densidad': matriz de conteos precio x rating calculada con NumPy
+    """
+    df, _ = cargar_datos()
+    df_filtrado = df.iloc[posiciones_filtradas(*filtros)][['titulo', 'precio', 'rating', 'categoria']]
+
+    if len(df_filtrado) <= max_puntos:
+        return 'puntos', df_filtrado
+
+    if modo == 'Muestra estratificada':
+        fraccion = max_puntos / len(df_filtrado)
+        muestra = (df_filtrado.groupby('categoria', observed=True, group_keys=False)
+                   .sample(frac=fraccion, random_state=0))
+        return 'puntos', muestra
+
+    conteos, bordes_precio, _ = np.histogram2d(
+        df_filtrado['precio'].to_numpy(dtype=np.float64),
+        df_filtrado['rating'].to_numpy(dtype=np.float64),
+        bins=[40, np.arange(0.5, 6.5)]
+    )
+    return 'densidad', (conteos.T, (bordes_precio[:-1] + bordes_precio[1:]) / 2)
+
 def mostrar_imagen_libro(url):
-    """Muestra la imagen del libro desde una URL"""
-    try:
-        response = requests.get(url)
-        img = Image.open(BytesIO(response.content))
-        return img
-    except:
+    """
+    Devuelve la miniatura local del libro o, si no se ha precargado, la URL
+    remota de la portada para que la descargue el navegador (None sin portada)
+    """
+    if not isinstance(url, str) or not url:
         return None
+    return obtener_cache_miniaturas().leer(url) or url
+
+def cambiar_pagina(desplazamiento, num_paginas):
+    """Callback de los botones de navegación del catálogo"""
+    pagina = st.session_state.catalogo_pagina + desplazamiento
+    st.session_state.catalogo_pagina = min(max(1, pagina), num_paginas)
 
 def main():
     # Header principal
@@ -74,7 +188,7 @@ def main():
     st.sidebar.markdown("---")
 
     # Filtro por categoría
-    categorias = ['Todas'] + sorted(df['categoria'].unique().tolist())
+    categorias = ['Todas'] + sorted(construir_indices()['por_categoria'])
     categoria_seleccionada = st.sidebar.selectbox(
         "📖 Selecciona una categoría:",
         categorias
@@ -102,20 +216,17 @@ def main():
         value=False
     )
 
-    # Aplicar filtros
-    df_filtrado = df.copy()
-
-    if categoria_seleccionada != 'Todas':
-        df_filtrado = df_filtrado[df_filtrado['categoria'] == categoria_seleccionada]
+    # Opciones de agregación de los gráficos
+    with st.sidebar.expander("⚙️ Gráficos grandes"):
+        max_puntos = st.number_input("Máx. puntos en el scatter:", min_value=100,
+                                     value=UMBRAL_PUNTOS, step=1000)
+        modo_agregacion = st.radio("Por encima del máximo:",
+                                   ["Densidad", "Muestra estratificada"])
 
-    df_filtrado = df_filtrado[
-        (df_filtrado['precio'] >= rango_precio[0]) &
-        (df_filtrado['precio'] <= rango_precio[1]) &
-        (df_filtrado['rating'] >= rating_minimo)
-    ]
-
-    if mostrar_disponibles:
-        df_filtrado = df_filtrado[df_filtrado['disponibilidad'].str.contains('In stock', na=False)]
+    # Aplicar filtros con los índices precalculados
+    filtros = (categoria_seleccionada, tuple(rango_precio), rating_minimo, mostrar_disponibles)
+    df_filtrado = df.iloc[posiciones_filtradas(*filtros)]
+    agregados = calcular_agregados(filtros)
 
     # Métricas principales
     st.markdown("---")
@@ -124,26 +235,26 @@ def main():
     with col1:
         st.metric(
             label="📚 Total Libros",
-            value=len(df_filtrado),
-            delta=f"{len(df_filtrado) - len(df)} respecto al total"
+            value=agregados['total'],
+            delta=f"{agregados['total'] - len(df)} respecto al total"
         )
 
     with col2:
         st.metric(
             label="💰 Precio Promedio",
-            value=f"£{df_filtrado['precio'].mean():.2f}"
+            value=f"£{agregados['precio_medio']:.2f}"
         )
 
     with col3:
         st.metric(
             label="⭐ Rating Promedio",
-            value=f"{df_filtrado['rating'].mean():.1f}/5"
+            value=f"{agregados['rating_medio']:.1f}/5"
         )
 
     with col4:
         st.metric(
             label="📂 Categorías",
-            value=df_filtrado['categoria'].nunique()
+            value=agregados['num_categorias']
         )
 
     # Pestañas para diferentes vistas
@@ -157,20 +268,21 @@ def main():
         with col1:
             # Gráfico de distribución de precios
             st.subheader("💰 Distribución de Precios")
-            fig_precio = px.histogram(
-                df_filtrado,
-                x='precio',
-                nbins=20,
+            conteos, bordes = agregados['histograma_precio']
+            fig_precio = px.bar(
+                x=(bordes[:-1] + bordes[1:]) / 2,
+                y=conteos,
                 title='Distribución de Precios',
-                labels={'precio': 'Precio (£)', 'count': 'Cantidad de Libros'},
+                labels={'x': 'Precio (£)', 'y': 'Cantidad de Libros'},
                 color_discrete_sequence=['#667eea']
             )
+            fig_precio.update_traces(width=np.diff(bordes))
             st.plotly_chart(fig_precio, use_container_width=True)
 
         with col2:
             # Gráfico de ratings
             st.subheader("⭐ Distribución de Ratings")
-            rating_counts = df_filtrado['rating'].value_counts().sort_index()
+            rating_counts = agregados['rating_counts']
             fig_rating = px.bar(
                 x=rating_counts.index,
                 y=rating_counts.values,
@@ -183,7 +295,7 @@ def main():
 
         # Gráfico de categorías
         st.subheader("📚 Libros por Categoría")
-        categoria_counts = df_filtrado['categoria'].value_counts().head(10)
+        categoria_counts = agregados['categoria_counts']
         fig_categorias = px.bar(
             x=categoria_counts.values,
             y=categoria_counts.index,
@@ -197,20 +309,40 @@ def main():
 
         # Relación precio-rating
         st.subheader("💰⭐ Relación Precio vs Rating")
-        fig_scatter = px.scatter(
-            df_filtrado,
-            x='precio',
-            y='rating',
-            color='categoria',
-            size='precio',
-            hover_data=['titulo'],
-            title='Relación entre Precio y Rating',
-            labels={'precio': 'Precio (£)', 'rating': 'Rating'}
-        )
+        tipo, datos_scatter = preparar_scatter(filtros, max_puntos, modo_agregacion)
+        if tipo == 'puntos':
+            if len(datos_scatter) < agregados['total']:
+                st.caption(f"Muestra estratificada de {len(datos_scatter)} de {agregados['total']} libros")
+            fig_scatter = px.scatter(
+                datos_scatter,
+                x='precio',
+                y='rating',
+                color='categoria',
+                size='precio',
+                hover_data=['titulo'],
+                title='Relación entre Precio y Rating',
+                labels={'precio': 'Precio (£)', 'rating': 'Rating'}
+            )
+        else:
+            conteos, centros_precio = datos_scatter
+            st.caption(f"Densidad de {agregados['total']} libros agregados en el servidor")
+            fig_scatter = go.Figure(go.Heatmap(
+                z=conteos,
+                x=centros_precio,
+                y=[1, 2, 3, 4, 5],
+                colorscale='Viridis',
+                colorbar={'title': 'Libros'}
+            ))
+            fig_scatter.update_layout(
+                title='Relación entre Precio y Rating',
+                xaxis_title='Precio (£)',
+                yaxis_title='Rating'
+            )
         st.plotly_chart(fig_scatter, use_container_width=True)
 
     with tab2:
         st.header("📋 Catálogo de Libros")
+        obtener_cache_miniaturas().actualizar()
 
         # Selector de ordenamiento
         col1, col2 = st.columns([3, 1])
@@ -220,6 +352,8 @@ def main():
                 ["Título (A-Z)", "Precio (Mayor a Menor)", "Precio (Menor a Mayor)",
                  "Rating (Mayor a Menor)", "Rating (Menor a Mayor)"]
             )
+        with col2:
+            tamano_pagina = st.selectbox("Libros por página:", [10, 20, 50, 100], index=1)
 
         # Aplicar ordenamiento
         if orden == "Título (A-Z)":
@@ -233,8 +367,37 @@ def main():
         else:
             df_mostrar = df_filtrado.sort_values('rating')
 
+        # Paginación: filtros y orden se aplican antes de cortar la página
+        num_paginas = max(1, math.ceil(len(df_mostrar) / tamano_pagina))
+        firma = (categoria_seleccionada, rango_precio, rating_minimo,
+                 mostrar_disponibles, orden, tamano_pagina)
+        if st.session_state.get('catalogo_firma') != firma:
+            # Si cambian los filtros o el orden se vuelve a la primera página
+            st.session_state.catalogo_firma = firma
+            st.session_state.catalogo_pagina = 1
+        st.session_state.catalogo_pagina = min(st.session_state.catalogo_pagina, num_paginas)
+
+        col_ant, col_pag, col_sig = st.columns([1, 2, 1])
+        with col_ant:
+            st.button("◀ Anterior", on_click=cambiar_pagina, args=(-1, num_paginas),
+                      disabled=st.session_state.catalogo_pagina <= 1)
+        with col_pag:
+            pagina = st.number_input(f"Página (de {num_paginas}):", min_value=1,
+                                     max_value=num_paginas, key='catalogo_pagina')
+        with col_sig:
+            st.button("Siguiente ▶", on_click=cambiar_pagina, args=(1, num_paginas),
+                      disabled=st.session_state.catalogo_pagina >= num_paginas)
+
+        inicio = (pagina - 1) * tamano_pagina
+        df_pagina = df_mostrar.iloc[inicio:inicio + tamano_pagina]
+        st.caption(f"Mostrando {inicio + 1 if len(df_pagina) else 0}–{inicio + len(df_pagina)} "
+                   f"de {len(df_mostrar)} libros")
+
+        # Descripciones y URLs solo se leen para los libros de la página
+        df_pagina = df_pagina.join(cargar_columnas(COLUMNAS_CATALOGO))
+
         # Mostrar libros en tarjetas
-        for idx, libro in df_mostrar.iterrows():
+        for idx, libro in df_pagina.iterrows():
             with st.container():
                 col1, col2 = st.columns([1, 3])
 
@@ -253,7 +416,7 @@ def main():
                     with col_b:
                         st.markdown(f"**⭐ Rating:** {'⭐' * libro['rating']}")
                     with col_c:
-                        disponible = "✅ Disponible" if "In stock" in str(libro['disponibilidad']) else "❌ No disponible"
+                        disponible = "✅ Disponible" if libro['en_stock'] else "❌ No disponible"
                         st.markdown(f"**{disponible}**")
 
                     with st.expander("📝 Ver descripción"):
@@ -269,7 +432,7 @@ def main():
 
         with col1:
             st.subheader("💎 Libros Mejor Valorados")
-            top_rating = df_filtrado.nlargest(5, 'rating')[['titulo', 'rating', 'precio', 'categoria']]
+            top_rating = agregados['top_rating']
             for idx, libro in top_rating.iterrows():
                 st.markdown(f"""
                 **{libro['titulo'][:50]}...**  
@@ -279,7 +442,7 @@ def main():
 
         with col2:
             st.subheader("💰 Libros Más Caros")
-            top_precio = df_filtrado.nlargest(5, 'precio')[['titulo', 'precio', 'rating', 'categoria']]
+            top_precio = agregados['top_precio']
             for idx, libro in top_precio.iterrows():
                 st.markdown(f"""
                 **{libro['titulo'][:50]}...**  
@@ -0,0 +1,179 @@
+"""
+Extractores declarativos por sitio
+Cada catálogo se describe con un SitioConfig: plantilla de las páginas del
+listado, selector CSS de cada elemento, campos a extraer (del listado y de la
+página de detalle) y límites de peticiones contra su dominio.
+Añadir un sitio nuevo consiste en definir su configuración en SITIOS
+"""
+
+import copy
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from parsers import LXML_DISPONIBLE, obtener_rating_numerico
+from salida_streaming import CAMPOS
+
+
+PARSER_HTML = 'lxml' if LXML_DISPONIBLE else 'html.parser'
+
+
+class Campo:
+    """
+    Regla de extracción de un campo.
+    Args:
+        selector: Selector CSS relativo al elemento (o a la página en el detalle)
+        atributo: Atributo a leer; si es None se usa el texto del nodo
+        transformar: Función aplicada al valor extraído
+        url: Si True, el valor se resuelve como URL absoluta respecto a la página
+        multiple: Si True, devuelve la lista de valores de todos los nodos
+        defecto: Valor cuando el selector no encuentra nada
+    """
+
+    def __init__(self, selector, atributo=None, transformar=None, url=False,
+                 multiple=False, defecto=''):
+        self.selector = selector
+        self.atributo = atributo
+        self.transformar = transformar
+        self.url = url
+        self.multiple = multiple
+        self.defecto = defecto
+
+    def _valor(self, nodo, url_pagina):
+        if self.atributo is None:
+            return nodo.get_text(strip=True)
+        valor = nodo.get(self.atributo, '')
+        if isinstance(valor, list):  # atributos multivaluados como `class`
+            valor = ' '.join(valor)
+        return urljoin(url_pagina, valor) if self.url else valor
+
+    def extraer(self, raiz, url_pagina):
+        if self.multiple:
+            valor = [self._valor(nodo, url_pagina) for nodo in raiz.select(self.selector)]
+        else:
+            nodo = raiz.select_one(self.selector)
+            if nodo is None:
+                return self.defecto
+            valor = self._valor(nodo, url_pagina)
+        return self.transformar(valor) if self.transformar else valor
+
+
+class SitioConfig:
+    """
+    Definición declarativa de un catálogo.
+    Args:
+        nombre: Identificador del sitio
+        base_url: URL raíz del sitio
+        url_listado: Plantilla relativa de las páginas del listado con `{pagina}`
+        selector_elemento: Selector CSS de cada elemento del listado
+        campos: Campos del listado {nombre: Campo}
+        campos_detalle: Campos de la página de detalle (vacío si no hay detalle)
+        campo_url_detalle: Campo del listado con la URL de la página de detalle
+        columnas: Orden de las columnas de salida (None = en el orden de los campos)
+        max_concurrencia: Peticiones simultáneas permitidas contra el dominio
+        peticiones_por_segundo: Ritmo medio máximo contra el dominio
+        num_paginas: Páginas del listado por defecto
+    """
+
+    def __init__(self, nombre, base_url, url_listado, selector_elemento, campos,
+                 campos_detalle=None, campo_url_detalle=None, columnas=None,
+                 max_concurrencia=4, peticiones_por_segundo=2.0, num_paginas=3):
+        self.nombre = nombre
+        self.base_url = base_url
+        self.url_listado = url_listado
+        self.selector_elemento = selector_elemento
+        self.campos = campos
+        self.campos_detalle = campos_detalle or {}
+        self.campo_url_detalle = campo_url_detalle
+        self.columnas = columnas or list(campos) + list(self.campos_detalle)
+        self.max_concurrencia = max_concurrencia
+        self.peticiones_por_segundo = peticiones_por_segundo
+        self.num_paginas = num_paginas
+
+    @property
+    def dominio(self):
+        return urlparse(self.base_url).netloc
+
+    def url_pagina(self, pagina):
+        return urljoin(self.base_url, self.url_listado.format(pagina=pagina))
+
+    def con_base_url(self, base_url):
+        """Copia de la configuración apuntando a otro servidor (p. ej. uno local de pruebas)"""
+        sitio = copy.copy(self)
+        sitio.base_url = base_url
+        return sitio
+
+    def extraer_listado(self, html, url_pagina):
+        """Lista de diccionarios, uno por elemento del listado"""
+        soup = BeautifulSoup(html, PARSER_HTML)
+        return [{nombre: campo.extraer(elemento, url_pagina) for nombre, campo in self.campos.items()}
+                for elemento in soup.select(self.selector_elemento)]
+
+    def extraer_detalle(self, html, url_pagina):
+        soup = BeautifulSoup(html, PARSER_HTML)
+        return {nombre: campo.extraer(soup, url_pagina) for nombre, campo in self.campos_detalle.items()}
+
+    def detalle_vacio(self):
+        """Valores de detalle cuando la página no se pudo descargar"""
+        return {nombre: 'N/A' for nombre in self.campos_detalle}
+
+    def combinar(self, basico, detalle):
+        registro = {**basico, **detalle}
+        return {columna: registro.get(columna, '') for columna in self.columnas}
+
+
+def _precio(texto):
+    return float(texto.replace('£', '').strip())
+
+
+def _fila_tabla(cabecera):
+    return f'table.table-striped tr:has(> th:-soup-contains("{cabecera}")) > td'
+
+
+BOOKS_TO_SCRAPE = SitioConfig(
+    nombre='books_to_scrape',
+    base_url='https://books.toscrape.com/',
+    url_listado='catalogue/page-{pagina}.html',
+    selector_elemento='article.product_pod',
+    campos={
+        'titulo': Campo('h3 > a', atributo='title'),
+        'precio': Campo('p.price_color', transformar=_precio),
+        'rating': Campo('p.star-rating', atributo='class', transformar=obtener_rating_numerico),
+        'url_imagen': Campo('img', atributo='src', url=True),
+        'disponibilidad': Campo('p.instock.availability', defecto='Unknown'),
+        'url_libro': Campo('h3 > a', atributo='href', url=True),
+    },
+    campos_detalle={
+        'categoria': Campo('ul.breadcrumb > li:nth-of-type(3)', defecto='N/A'),
+        'descripcion': Campo('article.product_page > p', transformar=lambda texto: texto[:200],
+                             defecto='Sin descripción'),
+        'upc': Campo(_fila_tabla('UPC')),
+        'disponibilidad': Campo(_fila_tabla('Availability')),
+    },
+    campo_url_detalle='url_libro',
+    columnas=CAMPOS,
+    max_concurrencia=4,
+    peticiones_por_segundo=2.0,
+)
+
+QUOTES_TO_SCRAPE = SitioConfig(
+    nombre='quotes_to_scrape',
+    base_url='https://quotes.toscrape.com/',
+    url_listado='page/{pagina}/',
+    selector_elemento='div.quote',
+    campos={
+        'texto': Campo('span.text'),
+        'autor': Campo('small.author'),
+        'etiquetas': Campo('div.tags a.tag', multiple=True, transformar=', '.join),
+        'url_autor': Campo('span > a', atributo='href', url=True),
+    },
+    campos_detalle={
+        'nacimiento': Campo('span.author-born-date'),
+        'lugar_nacimiento': Campo('span.author-born-location'),
+    },
+    campo_url_detalle='url_autor',
+    max_concurrencia=2,
+    peticiones_por_segundo=1.0,
+)
+
+SITIOS = {sitio.nombre: sitio for sitio in (BOOKS_TO_SCRAPE, QUOTES_TO_SCRAPE)}
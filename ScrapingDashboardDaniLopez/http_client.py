@@ -0,0 +1,208 @@
+"""
+Cliente HTTP compartido para el scraper
+Reutiliza conexiones (keep-alive), reintenta con backoff exponencial
+y mide el coste de los handshakes y de las peticiones
+"""
+
+import math
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+
+def percentil(valores_ordenados, p):
+    """Percentil p (0-100) por rango más cercano de una lista ya ordenada"""
+    if not valores_ordenados:
+        return 0.0
+    indice = max(0, math.ceil(p / 100 * len(valores_ordenados)) - 1)
+    return valores_ordenados[indice]
+
+
+class EstadisticasHTTP:
+    """Acumula latencias de peticiones y handshakes de forma segura entre hilos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.conexiones = 0
+        self.tiempo_handshake = 0.0
+        self.reintentos = 0
+        self.errores = 0
+        self.latencias = []
+
+    def registrar_conexion(self, segundos):
+        with self._lock:
+            self.conexiones += 1
+            self.tiempo_handshake += segundos
+
+    def registrar_peticion(self, segundos):
+        with self._lock:
+            self.latencias.append(segundos)
+
+    def registrar_reintento(self):
+        with self._lock:
+            self.reintentos += 1
+
+    def registrar_error(self):
+        with self._lock:
+            self.errores += 1
+
+    def resumen(self):
+        """Devuelve un diccionario con las métricas acumuladas"""
+        with self._lock:
+            latencias = sorted(self.latencias)
+            conexiones = self.conexiones
+            tiempo_handshake = self.tiempo_handshake
+            reintentos = self.reintentos
+            errores = self.errores
+
+        peticiones = len(latencias)
+        handshake_medio = tiempo_handshake / conexiones if conexiones else 0.0
+        handshakes_evitados = max(0, peticiones - conexiones)
+        return {
+            'peticiones': peticiones,
+            'errores': errores,
+            'reintentos': reintentos,
+            'conexiones_abiertas': conexiones,
+            'handshakes_evitados': handshakes_evitados,
+            'handshake_medio_ms': handshake_medio * 1000,
+            'ahorro_estimado_s': handshakes_evitados * handshake_medio,
+            'latencia_p50_ms': percentil(latencias, 50) * 1000,
+            'latencia_p95_ms': percentil(latencias, 95) * 1000,
+            'latencia_p99_ms': percentil(latencias, 99) * 1000,
+            'latencia_max_ms': (latencias[-1] if latencias else 0.0) * 1000,
+        }
+
+    def mostrar(self):
+        """Imprime el resumen de latencias y el ahorro del pool de conexiones"""
+        r = self.resumen()
+        print("\n" + "=" * 60)
+        print("ESTADÍSTICAS HTTP")
+        print("=" * 60)
+        print(f"Peticiones: {r['peticiones']} | Errores: {r['errores']} | Reintentos: {r['reintentos']}")
+        print(f"Conexiones abiertas: {r['conexiones_abiertas']} "
+              f"(handshake medio {r['handshake_medio_ms']:.1f} ms)")
+        print(f"Handshakes evitados por keep-alive: {r['handshakes_evitados']} "
+              f"(~{r['ahorro_estimado_s']:.1f}s ahorrados)")
+        print(f"Latencia petición: p50 {r['latencia_p50_ms']:.1f} ms | "
+              f"p95 {r['latencia_p95_ms']:.1f} ms | máx {r['latencia_max_ms']:.1f} ms")
+
+
+def _clases_medidas(estadisticas):
+    """Crea pools de urllib3 cuyas conexiones registran el tiempo de handshake (TCP + TLS)"""
+
+    class ConexionHTTP(HTTPConnection):
+        def connect(self):
+            inicio = time.perf_counter()
+            super().connect()
+            estadisticas.registrar_conexion(time.perf_counter() - inicio)
+
+    class ConexionHTTPS(HTTPSConnection):
+        def connect(self):
+            inicio = time.perf_counter()
+            super().connect()
+            estadisticas.registrar_conexion(time.perf_counter() - inicio)
+
+    class PoolHTTP(HTTPConnectionPool):
+        ConnectionCls = ConexionHTTP
+
+    class PoolHTTPS(HTTPSConnectionPool):
+        ConnectionCls = ConexionHTTPS
+
+    class ReintentoMedido(Retry):
+        def increment(self, *args, **kwargs):
+            nuevo = super().increment(*args, **kwargs)
+            estadisticas.registrar_reintento()
+            return nuevo
+
+    return {'http': PoolHTTP, 'https': PoolHTTPS}, ReintentoMedido
+
+
+class AdaptadorMedido(HTTPAdapter):
+    """HTTPAdapter que instala los pools medidos en su PoolManager"""
+
+    def __init__(self, pools, **kwargs):
+        self._pools = pools
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pools
+
+
+class ClienteHTTP:
+    """
+    Sesión HTTP con pool de conexiones persistentes y política de reintentos.
+    Args:
+        tamano_pool: Conexiones keep-alive que se conservan por host
+        timeout: Tupla (conexión, lectura) en segundos
+        reintentos: Reintentos ante errores 5xx, timeouts o fallos de conexión
+        backoff: Factor del backoff exponencial (backoff * 2^intento segundos)
+    """
+
+    def __init__(self, tamano_pool=10, timeout=(5, 15), reintentos=3, backoff=0.5):
+        self.timeout = timeout
+        self.estadisticas = EstadisticasHTTP()
+
+        pools, clase_reintento = _clases_medidas(self.estadisticas)
+        politica = clase_reintento(
+            total=reintentos,
+            backoff_factor=backoff,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True
+        )
+        adaptador = AdaptadorMedido(pools, pool_connections=tamano_pool,
+                                    pool_maxsize=tamano_pool, max_retries=politica)
+
+        self.session = requests.Session()
+        self.session.mount('http://', adaptador)
+        self.session.mount('https://', adaptador)
+
+    def get(self, url, **kwargs):
+        """GET a través del pool; registra la latencia total (incluidos reintentos)"""
+        kwargs.setdefault('timeout', self.timeout)
+        inicio = time.perf_counter()
+        try:
+            response = self.session.get(url, **kwargs)
+        except requests.RequestException:
+            self.estadisticas.registrar_error()
+            raise
+        self.estadisticas.registrar_peticion(time.perf_counter() - inicio)
+        return response
+
+    def cerrar(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+
+
+_cliente_por_defecto = None
+_lock_cliente = threading.Lock()
+
+
+def obtener_cliente():
+    """Devuelve el cliente compartido por todas las descargas del scraper"""
+    global _cliente_por_defecto
+    with _lock_cliente:
+        if _cliente_por_defecto is None:
+            _cliente_por_defecto = ClienteHTTP()
+        return _cliente_por_defecto
+
+
+def configurar_cliente(**opciones):
+    """Sustituye el cliente compartido por uno nuevo con las opciones indicadas"""
+    global _cliente_por_defecto
+    with _lock_cliente:
+        if _cliente_por_defecto is not None:
+            _cliente_por_defecto.cerrar()
+        _cliente_por_defecto = ClienteHTTP(**opciones)
+        return _cliente_por_defecto
@@ -0,0 +1,171 @@
+"""
+Cache local de miniaturas de portadas
+Las imágenes se descargan en paralelo, se reducen al ancho que muestra el
+dashboard y se guardan direccionadas por el hash de su contenido; un índice
+relaciona cada URL con su fichero
+Uso: python miniaturas.py [--csv libros_completo.csv] [--concurrencia 8]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image
+
+from http_client import obtener_cliente
+
+
+DIRECTORIO_MINIATURAS = 'miniaturas'
+ANCHO_MINIATURA = 150
+
+
+class CacheMiniaturas:
+    """
+    Almacén de miniaturas en disco con una LRU en memoria delante.
+    Args:
+        directorio: Carpeta de la cache (se crea si no existe)
+        ancho: Ancho en píxeles al que se reducen las portadas
+        max_en_memoria: Miniaturas que se conservan en la LRU del proceso
+    """
+
+    def __init__(self, directorio=DIRECTORIO_MINIATURAS, ancho=ANCHO_MINIATURA, max_en_memoria=512):
+        self.directorio = directorio
+        self.ancho = ancho
+        self.max_en_memoria = max_en_memoria
+        self.ruta_indice = os.path.join(directorio, 'indice.json')
+        self._indice = {}  # url -> hash del contenido
+        self._mtime_indice = None
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+        self.actualizar()
+
+    def actualizar(self):
+        """Recarga el índice si otro proceso (p. ej. el scraper) lo ha modificado"""
+        try:
+            mtime = os.path.getmtime(self.ruta_indice)
+        except OSError:
+            return
+        if mtime == self._mtime_indice:
+            return
+        with open(self.ruta_indice, encoding='utf-8') as f:
+            indice = json.load(f)
+        with self._lock:
+            self._indice = indice
+            self._mtime_indice = mtime
+
+    def _ruta_hash(self, huella):
+        return os.path.join(self.directorio, huella[:2], f"{huella}.jpg")
+
+    def contiene(self, url):
+        return url in self._indice
+
+    def guardar(self, url, contenido):
+        """Reduce la imagen al ancho configurado y la guarda por su hash"""
+        img = Image.open(BytesIO(contenido)).convert('RGB')
+        if img.width > self.ancho:
+            alto = round(img.height * self.ancho / img.width)
+            img = img.resize((self.ancho, alto), Image.LANCZOS)
+        buffer = BytesIO()
+        img.save(buffer, format='JPEG', quality=85, optimize=True)
+        datos = buffer.getvalue()
+
+        huella = hashlib.sha256(datos).hexdigest()
+        ruta = self._ruta_hash(huella)
+        # Portadas idénticas comparten fichero
+        if not os.path.exists(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            temporal = f"{ruta}.{threading.get_ident()}.tmp"
+            with open(temporal, 'wb') as f:
+                f.write(datos)
+            os.replace(temporal, ruta)
+
+        with self._lock:
+            self._indice[url] = huella
+
+    def guardar_indice(self):
+        with self._lock:
+            indice = dict(self._indice)
+        temporal = self.ruta_indice + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(indice, f)
+        os.replace(temporal, self.ruta_indice)
+        self._mtime_indice = os.path.getmtime(self.ruta_indice)
+
+    def leer(self, url):
+        """Bytes JPEG de la miniatura o None si no está en cache (nunca accede a la red)"""
+        with self._lock:
+            if url in self._lru:
+                self._lru.move_to_end(url)
+                return self._lru[url]
+            huella = self._indice.get(url)
+        if huella is None:
+            return None
+
+        try:
+            with open(self._ruta_hash(huella), 'rb') as f:
+                datos = f.read()
+        except OSError:
+            return None
+
+        with self._lock:
+            self._lru[url] = datos
+            if len(self._lru) > self.max_en_memoria:
+                self._lru.popitem(last=False)
+        return datos
+
+
+def prefetch_miniaturas(urls, directorio=DIRECTORIO_MINIATURAS, max_concurrencia=8,
+                        cliente=None, limitador=None):
+    """
+    Descarga en paralelo las portadas que aún no están en la cache.
+    Returns:
+        (descargadas, ya_en_cache, errores)
+    """
+    cliente = cliente or obtener_cliente()
+    cache = CacheMiniaturas(directorio)
+    pendientes = list(dict.fromkeys(url for url in urls if not cache.contiene(url)))
+    ya_en_cache = len(set(urls)) - len(pendientes)
+    errores = 0
+
+    def procesar(url):
+        if limitador:
+            limitador.esperar(url)
+        response = cliente.get(url)
+        response.raise_for_status()
+        cache.guardar(url, response.content)
+
+    print(f"\nDescargando {len(pendientes)} miniaturas ({ya_en_cache} ya en cache)...")
+    with ThreadPoolExecutor(max_workers=max_concurrencia) as pool:
+        for url, futuro in [(url, pool.submit(procesar, url)) for url in pendientes]:
+            try:
+                futuro.result()
+            except Exception as e:
+                errores += 1
+                print(f"✗ Error con la miniatura {url}: {e}")
+
+    cache.guardar_indice()
+    descargadas = len(pendientes) - errores
+    print(f"✓ Miniaturas: {descargadas} descargadas, {ya_en_cache} ya en cache, {errores} errores")
+    return descargadas, ya_en_cache, errores
+
+
+if __name__ == "__main__":
+    import pandas as pd
+    from scraping_books import LimitadorPorHost
+
+    parser = argparse.ArgumentParser(description="Precarga de miniaturas para el dashboard")
+    parser.add_argument('--csv', default='libros_completo.csv')
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--rps', type=float, default=5.0,
+                        help="Peticiones por segundo permitidas por host")
+    args = parser.parse_args()
+
+    urls = pd.read_csv(args.csv, usecols=['url_imagen'])['url_imagen'].tolist()
+    prefetch_miniaturas(urls, max_concurrencia=args.concurrencia,
+                        limitador=LimitadorPorHost(args.rps, rafaga=args.concurrencia))
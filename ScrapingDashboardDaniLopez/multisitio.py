@@ -0,0 +1,224 @@
+"""
+Scraping de varios catálogos en un mismo proceso
+Las descargas de todos los sitios comparten un planificador que limita la
+concurrencia y el ritmo de peticiones por dominio y reparte los hilos por
+turnos, de modo que ningún sitio acapara el ancho de banda ni recibe más
+peticiones de las configuradas
+Uso: python multisitio.py [--sitios books_to_scrape quotes_to_scrape] [--paginas 3]
+"""
+
+import argparse
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import pandas as pd
+
+from cache_http import CacheHTTP, MAX_EDAD_POR_DEFECTO
+from extractores import SITIOS
+from http_client import obtener_cliente, configurar_cliente
+from scraping_books import LimitadorPorHost, obtener_pagina, mostrar_rendimiento
+
+
+class PlanificadorDominios:
+    """
+    Cola de descargas con un límite de concurrencia y un token bucket por dominio.
+    Los dominios se atienden por turno rotatorio: en cada hueco libre se lanza
+    la siguiente tarea del primer dominio con capacidad disponible.
+    Args:
+        max_workers: Hilos totales compartidos por todos los dominios
+    """
+
+    def __init__(self, max_workers=16):
+        self.max_workers = max_workers
+        self._colas = {}  # dominio -> deque de (url, procesar, al_terminar)
+        self._limites = {}
+        self._activos = {}
+        self._limitadores = {}
+        self._turno = deque()
+        self.peticiones = {}  # dominio -> tareas completadas
+
+    def registrar_dominio(self, dominio, max_concurrencia=4, peticiones_por_segundo=2.0):
+        if dominio in self._colas:
+            return
+        self._colas[dominio] = deque()
+        self._limites[dominio] = max(1, max_concurrencia)
+        self._activos[dominio] = 0
+        self._limitadores[dominio] = LimitadorPorHost(peticiones_por_segundo, rafaga=max_concurrencia)
+        self._turno.append(dominio)
+        self.peticiones[dominio] = 0
+
+    def encolar(self, dominio, url, procesar, al_terminar):
+        """
+        Añade una descarga a la cola de su dominio.
+        Args:
+            procesar: Función ejecutada en un hilo con la URL y el limitador del dominio
+            al_terminar: Callback (resultado, error) ejecutado en el hilo del planificador;
+                puede encolar nuevas tareas
+        """
+        self._colas[dominio].append((url, procesar, al_terminar))
+
+    def _siguiente_dominio(self):
+        """Primer dominio en turno con tareas pendientes y concurrencia libre"""
+        for _ in range(len(self._turno)):
+            dominio = self._turno[0]
+            self._turno.rotate(-1)
+            if self._colas[dominio] and self._activos[dominio] < self._limites[dominio]:
+                return dominio
+        return None
+
+    def ejecutar(self):
+        """Procesa las colas hasta que no quedan tareas pendientes ni en curso"""
+        hilos = min(self.max_workers, sum(self._limites.values()) or 1)
+        en_curso = {}
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            while True:
+                while len(en_curso) < hilos:
+                    dominio = self._siguiente_dominio()
+                    if dominio is None:
+                        break
+                    url, procesar, al_terminar = self._colas[dominio].popleft()
+                    self._activos[dominio] += 1
+                    futuro = pool.submit(procesar, url, self._limitadores[dominio])
+                    en_curso[futuro] = (dominio, al_terminar)
+
+                if not en_curso:
+                    break
+
+                terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    dominio, al_terminar = en_curso.pop(futuro)
+                    self._activos[dominio] -= 1
+                    self.peticiones[dominio] += 1
+                    try:
+                        resultado, error = futuro.result(), None
+                    except Exception as e:
+                        resultado, error = None, e
+                    al_terminar(resultado, error)
+
+
+def scrape_sitios(sitios, num_paginas=None, max_workers=16, cliente=None, cache=None):
+    """
+    Extrae varios catálogos a la vez con un planificador común.
+    Args:
+        sitios: Lista de SitioConfig
+        num_paginas: Páginas del listado por sitio (None = las de cada configuración)
+        max_workers: Hilos totales compartidos por todos los sitios
+        cache: CacheHTTP opcional para peticiones condicionales; cada sitio usa
+               su propio espacio (multisitio:<nombre>) dentro de ella
+    Returns:
+        Diccionario {nombre del sitio: lista de registros en el orden del listado}
+    """
+    cliente = cliente or obtener_cliente()
+    planificador = PlanificadorDominios(max_workers)
+    resultados = {sitio.nombre: [] for sitio in sitios}
+
+    def programar_sitio(sitio):
+        planificador.registrar_dominio(sitio.dominio, sitio.max_concurrencia, sitio.peticiones_por_segundo)
+        registros = resultados[sitio.nombre]
+        espacio = f"multisitio:{sitio.nombre}"
+
+        def descargar(extractor):
+            def procesar(url, limitador):
+                return obtener_pagina(url, lambda html: extractor(html, url), limitador, cliente, cache, espacio)
+            return procesar
+
+        # Varios elementos pueden compartir página de detalle (p. ej. el autor de
+        # varias citas): se descarga una vez y se completa a todos los que esperan
+        esperando_detalle = {}
+
+        def al_terminar_detalle(url_detalle):
+            def callback(detalle, error):
+                if error is not None:
+                    print(f"✗ [{sitio.nombre}] Error con {url_detalle}: {error}")
+                    detalle = sitio.detalle_vacio()
+                for orden, basico in esperando_detalle.pop(url_detalle):
+                    registros.append((orden, sitio.combinar(basico, detalle)))
+            return callback
+
+        def al_terminar_listado(pagina):
+            def callback(elementos, error):
+                if error is not None:
+                    print(f"✗ [{sitio.nombre}] Error en página {pagina}: {error}")
+                    return
+                print(f"✓ [{sitio.nombre}] Página {pagina}: {len(elementos)} elementos")
+                for indice, basico in enumerate(elementos):
+                    orden = (pagina, indice)
+                    if not sitio.campos_detalle:
+                        registros.append((orden, sitio.combinar(basico, {})))
+                        continue
+                    url_detalle = basico[sitio.campo_url_detalle]
+                    if url_detalle in esperando_detalle:
+                        esperando_detalle[url_detalle].append((orden, basico))
+                        continue
+                    esperando_detalle[url_detalle] = [(orden, basico)]
+                    planificador.encolar(sitio.dominio, url_detalle,
+                                         descargar(sitio.extraer_detalle),
+                                         al_terminar_detalle(url_detalle))
+            return callback
+
+        for pagina in range(1, (num_paginas or sitio.num_paginas) + 1):
+            planificador.encolar(sitio.dominio, sitio.url_pagina(pagina),
+                                 descargar(sitio.extraer_listado),
+                                 al_terminar_listado(pagina))
+
+    for sitio in sitios:
+        programar_sitio(sitio)
+
+    inicio = time.perf_counter()
+    planificador.ejecutar()
+    mostrar_rendimiento(sum(planificador.peticiones.values()), time.perf_counter() - inicio)
+    for dominio, peticiones in planificador.peticiones.items():
+        print(f"  {dominio}: {peticiones} páginas")
+
+    return {nombre: [registro for _, registro in sorted(registros, key=lambda r: r[0])]
+            for nombre, registros in resultados.items()}
+
+
+def _sustituciones_base_url(valores):
+    """Convierte ['sitio=url', ...] en {sitio: url}"""
+    sustituciones = {}
+    for valor in valores:
+        nombre, _, url = valor.partition('=')
+        if nombre not in SITIOS or not url:
+            raise argparse.ArgumentTypeError(f"Formato esperado SITIO=URL con un sitio conocido: {valor}")
+        sustituciones[nombre] = url
+    return sustituciones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraping concurrente de varios catálogos")
+    parser.add_argument('--sitios', nargs='+', choices=sorted(SITIOS), default=sorted(SITIOS))
+    parser.add_argument('--paginas', type=int, default=None,
+                        help="Páginas del listado por sitio (por defecto las de cada configuración)")
+    parser.add_argument('--workers', type=int, default=16,
+                        help="Hilos totales compartidos por todos los sitios")
+    parser.add_argument('--base-url', action='append', default=[], metavar='SITIO=URL',
+                        help="Sustituye la URL raíz de un sitio (p. ej. un servidor local de pruebas)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Usa la cache HTTP para enviar peticiones condicionales")
+    parser.add_argument('--cache', default='cache_scraping.sqlite',
+                        help="Fichero SQLite de la cache HTTP (modo incremental)")
+    parser.add_argument('--max-edad', type=float, default=MAX_EDAD_POR_DEFECTO,
+                        help="Segundos que una página cacheada se reutiliza sin revalidar (por defecto "
+                             "%(default)d). Con 0 se revalida todo, al ritmo de peticiones de cada sitio")
+    args = parser.parse_args()
+
+    sustituciones = _sustituciones_base_url(args.base_url)
+    sitios = [SITIOS[nombre].con_base_url(sustituciones[nombre]) if nombre in sustituciones
+              else SITIOS[nombre] for nombre in args.sitios]
+
+    configurar_cliente(tamano_pool=max(s.max_concurrencia for s in sitios))
+    cache = CacheHTTP(args.cache, args.max_edad) if args.incremental else None
+    try:
+        resultados = scrape_sitios(sitios, args.paginas, args.workers, cache=cache)
+    finally:
+        if cache:
+            cache.mostrar()
+            cache.cerrar()
+
+    for sitio in sitios:
+        registros = resultados[sitio.nombre]
+        ruta = f"multisitio_{sitio.nombre}.csv"
+        pd.DataFrame(registros, columns=sitio.columnas).to_csv(ruta, index=False, encoding='utf-8')
+        print(f"✓ {sitio.nombre}: {len(registros)} registros guardados en {ruta}")
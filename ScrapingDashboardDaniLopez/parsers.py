@@ -0,0 +1,261 @@
+"""
+Backends de parseo HTML para el scraper de Books to Scrape
+Cada backend implementa la extracción del listado y del detalle de un libro:
+- html.parser: BeautifulSoup con el árbol completo (implementación original)
+- bs4-lxml: BeautifulSoup sobre lxml parseando solo las etiquetas necesarias (SoupStrainer)
+- lxml: lxml.html con consultas XPath, sin construir objetos de BeautifulSoup
+- selectolax: selectores CSS sobre el parser Lexbor (opcional, si está instalado)
+"""
+
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+    LXML_DISPONIBLE = True
+except ImportError:
+    LXML_DISPONIBLE = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_DISPONIBLE = True
+except ImportError:
+    SELECTOLAX_DISPONIBLE = False
+
+
+RATINGS = {
+    'One': 1,
+    'Two': 2,
+    'Three': 3,
+    'Four': 4,
+    'Five': 5
+}
+
+# Parseo parcial: solo los libros del listado y las tres zonas del detalle
+SOLO_LIBROS = SoupStrainer('article', class_='product_pod')
+SOLO_DETALLE = SoupStrainer(['ul', 'table', 'p'])
+
+
+def obtener_rating_numerico(rating_clase):
+    """Convierte el rating de texto a número"""
+    for key in RATINGS:
+        if key in rating_clase:
+            return RATINGS[key]
+    return 0
+
+
+def _precio(texto):
+    return float(texto.replace('£', '').strip())
+
+
+def _libro(titulo, precio, rating, src, disponibilidad, href, base_url):
+    return {
+        'titulo': titulo,
+        'precio': precio,
+        'rating': rating,
+        'url_imagen': urljoin(base_url, src),
+        'disponibilidad': disponibilidad,
+        'url_libro': urljoin(urljoin(base_url, 'catalogue/'), href)
+    }
+
+
+# --- BeautifulSoup (html.parser y lxml con SoupStrainer) ---
+
+def _listado_bs4(soup, base_url):
+    libros = []
+    for libro in soup.find_all('article', class_='product_pod'):
+        disponibilidad_tag = libro.find('p', class_='instock availability')
+        libros.append(_libro(
+            libro.h3.a['title'],
+            _precio(libro.find('p', class_='price_color').text),
+            obtener_rating_numerico(libro.find('p', class_='star-rating')['class'][1]),
+            libro.find('img')['src'],
+            disponibilidad_tag.text.strip() if disponibilidad_tag else 'Unknown',
+            libro.h3.a['href'],
+            base_url
+        ))
+    return libros
+
+
+def _tabla_bs4(tabla):
+    upc = ''
+    disponibilidad = ''
+    if tabla:
+        for fila in tabla.find_all('tr'):
+            header = fila.find('th').text.strip()
+            if header == 'UPC':
+                upc = fila.find('td').text.strip()
+            elif header == 'Availability':
+                disponibilidad = fila.find('td').text.strip()
+    return upc, disponibilidad
+
+
+def _categoria_bs4(soup):
+    breadcrumb = soup.find('ul', class_='breadcrumb')
+    return breadcrumb.find_all('li')[2].text.strip() if breadcrumb else 'N/A'
+
+
+def listado_html_parser(html, base_url):
+    return _listado_bs4(BeautifulSoup(html, 'html.parser'), base_url)
+
+
+def detalle_html_parser(html):
+    soup = BeautifulSoup(html, 'html.parser')
+
+    descripcion_tag = soup.find('article', class_='product_page')
+    descripcion = ''
+    if descripcion_tag:
+        desc = descripcion_tag.find('p', recursive=False)
+        descripcion = desc.text.strip() if desc else 'Sin descripción'
+
+    upc, disponibilidad = _tabla_bs4(soup.find('table', class_='table table-striped'))
+    return _categoria_bs4(soup), descripcion, upc, disponibilidad
+
+
+def listado_bs4_lxml(html, base_url):
+    return _listado_bs4(BeautifulSoup(html, 'lxml', parse_only=SOLO_LIBROS), base_url)
+
+
+def detalle_bs4_lxml(html):
+    soup = BeautifulSoup(html, 'lxml', parse_only=SOLO_DETALLE)
+
+    # La descripción es el único <p> sin clase de la ficha del libro
+    desc = soup.find('p', class_=False)
+    descripcion = desc.text.strip() if desc else 'Sin descripción'
+
+    upc, disponibilidad = _tabla_bs4(soup.find('table', class_='table table-striped'))
+    return _categoria_bs4(soup), descripcion, upc, disponibilidad
+
+
+# --- lxml (XPath) ---
+
+def _documento_lxml(html):
+    if isinstance(html, bytes):
+        return lxml.html.document_fromstring(html, parser=lxml.html.HTMLParser(encoding='utf-8'))
+    return lxml.html.document_fromstring(html)
+
+
+def listado_lxml(html, base_url):
+    libros = []
+    for libro in _documento_lxml(html).xpath('//article[@class="product_pod"]'):
+        enlace = libro.xpath('./h3/a')[0]
+        disponibilidad = libro.xpath('.//p[@class="instock availability"]')
+        libros.append(_libro(
+            enlace.get('title'),
+            _precio(libro.xpath('.//p[@class="price_color"]')[0].text_content()),
+            obtener_rating_numerico(libro.xpath('.//p[contains(@class, "star-rating")]/@class')[0]),
+            libro.xpath('.//img/@src')[0],
+            disponibilidad[0].text_content().strip() if disponibilidad else 'Unknown',
+            enlace.get('href'),
+            base_url
+        ))
+    return libros
+
+
+def detalle_lxml(html):
+    doc = _documento_lxml(html)
+
+    migas = doc.xpath('//ul[@class="breadcrumb"]/li')
+    categoria = migas[2].text_content().strip() if len(migas) > 2 else 'N/A'
+
+    descripcion = ''
+    if doc.xpath('//article[@class="product_page"]'):
+        desc = doc.xpath('//article[@class="product_page"]/p[1]')
+        descripcion = desc[0].text_content().strip() if desc else 'Sin descripción'
+
+    upc = ''
+    disponibilidad = ''
+    for fila in doc.xpath('//table[@class="table table-striped"]//tr'):
+        header = fila.findtext('th', default='').strip()
+        if header == 'UPC':
+            upc = fila.findtext('td', default='').strip()
+        elif header == 'Availability':
+            disponibilidad = fila.findtext('td', default='').strip()
+
+    return categoria, descripcion, upc, disponibilidad
+
+
+# --- selectolax (CSS sobre Lexbor) ---
+
+def listado_selectolax(html, base_url):
+    libros = []
+    for libro in LexborHTMLParser(html).css('article.product_pod'):
+        enlace = libro.css_first('h3 > a')
+        disponibilidad = libro.css_first('p.instock.availability')
+        libros.append(_libro(
+            enlace.attributes['title'],
+            _precio(libro.css_first('p.price_color').text()),
+            obtener_rating_numerico(libro.css_first('p.star-rating').attributes['class']),
+            libro.css_first('img').attributes['src'],
+            disponibilidad.text(strip=True) if disponibilidad else 'Unknown',
+            enlace.attributes['href'],
+            base_url
+        ))
+    return libros
+
+
+def detalle_selectolax(html):
+    arbol = LexborHTMLParser(html)
+
+    migas = arbol.css('ul.breadcrumb > li')
+    categoria = migas[2].text(strip=True) if len(migas) > 2 else 'N/A'
+
+    descripcion = ''
+    if arbol.css_first('article.product_page'):
+        desc = arbol.css_first('article.product_page > p')
+        descripcion = desc.text(strip=True) if desc else 'Sin descripción'
+
+    upc = ''
+    disponibilidad = ''
+    for fila in arbol.css('table.table-striped tr'):
+        header = fila.css_first('th').text(strip=True)
+        if header == 'UPC':
+            upc = fila.css_first('td').text(strip=True)
+        elif header == 'Availability':
+            disponibilidad = fila.css_first('td').text(strip=True)
+
+    return categoria, descripcion, upc, disponibilidad
+
+
+BACKENDS = {
+    'html.parser': (listado_html_parser, detalle_html_parser),
+    'bs4-lxml': (listado_bs4_lxml, detalle_bs4_lxml),
+    'lxml': (listado_lxml, detalle_lxml),
+    'selectolax': (listado_selectolax, detalle_selectolax),
+}
+
+
+def backends_disponibles():
+    """Nombres de los backends cuyas dependencias están instaladas"""
+    disponibles = ['html.parser']
+    if LXML_DISPONIBLE:
+        disponibles += ['bs4-lxml', 'lxml']
+    if SELECTOLAX_DISPONIBLE:
+        disponibles.append('selectolax')
+    return disponibles
+
+
+_backend_actual = 'lxml' if LXML_DISPONIBLE else 'html.parser'
+
+
+def configurar_backend(nombre):
+    """Selecciona el backend que usan extraer_libros_listado y extraer_detalle"""
+    global _backend_actual
+    if nombre not in backends_disponibles():
+        raise ValueError(f"Backend '{nombre}' no disponible. Opciones: {', '.join(backends_disponibles())}")
+    _backend_actual = nombre
+
+
+def backend_actual():
+    return _backend_actual
+
+
+def extraer_libros_listado(html, base_url, backend=None):
+    """Extrae la información básica de los libros de una página del catálogo"""
+    return BACKENDS[backend or _backend_actual][0](html, base_url)
+
+
+def extraer_detalle(html, backend=None):
+    """Extrae categoría, descripción, UPC y disponibilidad de la página de un libro"""
+    return BACKENDS[backend or _backend_actual][1](html)
@@ -0,0 +1,212 @@
+"""
+Salida en streaming del scraper con checkpoints reanudables
+Escribe cada libro en cuanto se extrae (CSV y opcionalmente Parquet),
+guarda las páginas completadas y calcula las estadísticas por categoría
+de forma incremental
+"""
+
+import csv
+import json
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+
+CAMPOS = ['titulo', 'precio', 'rating', 'categoria', 'disponibilidad',
+          'descripcion', 'url_imagen', 'url_libro', 'upc']
+CAMPOS_BASICO = ['titulo', 'precio', 'rating', 'categoria']
+
+
+class EstadisticasIncrementales:
+    """Acumuladores por categoría equivalentes al groupby de guardar_datos"""
+
+    def __init__(self):
+        self.categorias = {}  # categoria -> [suma_precio, min, max, num_libros, suma_rating]
+
+    def agregar(self, libro):
+        precio = float(libro['precio'])
+        rating = float(libro['rating'])
+        acumulado = self.categorias.get(libro['categoria'])
+        if acumulado is None:
+            self.categorias[libro['categoria']] = [precio, precio, precio, 1, rating]
+        else:
+            acumulado[0] += precio
+            acumulado[1] = min(acumulado[1], precio)
+            acumulado[2] = max(acumulado[2], precio)
+            acumulado[3] += 1
+            acumulado[4] += rating
+
+    @property
+    def total(self):
+        return sum(a[3] for a in self.categorias.values())
+
+    def dataframe(self):
+        """Estadísticas con las mismas columnas que estadisticas_categorias.csv"""
+        filas = [{
+            'categoria': categoria,
+            'precio_medio': round(suma / n, 2),
+            'precio_min': round(minimo, 2),
+            'precio_max': round(maximo, 2),
+            'num_libros': n,
+            'rating_medio': round(suma_rating / n, 2)
+        } for categoria, (suma, minimo, maximo, n, suma_rating) in sorted(self.categorias.items())]
+        columnas = ['categoria', 'precio_medio', 'precio_min', 'precio_max', 'num_libros', 'rating_medio']
+        return pd.DataFrame(filas, columns=columnas).set_index('categoria')
+
+    def mostrar_resumen(self):
+        """Resumen equivalente a mostrar_resumen sin cargar el catálogo en memoria"""
+        total = self.total
+        if not total:
+            return
+        acumulados = self.categorias.values()
+        print("\n" + "=" * 60)
+        print("RESUMEN DE DATOS EXTRAÍDOS")
+        print("=" * 60)
+        print(f"\nTotal de libros: {total}")
+        print(f"Rango de precios: £{min(a[1] for a in acumulados):.2f} - "
+              f"£{max(a[2] for a in acumulados):.2f}")
+        print(f"Precio promedio: £{sum(a[0] for a in acumulados) / total:.2f}")
+        print(f"Rating promedio: {sum(a[4] for a in acumulados) / total:.2f}/5")
+        print(f"\nCategorías encontradas: {len(self.categorias)}")
+        print("\nTop 5 categorías con más libros:")
+        for categoria, acumulado in sorted(self.categorias.items(), key=lambda kv: -kv[1][3])[:5]:
+            print(f"{categoria:<30}{acumulado[3]:>6}")
+        print("\n" + "=" * 60)
+
+
+class EscritorStreaming:
+    """
+    Sumidero de libros con escritura inmediata y checkpoint de páginas.
+    Args:
+        directorio: Carpeta donde se escriben los ficheros de salida
+        parquet: Si True, escribe también fragmentos Parquet en libros_stream_parquet/
+        reanudar: Continúa desde el último checkpoint en lugar de empezar de cero
+        tamano_lote_parquet: Libros por row group de Parquet
+    """
+
+    def __init__(self, directorio='.', parquet=False, reanudar=False, tamano_lote_parquet=500):
+        self.ruta_csv = os.path.join(directorio, 'libros_completo.csv')
+        self.ruta_basico = os.path.join(directorio, 'libros_basico.csv')
+        self.ruta_estadisticas = os.path.join(directorio, 'estadisticas_categorias.csv')
+        self.ruta_checkpoint = os.path.join(directorio, 'scraping_checkpoint.json')
+        self.ruta_parquet = os.path.join(directorio, 'libros_stream_parquet')
+
+        self.estadisticas = EstadisticasIncrementales()
+        self.paginas_completadas = set()
+        self.urls_escritas = set()
+        self.libros_escritos = 0
+
+        if parquet and not PYARROW_DISPONIBLE:
+            raise RuntimeError("La salida Parquet necesita pyarrow (pip install pyarrow)")
+        self._parquet = parquet
+        self._tamano_lote_parquet = tamano_lote_parquet
+        self._lote_parquet = []
+        self._escritor_parquet = None
+
+        reanudando = reanudar and os.path.exists(self.ruta_csv)
+        if reanudando:
+            self._cargar_checkpoint()
+        elif os.path.exists(self.ruta_checkpoint):
+            os.remove(self.ruta_checkpoint)
+
+        modo = 'a' if reanudando else 'w'
+        self._f_csv = open(self.ruta_csv, modo, newline='', encoding='utf-8')
+        self._f_basico = open(self.ruta_basico, modo, newline='', encoding='utf-8')
+        self._csv = csv.DictWriter(self._f_csv, fieldnames=CAMPOS, lineterminator='\n')
+        self._basico = csv.DictWriter(self._f_basico, fieldnames=CAMPOS_BASICO,
+                                      lineterminator='\n', extrasaction='ignore')
+        if not reanudando:
+            self._csv.writeheader()
+            self._basico.writeheader()
+
+    def _cargar_checkpoint(self):
+        """Recupera las páginas completadas y reconstruye las estadísticas leyendo el CSV en streaming"""
+        if os.path.exists(self.ruta_checkpoint):
+            with open(self.ruta_checkpoint, encoding='utf-8') as f:
+                self.paginas_completadas = set(json.load(f)['paginas_completadas'])
+
+        # Los libros de una página a medio terminar ya están en el CSV:
+        # se recuerdan sus URLs para no duplicarlos al repetir la página
+        with open(self.ruta_csv, newline='', encoding='utf-8') as f:
+            for libro in csv.DictReader(f):
+                self.urls_escritas.add(libro['url_libro'])
+                self.estadisticas.agregar(libro)
+                self.libros_escritos += 1
+
+        print(f"↻ Reanudando: {len(self.paginas_completadas)} páginas y "
+              f"{self.libros_escritos} libros ya guardados")
+
+    def escribir(self, libro):
+        """Añade un libro a la salida (se ignora si ya estaba escrito)"""
+        if libro['url_libro'] in self.urls_escritas:
+            return
+        self.urls_escritas.add(libro['url_libro'])
+        self._csv.writerow(libro)
+        self._basico.writerow(libro)
+        self._f_csv.flush()
+        self._f_basico.flush()
+        self.estadisticas.agregar(libro)
+        self.libros_escritos += 1
+
+        if self._parquet:
+            self._lote_parquet.append(libro)
+            if len(self._lote_parquet) >= self._tamano_lote_parquet:
+                self._volcar_parquet()
+
+    def _volcar_parquet(self):
+        if not self._lote_parquet:
+            return
+        tabla = pa.Table.from_pylist(self._lote_parquet)
+        if self._escritor_parquet is None:
+            # Un fragmento por ejecución: los Parquet no admiten añadir filas a un fichero cerrado
+            os.makedirs(self.ruta_parquet, exist_ok=True)
+            nombre = f"parte-{datetime.now():%Y%m%d-%H%M%S}.parquet"
+            self._escritor_parquet = pq.ParquetWriter(os.path.join(self.ruta_parquet, nombre), tabla.schema)
+        self._escritor_parquet.write_table(tabla)
+        self._lote_parquet = []
+
+    def completar_pagina(self, pagina):
+        """Registra una página del listado como terminada y guarda el checkpoint"""
+        self.paginas_completadas.add(pagina)
+        self._f_csv.flush()
+        os.fsync(self._f_csv.fileno())
+        self._f_basico.flush()
+        self.guardar_estadisticas()
+
+        # Escritura atómica: nunca queda un checkpoint a medio escribir
+        temporal = self.ruta_checkpoint + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({
+                'paginas_completadas': sorted(self.paginas_completadas),
+                'libros_escritos': self.libros_escritos,
+                'actualizado': time.strftime('%Y-%m-%d %H:%M:%S')
+            }, f)
+        os.replace(temporal, self.ruta_checkpoint)
+
+    def guardar_estadisticas(self):
+        self.estadisticas.dataframe().to_csv(self.ruta_estadisticas, encoding='utf-8')
+
+    def cerrar(self):
+        """Vuelca lo pendiente y cierra los ficheros"""
+        if self._parquet:
+            self._volcar_parquet()
+            if self._escritor_parquet is not None:
+                self._escritor_parquet.close()
+        self.guardar_estadisticas()
+        self._f_csv.close()
+        self._f_basico.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
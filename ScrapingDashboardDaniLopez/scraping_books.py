@@ -3,144 +3,311 @@ Script de Web Scraping para Books to Scrape
 Extrae información de libros y la guarda en archivos CSV
 """
 
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import os
+import threading
 import pandas as pd
 import time
-from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+from urllib.parse import urljoin, urlparse
 
+from http_client import obtener_cliente, configurar_cliente
+from cache_http import CacheHTTP, MAX_EDAD_POR_DEFECTO, hash_contenido
+from salida_streaming import EscritorStreaming
+from almacen_parquet import guardar_parquet, PYARROW_DISPONIBLE, RUTA_PARQUET
+from miniaturas import prefetch_miniaturas
+from parsers import (extraer_libros_listado, extraer_detalle, obtener_rating_numerico,
+                     configurar_backend, backend_actual, backends_disponibles)
 
-def obtener_rating_numerico(rating_clase):
-    """Convierte el rating de texto a número"""
-    ratings = {
-        'One': 1,
-        'Two': 2,
-        'Three': 3,
-        'Four': 4,
-        'Five': 5
-    }
-    for key in ratings:
-        if key in rating_clase:
-            return ratings[key]
-    return 0
 
+BASE_URL = 'https://books.toscrape.com/'
+# Espacio de este scraper en la CacheHTTP (ver obtener_pagina)
+ESPACIO_CACHE = 'scraping_books'
+
+
+class LimitadorPorHost:
+    """
+    Limitador de peticiones tipo token bucket, con un bucket por host.
+    Sustituye a la pausa fija entre peticiones: permite ráfagas cortas
+    y mantiene de media `peticiones_por_segundo` contra cada dominio.
+    """
+
+    def __init__(self, peticiones_por_segundo=2.0, rafaga=1):
+        self.tasa = peticiones_por_segundo
+        self.capacidad = max(1, rafaga)
+        self._buckets = {}  # host -> (tokens, instante de la última recarga)
+        self._lock = threading.Lock()
+
+    def esperar(self, url):
+        """Bloquea hasta que haya un token disponible para el host de la URL"""
+        if not self.tasa or self.tasa <= 0:
+            return
+        host = urlparse(url).netloc
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                tokens, ultimo = self._buckets.get(host, (self.capacidad, ahora))
+                tokens = min(self.capacidad, tokens + (ahora - ultimo) * self.tasa)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, ahora)
+                    return
+                self._buckets[host] = (tokens, ahora)
+                espera = (1 - tokens) / self.tasa
+            time.sleep(espera)
+
+
+# Equivalente a la antigua pausa de 0.5 segundos entre libros
+limitador_por_defecto = LimitadorPorHost(peticiones_por_segundo=2.0)
+
+
+def descargar(url, limitador=None, cliente=None, cabeceras=None):
+    """Descarga una URL con el cliente HTTP compartido respetando el limitador del host"""
+    (limitador or limitador_por_defecto).esperar(url)
+    response = (cliente or obtener_cliente()).get(url, headers=cabeceras)
+    response.raise_for_status()
+    return response
+
+
+def obtener_pagina(url, extractor, limitador=None, cliente=None, cache=None, espacio=ESPACIO_CACHE):
+    """
+    Descarga una página y la procesa con `extractor`.
+    Con cache envía una petición condicional (ETag / Last-Modified) y, si la
+    página no ha cambiado, devuelve los datos guardados sin volver a parsear.
+    `espacio` separa en la cache los datos de cada scraper: otro extractor
+    sobre la misma URL debe usar otro espacio.
+    """
+    if cache is None:
+        return extractor(descargar(url, limitador, cliente).content)
+
+    entrada = cache.obtener(url, espacio)
+    if entrada and cache.vigente(entrada):
+        cache.contar_sin_cambios()
+        return entrada['datos']
+
+    response = descargar(url, limitador, cliente, cache.cabeceras_condicionales(entrada))
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+
+    if entrada and response.status_code == 304:
+        cache.revalidar(url, espacio, etag, last_modified)
+        return entrada['datos']
+
+    huella = hash_contenido(response.content)
+    if entrada and entrada['hash'] == huella:
+        cache.revalidar(url, espacio, etag, last_modified)
+        return entrada['datos']
 
-def scrape_libro_detalle(url):
+    datos = extractor(response.content)
+    cache.guardar(url, espacio, etag, last_modified, huella, datos)
+    return datos
+
+
+def scrape_libro_detalle(url, limitador=None, cliente=None, cache=None):
     """Extrae información detallada de un libro individual"""
     try:
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Extraer categoría
-        breadcrumb = soup.find('ul', class_='breadcrumb')
-        categoria = breadcrumb.find_all('li')[2].text.strip() if breadcrumb else 'N/A'
-
-        # Extraer descripción
-        descripcion_tag = soup.find('article', class_='product_page')
-        descripcion = ''
-        if descripcion_tag:
-            desc = descripcion_tag.find('p', recursive=False)
-            descripcion = desc.text.strip() if desc else 'Sin descripción'
-
-        # Extraer información de la tabla de producto
-        tabla = soup.find('table', class_='table table-striped')
-        upc = ''
-        disponibilidad = ''
-
-        if tabla:
-            filas = tabla.find_all('tr')
-            for fila in filas:
-                header = fila.find('th').text.strip()
-                if header == 'UPC':
-                    upc = fila.find('td').text.strip()
-                elif header == 'Availability':
-                    disponibilidad = fila.find('td').text.strip()
-
-        return categoria, descripcion, upc, disponibilidad
+        return tuple(obtener_pagina(url, extraer_detalle, limitador, cliente, cache))
     except Exception as e:
         print(f"Error al obtener detalles: {e}")
         return 'N/A', 'Sin descripción', 'N/A', 'N/A'
 
 
-def scrape_books_to_scrape(num_paginas=5):
+def construir_libro_info(basico, detalle):
+    """Combina los datos del listado y del detalle con el esquema de `todos_libros`"""
+    categoria, descripcion, upc, disponibilidad_detalle = detalle
+    return {
+        'titulo': basico['titulo'],
+        'precio': basico['precio'],
+        'rating': basico['rating'],
+        'categoria': categoria,
+        'disponibilidad': disponibilidad_detalle,
+        'descripcion': descripcion[:200],  # Limitar descripción
+        'url_imagen': basico['url_imagen'],
+        'url_libro': basico['url_libro'],
+        'upc': upc
+    }
+
+
+def mostrar_rendimiento(paginas_descargadas, segundos):
+    """Muestra el rendimiento del scraping en páginas por segundo"""
+    ritmo = paginas_descargadas / segundos if segundos > 0 else 0.0
+    print(f"\n⚡ Rendimiento: {paginas_descargadas} páginas en {segundos:.1f}s "
+          f"({ritmo:.2f} páginas/s)")
+
+
+def scrape_books_to_scrape(num_paginas=5, limitador=None, base_url=BASE_URL, cliente=None,
+                           cache=None, salida=None):
     """
     Realiza scraping de libros de Books to Scrape
     Args:
         num_paginas: Número de páginas a scrapear (cada página tiene ~20 libros)
+        limitador: LimitadorPorHost a usar (por defecto ~2 peticiones/s)
+        base_url: URL raíz del catálogo
+        cliente: ClienteHTTP a usar (por defecto el cliente compartido)
+        cache: CacheHTTP para el modo incremental (None = descargar todo)
+        salida: EscritorStreaming; si se indica, cada libro se escribe al extraerlo,
+                se saltan las páginas del checkpoint y no se acumula nada en memoria
     """
-    base_url = 'https://books.toscrape.com/catalogue/page-{}.html'
+    listado_url = urljoin(base_url, 'catalogue/page-{}.html')
     todos_libros = []
+    paginas_descargadas = 0
+    inicio = time.perf_counter()
 
     print(f"Iniciando scraping de {num_paginas} páginas...")
 
     for pagina in range(1, num_paginas + 1):
+        if salida and pagina in salida.paginas_completadas:
+            continue
+
         print(f"\nProcesando página {pagina}/{num_paginas}...")
-        url = base_url.format(pagina)
+        url = listado_url.format(pagina)
 
         try:
-            response = requests.get(url)
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Encontrar todos los libros en la página
-            libros = soup.find_all('article', class_='product_pod')
-
-            for libro in libros:
-                # Título
-                titulo = libro.h3.a['title']
-
-                # Precio
-                precio_texto = libro.find('p', class_='price_color').text
-                precio = float(precio_texto.replace('£', '').strip())
+            libros = obtener_pagina(url, partial(extraer_libros_listado, base_url=base_url),
+                                    limitador, cliente, cache)
+            paginas_descargadas += 1
 
-                # Rating
-                rating_clase = libro.find('p', class_='star-rating')['class'][1]
-                rating = obtener_rating_numerico(rating_clase)
-
-                # URL de la imagen
-                img_tag = libro.find('img')
-                imagen_url = urljoin('https://books.toscrape.com/', img_tag['src'])
-
-                # Disponibilidad (en la página principal)
-                disponibilidad_tag = libro.find('p', class_='instock availability')
-                disponibilidad = disponibilidad_tag.text.strip() if disponibilidad_tag else 'Unknown'
-
-                # URL del libro para obtener más detalles
-                libro_url = urljoin('https://books.toscrape.com/catalogue/',
-                                    libro.h3.a['href'])
+            for basico in libros:
+                if salida and basico['url_libro'] in salida.urls_escritas:
+                    continue
 
                 # Obtener detalles adicionales del libro
-                print(f"  - Procesando: {titulo[:50]}...")
-                categoria, descripcion, upc, disponibilidad_detalle = scrape_libro_detalle(libro_url)
-
-                # Crear diccionario con la información
-                libro_info = {
-                    'titulo': titulo,
-                    'precio': precio,
-                    'rating': rating,
-                    'categoria': categoria,
-                    'disponibilidad': disponibilidad_detalle,
-                    'descripcion': descripcion[:200],  # Limitar descripción
-                    'url_imagen': imagen_url,
-                    'url_libro': libro_url,
-                    'upc': upc
-                }
-
-                todos_libros.append(libro_info)
-
-                # Pequeña pausa para no sobrecargar el servidor
-                time.sleep(0.5)
-
+                print(f"  - Procesando: {basico['titulo'][:50]}...")
+                detalle = scrape_libro_detalle(basico['url_libro'], limitador, cliente, cache)
+                paginas_descargadas += 1
+
+                libro_info = construir_libro_info(basico, detalle)
+                if salida:
+                    salida.escribir(libro_info)
+                else:
+                    todos_libros.append(libro_info)
+
+            if salida:
+                salida.completar_pagina(pagina)
             print(f"✓ Página {pagina} completada: {len(libros)} libros extraídos")
 
         except Exception as e:
             print(f"✗ Error en página {pagina}: {e}")
             continue
 
+    mostrar_rendimiento(paginas_descargadas, time.perf_counter() - inicio)
     return todos_libros
 
 
-def guardar_datos(libros):
-    """Guarda los datos en archivos CSV"""
+def _procesar_listado(url, limitador, base_url, cliente, cache):
+    return obtener_pagina(url, partial(extraer_libros_listado, base_url=base_url),
+                          limitador, cliente, cache)
+
+
+def scrape_books_concurrente(num_paginas=5, max_concurrencia=8,
+                             peticiones_por_segundo=5.0, base_url=BASE_URL, cliente=None,
+                             cache=None, salida=None):
+    """
+    Versión concurrente de scrape_books_to_scrape con un pool de hilos acotado.
+    Las páginas de detalle se encolan en cuanto se procesa cada página del
+    listado, sin esperar a que termine el resto del catálogo.
+    Args:
+        num_paginas: Número de páginas a scrapear (cada página tiene ~20 libros)
+        max_concurrencia: Número máximo de descargas simultáneas
+        peticiones_por_segundo: Límite de peticiones por segundo por host
+        base_url: URL raíz del catálogo
+        cliente: ClienteHTTP a usar; su pool debería admitir max_concurrencia conexiones
+        cache: CacheHTTP para el modo incremental (None = descargar todo)
+        salida: EscritorStreaming; si se indica, cada libro se escribe al extraerlo
+                y la página se marca en el checkpoint al terminar todos sus libros
+    Returns:
+        Lista de libros con el mismo esquema que scrape_books_to_scrape
+        (vacía si se escribe en streaming)
+    """
+    listado_url = urljoin(base_url, 'catalogue/page-{}.html')
+    limitador = LimitadorPorHost(peticiones_por_segundo, rafaga=max_concurrencia)
+    resultados = {}
+    restantes = {}  # pagina -> libros pendientes de escribir
+    paginas_descargadas = 0
+    inicio = time.perf_counter()
+
+    print(f"Iniciando scraping concurrente de {num_paginas} páginas "
+          f"(concurrencia={max_concurrencia}, {peticiones_por_segundo} peticiones/s)...")
+
+    with ThreadPoolExecutor(max_workers=max_concurrencia) as pool:
+        pendientes = {}
+        for pagina in range(1, num_paginas + 1):
+            if salida and pagina in salida.paginas_completadas:
+                continue
+            futuro = pool.submit(_procesar_listado, listado_url.format(pagina),
+                                 limitador, base_url, cliente, cache)
+            pendientes[futuro] = ('listado', pagina, None)
+
+        while pendientes:
+            terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                tipo, pagina, contexto = pendientes.pop(futuro)
+
+                if tipo == 'listado':
+                    try:
+                        libros = futuro.result()
+                    except Exception as e:
+                        print(f"✗ Error en página {pagina}: {e}")
+                        continue
+                    paginas_descargadas += 1
+                    print(f"✓ Página {pagina} listada: {len(libros)} libros")
+
+                    if salida:
+                        libros = [b for b in libros if b['url_libro'] not in salida.urls_escritas]
+                        restantes[pagina] = len(libros)
+                        if not libros:
+                            salida.completar_pagina(pagina)
+
+                    for posicion, basico in enumerate(libros):
+                        futuro_detalle = pool.submit(scrape_libro_detalle, basico['url_libro'],
+                                                     limitador, cliente, cache)
+                        pendientes[futuro_detalle] = ('detalle', pagina, (posicion, basico))
+                else:
+                    posicion, basico = contexto
+                    paginas_descargadas += 1
+                    libro_info = construir_libro_info(basico, futuro.result())
+                    if salida:
+                        salida.escribir(libro_info)
+                        restantes[pagina] -= 1
+                        if restantes[pagina] == 0:
+                            salida.completar_pagina(pagina)
+                    else:
+                        resultados[(pagina, posicion)] = libro_info
+
+    mostrar_rendimiento(paginas_descargadas, time.perf_counter() - inicio)
+    return [resultados[clave] for clave in sorted(resultados)]
+
+
+def fusionar_con_existentes(libros, ruta='libros_completo.csv'):
+    """
+    Fusiona los libros scrapeados con los del CSV existente usando `url_libro`
+    como clave: solo se sustituyen o añaden las filas nuevas o modificadas.
+    Returns:
+        (lista fusionada, número de libros nuevos, número de libros modificados)
+    """
+    if not os.path.exists(ruta):
+        return libros, len(libros), 0
+
+    existentes = pd.read_csv(ruta, dtype={'upc': str}, keep_default_na=False)
+    por_url = {fila['url_libro']: fila for fila in existentes.to_dict('records')}
+    nuevos = 0
+    modificados = 0
+
+    for libro in libros:
+        anterior = por_url.get(libro['url_libro'])
+        if anterior is None:
+            nuevos += 1
+        elif any(str(anterior.get(campo)) != str(valor) for campo, valor in libro.items()):
+            modificados += 1
+        else:
+            continue
+        por_url[libro['url_libro']] = libro
+
+    return list(por_url.values()), nuevos, modificados
+
+
+def guardar_datos(libros, parquet=False):
+    """Guarda los datos en archivos CSV y, opcionalmente, en un dataset Parquet"""
     print("\n" + "=" * 60)
     print("GUARDANDO DATOS EN CSV...")
     print("=" * 60)
@@ -164,6 +331,11 @@ def guardar_datos(libros):
     stats_categoria.to_csv('estadisticas_categorias.csv', encoding='utf-8')
     print(f"✓ Archivo 'estadisticas_categorias.csv' creado")
 
+    # Dataset columnar con tipos compactos, particionado por categoría
+    if parquet:
+        guardar_parquet(df_completo)
+        print(f"✓ Dataset '{RUTA_PARQUET}/' creado (Parquet particionado por categoría)")
+
     return df_completo
 
 
@@ -183,24 +355,113 @@ def mostrar_resumen(df):
 
 
 if __name__ == "__main__":
+    # Cada página tiene aproximadamente 20 libros
+    parser = argparse.ArgumentParser(description="Web scraping de Books to Scrape")
+    parser.add_argument('--paginas', type=int, default=3,
+                        help="Número de páginas a scrapear")
+    parser.add_argument('--modo', choices=['secuencial', 'concurrente'], default='secuencial',
+                        help="Modo de descarga de las páginas")
+    parser.add_argument('--concurrencia', type=int, default=8,
+                        help="Descargas simultáneas en modo concurrente")
+    parser.add_argument('--rps', type=float, default=2.0,
+                        help="Peticiones por segundo permitidas por host")
+    parser.add_argument('--pool', type=int, default=10,
+                        help="Conexiones keep-alive por host del cliente HTTP")
+    parser.add_argument('--timeout', type=float, default=15.0,
+                        help="Timeout de lectura en segundos")
+    parser.add_argument('--reintentos', type=int, default=3,
+                        help="Reintentos ante errores 5xx y timeouts")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Peticiones condicionales con cache en disco y fusión con el CSV existente")
+    parser.add_argument('--cache', default='cache_scraping.sqlite',
+                        help="Fichero SQLite de la cache HTTP (modo incremental)")
+    parser.add_argument('--max-edad', type=float, default=MAX_EDAD_POR_DEFECTO,
+                        help="Segundos que una página cacheada se reutiliza sin revalidar (por defecto "
+                             "%(default)d). Con 0 se revalida todo: detecta cualquier cambio, pero cada "
+                             "página cuesta una petición condicional al ritmo de --rps (~9 min para "
+                             "todo el catálogo a 2 pet/s)")
+    parser.add_argument('--parser', choices=backends_disponibles(), default=backend_actual(),
+                        help="Backend de parseo HTML")
+    parser.add_argument('--stream', action='store_true',
+                        help="Escribe cada libro al extraerlo y guarda checkpoints por página")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reanuda desde el último checkpoint (implica --stream)")
+    parser.add_argument('--stream-parquet', action='store_true',
+                        help="En modo streaming, escribe también fragmentos Parquet")
+    parser.add_argument('--parquet', action=argparse.BooleanOptionalAction, default=PYARROW_DISPONIBLE,
+                        help="Guarda también el dataset Parquet que prefiere el dashboard")
+    parser.add_argument('--miniaturas', action='store_true',
+                        help="Descarga y reduce las portadas para el catálogo del dashboard "
+                             "(sin ellas, el navegador carga cada portada de su URL original)")
+    args = parser.parse_args()
+
+    streaming = args.stream or args.resume
+    if args.incremental and streaming:
+        parser.error("--incremental no se puede combinar con --stream/--resume")
+    if args.stream_parquet and not streaming:
+        parser.error("--stream-parquet requiere --stream o --resume")
+
+    # El pool debe admitir tantas conexiones como descargas simultáneas
+    tamano_pool = max(args.pool, args.concurrencia) if args.modo == 'concurrente' else args.pool
+    cliente = configurar_cliente(tamano_pool=tamano_pool, timeout=(5, args.timeout),
+                                 reintentos=args.reintentos)
+    configurar_backend(args.parser)
+    cache = CacheHTTP(args.cache, args.max_edad) if args.incremental else None
+
     print("=" * 60)
     print("WEB SCRAPING - BOOKS TO SCRAPE")
     print("=" * 60)
 
-    # Configurar número de páginas a scrapear
-    # Cada página tiene aproximadamente 20 libros
-    NUM_PAGINAS = 3  # Cambia este número según necesites
-
     print(f"\nConfiguración:")
-    print(f"- Páginas a scrapear: {NUM_PAGINAS}")
-    print(f"- Libros aproximados: ~{NUM_PAGINAS * 20}")
+    print(f"- Páginas a scrapear: {args.paginas}")
+    print(f"- Libros aproximados: ~{args.paginas * 20}")
+    print(f"- Modo: {args.modo}{' (incremental)' if cache else ''}")
+    print(f"- Parser HTML: {args.parser}")
+
+    salida = EscritorStreaming(parquet=args.stream_parquet, reanudar=args.resume) if streaming else None
 
     # Realizar scraping
-    libros = scrape_books_to_scrape(NUM_PAGINAS)
+    try:
+        if args.modo == 'concurrente':
+            libros = scrape_books_concurrente(args.paginas, args.concurrencia, args.rps,
+                                              cache=cache, salida=salida)
+        else:
+            libros = scrape_books_to_scrape(args.paginas, LimitadorPorHost(args.rps),
+                                            cache=cache, salida=salida)
+    finally:
+        if salida:
+            salida.cerrar()
+
+    if args.miniaturas:
+        if salida:
+            urls_imagenes = pd.read_csv(salida.ruta_csv, usecols=['url_imagen'])['url_imagen'].tolist()
+        else:
+            urls_imagenes = [libro['url_imagen'] for libro in libros]
+        prefetch_miniaturas(urls_imagenes, max_concurrencia=args.concurrencia,
+                            limitador=LimitadorPorHost(args.rps, rafaga=args.concurrencia))
+
+    cliente.estadisticas.mostrar()
+
+    if salida:
+        # Los libros ya están en disco: el resumen sale de las estadísticas incrementales
+        salida.estadisticas.mostrar_resumen()
+        print(f"\n✓ {salida.libros_escritos} libros guardados en streaming "
+              f"({len(salida.paginas_completadas)} páginas completadas)")
+        libros = None
+
+    if cache:
+        cache.mostrar()
+        cache.cerrar()
+        if libros:
+            libros, nuevos, modificados = fusionar_con_existentes(libros)
+            print(f"\nLibros nuevos: {nuevos} | Libros modificados: {modificados}")
+            if not (nuevos or modificados):
+                print("\n✓ El catálogo no ha cambiado: los CSV ya están al día")
+                libros = None
 
     if libros:
         # Guardar datos
-        df = guardar_datos(libros)
+        df = guardar_datos(libros, parquet=args.parquet)
 
         # Mostrar resumen
         mostrar_resumen(df)
@@ -210,5 +471,7 @@ if __name__ == "__main__":
         print("  - libros_completo.csv")
         print("  - libros_basico.csv")
         print("  - estadisticas_categorias.csv")
-    else:
-        print("\n✗ No se pudieron extraer datos")
\ No newline at end of file
+        if args.parquet:
+            print(f"  - {RUTA_PARQUET}/")
+    elif libros is not None:
+        print("\n✗ No se pudieron extraer datos")
@@ -0,0 +1,105 @@
+"""
+Pruebas de la cache HTTP compartida entre scraping_books y multisitio
+Ambos scrapers se ejecutan uno tras otro contra benchmarks/servidor_fixtures.py
+con el mismo fichero de cache, en los dos órdenes, y el segundo debe dar el
+mismo resultado que sin cache
+Uso: python -m pytest tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+DIRECTORIO_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_PROYECTO)
+sys.path.insert(0, os.path.join(DIRECTORIO_PROYECTO, 'benchmarks'))
+
+from cache_http import CacheHTTP
+from extractores import BOOKS_TO_SCRAPE
+from multisitio import scrape_sitios
+from scraping_books import LimitadorPorHost, scrape_books_to_scrape
+from servidor_fixtures import ServidorFixtures
+
+
+@pytest.fixture(scope='module')
+def servidor():
+    with ServidorFixtures() as servidor:
+        yield servidor
+
+
+def _books(servidor, cache=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return scrape_books_to_scrape(1, LimitadorPorHost(1000, rafaga=100), servidor.base_url, cache=cache)
+
+
+def _multisitio(servidor, cache=None):
+    sitio = BOOKS_TO_SCRAPE.con_base_url(servidor.base_url)
+    sitio.peticiones_por_segundo = 1000
+    with contextlib.redirect_stdout(io.StringIO()):
+        return scrape_sitios([sitio], 1, cache=cache)[sitio.nombre]
+
+
+@pytest.mark.parametrize('orden', [(_books, _multisitio), (_multisitio, _books)],
+                         ids=['books_y_multisitio', 'multisitio_y_books'])
+def test_scrapers_seguidos_con_la_misma_cache(servidor, tmp_path, orden):
+    primero, segundo = orden
+    esperado = segundo(servidor)
+    ruta = str(tmp_path / 'cache.sqlite')
+
+    for scraper in (primero, segundo):
+        cache = CacheHTTP(ruta)
+        try:
+            resultado = scraper(servidor, cache)
+        finally:
+            cache.cerrar()
+
+    assert resultado == esperado
+    assert len(resultado) == 20
+
+
+def test_segunda_pasada_usa_la_cache(servidor, tmp_path):
+    ruta = str(tmp_path / 'cache.sqlite')
+    for _ in range(2):
+        cache = CacheHTTP(ruta)
+        try:
+            libros = _books(servidor, cache)
+        finally:
+            cache.cerrar()
+    assert cache.sin_cambios == 21 and cache.modificadas == 0
+    assert libros == _books(servidor)
+
+
+def test_cache_de_formato_anterior_se_descarta(tmp_path):
+    import sqlite3
+    ruta = str(tmp_path / 'cache.sqlite')
+    conexion = sqlite3.connect(ruta)
+    conexion.execute("CREATE TABLE paginas (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+                     "hash TEXT NOT NULL, datos TEXT NOT NULL, validado REAL NOT NULL)")
+    conexion.execute("INSERT INTO paginas VALUES ('http://x/', NULL, NULL, 'h', '[1]', 0)")
+    conexion.commit()
+    conexion.close()
+
+    cache = CacheHTTP(ruta)
+    try:
+        assert cache.obtener('http://x/', 'scraping_books') is None
+        cache.guardar('http://x/', 'scraping_books', None, None, 'h', {'a': 1})
+        cache.guardar('http://x/', 'multisitio:books_to_scrape', None, None, 'h', [1])
+        assert cache.obtener('http://x/', 'scraping_books')['datos'] == {'a': 1}
+        assert cache.obtener('http://x/', 'multisitio:books_to_scrape')['datos'] == [1]
+    finally:
+        cache.cerrar()
+
+
+def test_segunda_pasada_sin_peticiones_dentro_de_max_edad(servidor, tmp_path):
+    ruta = str(tmp_path / 'cache.sqlite')
+    for max_edad, peticiones_esperadas in ((None, 21), (None, 0), (0, 21)):
+        cache = CacheHTTP(ruta) if max_edad is None else CacheHTTP(ruta, max_edad)
+        antes = servidor.peticiones
+        try:
+            _books(servidor, cache)
+        finally:
+            cache.cerrar()
+        assert servidor.peticiones - antes == peticiones_esperadas
@@ -4,12 +4,88 @@ from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
 import numpy as np
 import math
+import threading
+import time
+
+# Landmark pairs drawn as the hand skeleton
+CONNECTIONS = np.array([
+    (0, 1), (1, 2), (2, 3), (3, 4), # Thumb
+    (0, 5), (5, 6), (6, 7), (7, 8), # Index
+    (5, 9), (9, 10), (10, 11), (11, 12), # Middle
+    (9, 13), (13, 14), (14, 15), (15, 16), # Ring
+    (13, 17), (17, 18), (18, 19), (19, 20), (0, 17) # Pinky & Palm
+])
+NO_HANDS = np.zeros((0, 21, 3), dtype=np.float32)
+# fingers_up compares each tip with a lower joint: x for the thumb, y for the other fingers.
+# A finger is up when (tip - joint) * sign < 0, i.e. thumb tip to the right, others above
+FINGER_TIPS = np.array([4, 8, 12, 16, 20])
+FINGER_JOINTS = np.array([3, 6, 10, 14, 18])
+FINGER_AXES = np.array([0, 1, 1, 1, 1])
+FINGER_SIGNS = np.array([-1, 1, 1, 1, 1])
+
+# 'image' runs palm detection on every frame. 'video' and 'live_stream' let the
+# landmarker track the hand from the previous frame and only re-run palm
+# detection when tracking is lost; 'live_stream' also runs asynchronously.
+RUNNING_MODES = {
+    'image': vision.RunningMode.IMAGE,
+    'video': vision.RunningMode.VIDEO,
+    'live_stream': vision.RunningMode.LIVE_STREAM,
+}
+
+class AdaptiveScale:
+    """
+    Chooses how much to downscale the landmarker input so inference keeps up with
+    target_fps on slow (CPU-only) machines. The scale drops while the average
+    inference time exceeds the frame budget and recovers once there is headroom.
+    """
+    def __init__(self, target_fps, min_scale=0.5, step=0.8, cooldown=15):
+        self.budget = 1.0 / target_fps
+        self.min_scale = min_scale
+        self.step = step
+        self.cooldown = cooldown  # Frames measured at a scale before changing it again
+        self.scale = 1.0
+        self._avg = None
+        self._frames = 0
+
+    def update(self, seconds):
+        self._avg = seconds if self._avg is None else 0.9 * self._avg + 0.1 * seconds
+        self._frames += 1
+        if self._frames >= self.cooldown:
+            if self._avg > self.budget and self.scale > self.min_scale:
+                self._set(max(self.min_scale, self.scale * self.step))
+            elif self._avg < 0.6 * self.budget and self.scale < 1.0:
+                self._set(min(1.0, self.scale / self.step))
+        return self.scale
+
+    def _set(self, scale):
+        self.scale = scale
+        self._avg = None
+        self._frames = 0
 
 class HandDetector:
-    def __init__(self, model_path='hand_landmarker.task', max_hands=2, detection_con=0.5):
+    def __init__(self, model_path='hand_landmarker.task', max_hands=2, detection_con=0.5,
+                 track_con=0.5, running_mode='image', on_result=None,
+                 roi=False, roi_margin=0.5, target_fps=None, min_scale=0.5):
+        if running_mode not in RUNNING_MODES:
+            raise ValueError(f"Unknown running mode {running_mode!r}, expected one of {list(RUNNING_MODES)}")
+        # The tracking modes already crop around the hand internally, and moving the
+        # crop between frames would break their tracking
+        if roi and running_mode != 'image':
+            raise ValueError("ROI cropping is only supported in 'image' mode")
+        if target_fps and running_mode == 'live_stream':
+            raise ValueError("Adaptive resolution needs a synchronous mode ('image' or 'video')")
         self.model_path = model_path
         self.max_hands = max_hands
         self.detection_con = detection_con
+        self.track_con = track_con
+        self.running_mode = running_mode
+        # Optional callback(results, timestamp_ms), called as each result becomes available
+        self.on_result = on_result
+        # ROI mode: feed only the previous hand box plus roi_margin (fraction of its size per side)
+        self.roi = roi
+        self.roi_margin = roi_margin
+        self.roi_region = None  # (x0, y0, x1, y1) cropped for the next frame, None = full frame
+        self.adaptive = AdaptiveScale(target_fps, min_scale) if target_fps else None
         
         # Configure Hand Landmarker
         base_options = python.BaseOptions(model_asset_path=self.model_path)
@@ -17,100 +93,227 @@ class HandDetector:
             base_options=base_options,
             num_hands=self.max_hands,
             min_hand_detection_confidence=self.detection_con,
-            running_mode=vision.RunningMode.IMAGE
+            min_tracking_confidence=self.track_con,
+            running_mode=RUNNING_MODES[running_mode],
+            result_callback=self._on_async_result if running_mode == 'live_stream' else None
         )
         self.detector = vision.HandLandmarker.create_from_options(options)
         self.results = None
-        self.lm_list = []
+        self.result_timestamp_ms = None  # Frame timestamp the current results belong to
+        # Normalized [x, y, z] of every detected hand, (hands, 21, 3) float32, set once per frame
+        self.landmarks = NO_HANDS
+        # Pixel [x, y] of the hand chosen in find_position, (21, 2) int32, or None
+        self.pixels = None
+        self._lm_list = None
         self.tip_ids = [4, 8, 12, 16, 20]
+        self._last_timestamp_ms = -1
+        self._latest = (None, None)
+        self._lock = threading.Lock()
+
+    @property
+    def input_scale(self):
+        return self.adaptive.scale if self.adaptive else 1.0
+
+    def find_hands(self, img, draw=True, timestamp_ms=None):
+        # timestamp_ms is only used in video/live_stream mode (e.g. the frame time of a
+        # recorded clip); by default the current clock is used
+        start = time.perf_counter()
+        region = self.roi_region
+        self.results, self.result_timestamp_ms = self._detect(img, region, timestamp_ms)
+        if region is not None and self.results and not self.results.hand_landmarks:
+            # Hand lost inside the ROI: look at the whole frame again
+            self.results, self.result_timestamp_ms = self._detect(img, None, timestamp_ms)
+        self.landmarks = self.landmarks_array(self.results)
+        
+        if self.running_mode != 'live_stream' and self.on_result:
+            self.on_result(self.results, self.result_timestamp_ms)
+        if self.roi:
+            h, w, _ = img.shape
+            self.roi_region = self._next_region(self.landmarks, w, h)
+        if self.adaptive:
+            self.adaptive.update(time.perf_counter() - start)
+        
+        if draw:
+            self.draw_hands(img, self.landmarks)
+                    
+        return img
+
+    @staticmethod
+    def landmarks_array(results):
+        # MediaPipe results -> (hands, 21, 3) float32 of normalized [x, y, z]
+        if not results or not results.hand_landmarks:
+            return NO_HANDS
+        hands = results.hand_landmarks
+        return np.fromiter((v for hand_landmarks in hands for lm in hand_landmarks for v in (lm.x, lm.y, lm.z)),
+                           dtype=np.float32, count=len(hands) * 21 * 3).reshape(-1, 21, 3)
+
+    @staticmethod
+    def to_pixels(landmarks, shape):
+        # Normalized landmarks (..., 3) -> integer pixel [x, y], truncated like int(lm.x * w)
+        # (the product is done in float64 so rounding matches the per-landmark version)
+        h, w = shape[:2]
+        return (landmarks[..., :2] * np.array([w, h])).astype(np.int32)
+
+    def _detect(self, img, region, timestamp_ms):
+        # Runs the landmarker on the region (None = whole frame) at the current input
+        # scale and returns (results, timestamp_ms) in full-frame coordinates
+        h, w, _ = img.shape
+        if region is not None:
+            x0, y0, x1, y1 = region
+            img = img[y0:y1, x0:x1]
+        if self.input_scale < 1.0:
+            # Landmarks are normalized, so a smaller input needs no remapping
+            img = cv2.resize(img, None, fx=self.input_scale, fy=self.input_scale, interpolation=cv2.INTER_AREA)
 
-    def find_hands(self, img, draw=True):
         # Convert to Mediapipe Image format
         img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
         mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
         
         # Process image
-        self.results = self.detector.detect(mp_image)
-        
-        if draw and self.results.hand_landmarks:
-            for hand_landmarks in self.results.hand_landmarks:
-                h, w, _ = img.shape
-                # Draw landmarks manually since drawing_utils might be missing
-                for lm in hand_landmarks:
-                    cx, cy = int(lm.x * w), int(lm.y * h)
-                    cv2.circle(img, (cx, cy), 5, (255, 0, 255), cv2.FILLED)
-                
-                # Draw connections (partial list for common hand connections)
-                connections = [
-                    (0, 1), (1, 2), (2, 3), (3, 4), # Thumb
-                    (0, 5), (5, 6), (6, 7), (7, 8), # Index
-                    (5, 9), (9, 10), (10, 11), (11, 12), # Middle
-                    (9, 13), (13, 14), (14, 15), (15, 16), # Ring
-                    (13, 17), (17, 18), (18, 19), (19, 20), (0, 17) # Pinky & Palm
-                ]
-                for start, end in connections:
-                    p1 = (int(hand_landmarks[start].x * w), int(hand_landmarks[start].y * h))
-                    p2 = (int(hand_landmarks[end].x * w), int(hand_landmarks[end].y * h))
-                    cv2.line(img, p1, p2, (0, 255, 0), 2)
-                    
+        if self.running_mode == 'image':
+            results = self.detector.detect(mp_image)
+        elif self.running_mode == 'video':
+            timestamp_ms = self._next_timestamp(timestamp_ms)
+            results = self.detector.detect_for_video(mp_image, timestamp_ms)
+        else:
+            # Returns at once; the newest result received so far is used, which may
+            # belong to an earlier frame (see result_timestamp_ms)
+            self.detector.detect_async(mp_image, self._next_timestamp(timestamp_ms))
+            with self._lock:
+                return self._latest
+
+        if region is not None:
+            self._to_frame_coords(results, region, w, h)
+        return results, timestamp_ms
+
+    def _to_frame_coords(self, results, region, w, h):
+        # Landmarks come normalized to the crop; make them relative to the full frame
+        x0, y0, x1, y1 = region
+        for hand_landmarks in results.hand_landmarks:
+            for lm in hand_landmarks:
+                lm.x = (x0 + lm.x * (x1 - x0)) / w
+                lm.y = (y0 + lm.y * (y1 - y0)) / h
+                lm.z = lm.z * (x1 - x0) / w
+
+    def _next_region(self, landmarks, w, h):
+        # Square crop around all detected hands plus the margin, or None for the full frame
+        if not len(landmarks):
+            return None
+        points = landmarks[..., :2]
+        (xmin, ymin), (xmax, ymax) = points.min(axis=(0, 1)).tolist(), points.max(axis=(0, 1)).tolist()
+        xmin, xmax, ymin, ymax = xmin * w, xmax * w, ymin * h, ymax * h
+        side = max(xmax - xmin, ymax - ymin) * (1 + 2 * self.roi_margin)
+        cx, cy = (xmax + xmin) / 2, (ymax + ymin) / 2
+        x0, x1 = int(max(0, cx - side / 2)), int(min(w, cx + side / 2))
+        y0, y1 = int(max(0, cy - side / 2)), int(min(h, cy + side / 2))
+        # Not worth cropping when the box is most of the frame (or degenerate)
+        if x1 - x0 < 16 or y1 - y0 < 16 or (x1 - x0) * (y1 - y0) > 0.6 * w * h:
+            return None
+        return x0, y0, x1, y1
+
+    def _next_timestamp(self, timestamp_ms):
+        if timestamp_ms is None:
+            timestamp_ms = time.monotonic() * 1000
+        # MediaPipe rejects timestamps that do not increase
+        timestamp_ms = max(int(timestamp_ms), self._last_timestamp_ms + 1)
+        self._last_timestamp_ms = timestamp_ms
+        return timestamp_ms
+
+    def _on_async_result(self, results, output_image, timestamp_ms):
+        # Runs on a MediaPipe thread in live_stream mode
+        with self._lock:
+            self._latest = (results, timestamp_ms)
+        if self.on_result:
+            self.on_result(results, timestamp_ms)
+
+    def close(self):
+        self.detector.close()
+
+    def draw_hands(self, img, landmarks):
+        # Draws a (hands, 21, 3) landmark array; separate from find_hands so another
+        # thread can draw a frame's landmarks
+        for points in self.to_pixels(landmarks, img.shape).tolist():
+            # Draw landmarks manually since drawing_utils might be missing
+            for cx, cy in points:
+                cv2.circle(img, (cx, cy), 5, (255, 0, 255), cv2.FILLED)
+            
+            # Draw connections (partial list for common hand connections)
+            for start, end in CONNECTIONS.tolist():
+                cv2.line(img, points[start], points[end], (0, 255, 0), 2)
         return img
 
-    def find_position(self, img, hand_no=0, draw=True):
-        self.lm_list = []
+    def find_position_array(self, img, hand_no=0, draw=True):
+        # Array version of find_position: returns ((21, 2) int32 pixels or None, bbox)
+        self.pixels = None
+        self._lm_list = None
         bbox = []
-        if self.results and self.results.hand_landmarks:
-            if len(self.results.hand_landmarks) > hand_no:
-                my_hand = self.results.hand_landmarks[hand_no]
-                x_list = []
-                y_list = []
-                h, w, c = img.shape
-                
-                for id, lm in enumerate(my_hand):
-                    cx, cy = int(lm.x * w), int(lm.y * h)
-                    x_list.append(cx)
-                    y_list.append(cy)
-                    self.lm_list.append([id, cx, cy])
-                    
-                xmin, xmax = min(x_list), max(x_list)
-                ymin, ymax = min(y_list), max(y_list)
-                bbox = xmin, ymin, xmax, ymax
-                
-                if draw:
-                    cv2.rectangle(img, (xmin - 20, ymin - 20), (xmax + 20, ymax + 20), (0, 255, 0), 2)
+        if len(self.landmarks) > hand_no:
+            self.pixels = self.to_pixels(self.landmarks[hand_no], img.shape)
+            bbox = self.find_bbox()
+            
+            if draw:
+                self.draw_bbox(img, bbox)
                 
+        return self.pixels, bbox
+
+    def find_position(self, img, hand_no=0, draw=True):
+        _, bbox = self.find_position_array(img, hand_no, draw)
         return self.lm_list, bbox
 
+    @property
+    def lm_list(self):
+        # [[id, cx, cy], ...] view of self.pixels for existing callers, built on first use
+        if self._lm_list is None:
+            self._lm_list = [] if self.pixels is None else [[id, cx, cy] for id, (cx, cy)
+                                                            in enumerate(self.pixels.tolist())]
+        return self._lm_list
+
+    def find_bbox(self):
+        # (xmin, ymin, xmax, ymax) of the current pixel landmarks
+        (xmin, ymin), (xmax, ymax) = self.pixels.min(axis=0).tolist(), self.pixels.max(axis=0).tolist()
+        return xmin, ymin, xmax, ymax
+
+    def draw_bbox(self, img, bbox):
+        if bbox:
+            xmin, ymin, xmax, ymax = bbox
+            cv2.rectangle(img, (xmin - 20, ymin - 20), (xmax + 20, ymax + 20), (0, 255, 0), 2)
+        return img
+
+    def finger_states(self):
+        # Boolean array [thumb, index, middle, ring, pinky], True when the finger is up
+        if self.pixels is None:
+            return np.zeros(5, dtype=bool)
+        # Thumb: horizontal check, 4 fingers: vertical check (see FINGER_SIGNS)
+        diff = self.pixels[FINGER_TIPS, FINGER_AXES] - self.pixels[FINGER_JOINTS, FINGER_AXES]
+        return diff * FINGER_SIGNS < 0
+
     def fingers_up(self):
-        fingers = []
-        if not self.lm_list:
-            return [0, 0, 0, 0, 0]
-            
-        # Thumb (Horizontal distance check adjusted for new model behavior if needed)
-        # Using the same logic as before for simplicity, might need refinement
-        if self.lm_list[self.tip_ids[0]][1] > self.lm_list[self.tip_ids[0] - 1][1]:
-            fingers.append(1)
-        else:
-            fingers.append(0)
-            
-        # 4 Fingers (Vertical position check)
-        for id in range(1, 5):
-            if self.lm_list[self.tip_ids[id]][2] < self.lm_list[self.tip_ids[id] - 2][2]:
-                fingers.append(1)
-            else:
-                fingers.append(0)
-                
-        return fingers
+        return self.finger_states().astype(int).tolist()
+
+    def distances(self, ids=None):
+        # Pairwise pixel distances between landmarks (all 21 by default), (k, k) float32
+        if self.pixels is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        points = (self.pixels if ids is None else self.pixels[list(ids)]).astype(np.float32)
+        diff = points[:, None, :] - points[None, :, :]
+        return np.sqrt((diff ** 2).sum(axis=-1))
 
     def find_distance(self, p1, p2, img, draw=True, r=15, t=3):
-        x1, y1 = self.lm_list[p1][1:]
-        x2, y2 = self.lm_list[p2][1:]
+        (x1, y1), (x2, y2) = self.pixels[[p1, p2]].tolist()
         cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
         
+        line_info = [x1, y1, x2, y2, cx, cy]
+        
         if draw:
-            cv2.line(img, (x1, y1), (x2, y2), (255, 0, 255), t)
-            cv2.circle(img, (x1, y1), r, (255, 0, 255), cv2.FILLED)
-            cv2.circle(img, (x2, y2), r, (255, 0, 255), cv2.FILLED)
-            cv2.circle(img, (cx, cy), r, (0, 0, 255), cv2.FILLED)
+            self.draw_distance(img, line_info, r, t)
             
         length = math.hypot(x2 - x1, y2 - y1)
-        return length, img, [x1, y1, x2, y2, cx, cy]
+        return length, img, line_info
+
+    def draw_distance(self, img, line_info, r=15, t=3):
+        x1, y1, x2, y2, cx, cy = line_info
+        cv2.line(img, (x1, y1), (x2, y2), (255, 0, 255), t)
+        cv2.circle(img, (x1, y1), r, (255, 0, 255), cv2.FILLED)
+        cv2.circle(img, (x2, y2), r, (255, 0, 255), cv2.FILLED)
+        cv2.circle(img, (cx, cy), r, (0, 0, 255), cv2.FILLED)
+        return img
@@ -0,0 +1,127 @@
+"""
+Benchmark of the HandDetector running modes on recorded clips.
+
+Feeds every frame of each clip through HandDetector in each running mode and
+compares the per-frame inference time with how stable the detections are:
+detection rate, how often the hand is lost, and landmark jitter (mean pixel
+displacement of the 21 landmarks between consecutive detections).
+In live_stream mode frames are fed at the clip's frame rate, as a camera
+would, and the time is measured from submission to result; frames that
+MediaPipe skips because it is still busy are reported as dropped.
+Usage: python benchmark_modes.py clip1.mp4 [clip2.mp4 ...] [--model hand_landmarker.task]
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from HandTrackingModule import HandDetector, RUNNING_MODES
+
+
+def read_clip(path):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"Could not open clip {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = []
+    while True:
+        success, img = cap.read()
+        if not success:
+            break
+        frames.append(img)
+    cap.release()
+    return frames, fps
+
+
+def first_hand(results, w, h):
+    # (21, 2) pixel coordinates of the first hand, or None
+    landmarks = HandDetector.landmarks_array(results)
+    if not len(landmarks):
+        return None
+    return landmarks[0, :, :2] * np.array([w, h], dtype=np.float32)
+
+
+def run_mode(mode, frames, fps, args):
+    h, w = frames[0].shape[:2]
+    submitted = {}
+    received = {}  # timestamp_ms -> (landmarks, seconds)
+
+    def on_result(results, timestamp_ms):
+        received[timestamp_ms] = (first_hand(results, w, h), time.perf_counter() - submitted[timestamp_ms])
+
+    detector = HandDetector(model_path=args.model, max_hands=1, detection_con=args.detection_con,
+                            running_mode=mode, on_result=on_result)
+    start = time.perf_counter()
+    try:
+        for i, img in enumerate(frames):
+            timestamp_ms = int(i * 1000 / fps)
+            if mode == 'live_stream':
+                # Pace frames like a live camera so the landmarker can keep up
+                delay = start + i / fps - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            submitted[timestamp_ms] = time.perf_counter()
+            detector.find_hands(img, draw=False, timestamp_ms=timestamp_ms)
+        if mode == 'live_stream':
+            # Give the last frame time to come back
+            deadline = time.perf_counter() + 1.0
+            while timestamp_ms not in received and time.perf_counter() < deadline:
+                time.sleep(0.01)
+    finally:
+        detector.close()
+    return [received[ts] for ts in sorted(received)], len(frames)
+
+
+def summarize(mode, clip_outcomes, total_frames):
+    # clip_outcomes: one list of (landmarks, seconds) per clip, in frame order
+    times, detected, lost, jitter = [], [], 0, []
+    for outcomes in clip_outcomes:
+        times += [seconds * 1000 for _, seconds in outcomes]
+        hands = [landmarks for landmarks, _ in outcomes]
+        found = [landmarks is not None for landmarks in hands]
+        detected += found
+        lost += sum(1 for before, now in zip(found, found[1:]) if before and not now)
+        jitter += [np.linalg.norm(now - before, axis=1).mean()
+                   for before, now in zip(hands, hands[1:]) if before is not None and now is not None]
+    times = np.array(times)
+    return {
+        'mode': mode,
+        'frames': len(detected),
+        'dropped': total_frames - len(detected),
+        'ms_mean': float(times.mean()) if len(times) else 0.0,
+        'ms_p95': float(np.percentile(times, 95)) if len(times) else 0.0,
+        'detected_pct': 100.0 * sum(detected) / len(detected) if detected else 0.0,
+        'lost': lost,
+        'jitter_px': float(np.mean(jitter)) if jitter else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HandDetector running modes on recorded clips")
+    parser.add_argument('clips', nargs='+', help="Video files to feed to the detector")
+    parser.add_argument('--model', default='hand_landmarker.task')
+    parser.add_argument('--modes', nargs='+', choices=list(RUNNING_MODES), default=list(RUNNING_MODES))
+    parser.add_argument('--detection-con', type=float, default=0.7)
+    args = parser.parse_args()
+
+    clips = [read_clip(path) for path in args.clips]
+    clips = [(frames, fps) for frames, fps in clips if frames]
+    print(f"{sum(len(frames) for frames, _ in clips)} frames from {len(clips)} clips\n")
+
+    print(f"{'Mode':<13}{'Frames':>8}{'Dropped':>9}{'ms mean':>9}{'ms p95':>9}"
+          f"{'Detected':>10}{'Lost':>6}{'Jitter px':>11}")
+    print("-" * 75)
+    for mode in args.modes:
+        outcomes, total = [], 0
+        for frames, fps in clips:
+            clip_outcomes, clip_total = run_mode(mode, frames, fps, args)
+            outcomes.append(clip_outcomes)
+            total += clip_total
+        r = summarize(mode, outcomes, total)
+        print(f"{r['mode']:<13}{r['frames']:>8}{r['dropped']:>9}{r['ms_mean']:>9.1f}{r['ms_p95']:>9.1f}"
+              f"{r['detected_pct']:>9.1f}%{r['lost']:>6}{r['jitter_px']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,3 +5,9 @@ load_dotenv()
 
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "hand_tracking_db")
+
+# Background writer for volume events (see dao.batch_writer.POLICIES)
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "50"))
+EVENT_FLUSH_INTERVAL = float(os.getenv("EVENT_FLUSH_INTERVAL", "2.0"))
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "1000"))
+EVENT_QUEUE_POLICY = os.getenv("EVENT_QUEUE_POLICY", "drop_oldest")
@@ -0,0 +1,115 @@
+import threading
+from collections import deque
+
+# What put() does when the queue is full:
+# 'drop_oldest' discards the oldest queued item, 'drop_newest' rejects the new one,
+# 'block' waits up to block_timeout for room (backpressure) and then rejects it
+POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class BatchWriter:
+    """
+    Buffers items in a bounded queue and writes them in batches on a background thread.
+    A batch is written when batch_size items are queued or flush_interval seconds have
+    passed, whichever comes first, so put() never waits for the database.
+    Args:
+        write: Function (list of items) -> number written (None = all), run on the writer thread
+        batch_size: Items per write
+        flush_interval: Max seconds an item waits in the queue
+        max_queue: Max queued items before the policy kicks in
+        policy: One of POLICIES
+        block_timeout: Max seconds put() waits with the 'block' policy
+    """
+
+    def __init__(self, write, batch_size=50, flush_interval=2.0, max_queue=1000,
+                 policy="drop_oldest", block_timeout=0.05, name="batch-writer"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}', expected one of {POLICIES}")
+        if batch_size < 1 or max_queue < batch_size:
+            raise ValueError("batch_size must be at least 1 and no larger than max_queue")
+        self.write = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.written = 0
+        self.dropped = 0  # Rejected or discarded by the queue policy
+        self.failed = 0   # Taken from the queue but not written
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._flush_requested = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, item):
+        # Returns False if the item was not queued
+        with self._cond:
+            if self.policy == "block":
+                self._cond.wait_for(lambda: len(self._queue) < self.max_queue or self._closed,
+                                    self.block_timeout)
+            if self._closed:
+                self.dropped += 1
+                return False
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                if self.policy != "drop_oldest":
+                    return False
+                self._queue.popleft()
+            self._queue.append(item)
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+            return True
+
+    @property
+    def pending(self):
+        # Items queued or being written
+        with self._cond:
+            return len(self._queue) + self._in_flight
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._queue) >= self.batch_size or self._flush_requested
+                                    or self._closed, self.flush_interval)
+                batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.batch_size))]
+                if not batch:
+                    self._flush_requested = False
+                    self._cond.notify_all()
+                    if self._closed:
+                        return
+                    continue
+                self._in_flight = len(batch)
+                # Room for producers waiting with the 'block' policy
+                self._cond.notify_all()
+
+            try:
+                written = self.write(batch)
+                written = len(batch) if written is None else written
+            except Exception as e:
+                # Keep the thread alive: losing a batch must not stop later writes
+                print(f"Error writing batch of {len(batch)}: {e}")
+                written = 0
+
+            with self._cond:
+                self.written += written
+                self.failed += len(batch) - written
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        # Writes everything queued so far; returns False if it did not finish in time
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._queue and not self._in_flight, timeout)
+
+    def close(self, timeout=5.0):
+        # Final flush: stops accepting items, writes what is left and stops the thread
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
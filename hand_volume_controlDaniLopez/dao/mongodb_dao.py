@@ -1,6 +1,8 @@
 import pymongo
-from pymongo.errors import ConnectionFailure, OperationFailure
-from config.settings import MONGODB_URI, DATABASE_NAME
+from pymongo.errors import BulkWriteError, ConnectionFailure, OperationFailure, PyMongoError
+from config.settings import (MONGODB_URI, DATABASE_NAME, EVENT_BATCH_SIZE, EVENT_FLUSH_INTERVAL,
+                             EVENT_QUEUE_SIZE, EVENT_QUEUE_POLICY)
+from dao.batch_writer import BatchWriter
 
 from typing import Any
 
@@ -9,6 +11,7 @@ class MongoDBDAO:
     client: Any = None
     db: Any = None
     connected: bool = False
+    event_writer: Any = None
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
@@ -16,6 +19,7 @@ class MongoDBDAO:
             cls._instance.client = None
             cls._instance.db = None
             cls._instance.connected = False
+            cls._instance.event_writer = None
             cls._instance.connect()
         return cls._instance
 
@@ -60,3 +64,42 @@ class MongoDBDAO:
             except OperationFailure as e:
                 print(f"Error inserting volume event: {e}")
         return None
+
+    def start_event_writer(self, batch_size=EVENT_BATCH_SIZE, flush_interval=EVENT_FLUSH_INTERVAL,
+                           max_queue=EVENT_QUEUE_SIZE, policy=EVENT_QUEUE_POLICY):
+        # Background writer for queue_volume_event; not started without a connection
+        if self.connected and self.event_writer is None:
+            self.event_writer = BatchWriter(self._insert_volume_events, batch_size, flush_interval,
+                                            max_queue, policy, name="volume-events")
+        return self.event_writer
+
+    def queue_volume_event(self, event):
+        # Non-blocking: the VolumeEvent is written later in a batch. Falls back to
+        # insert_volume_event when the writer is not running
+        if self.event_writer is None:
+            return self.insert_volume_event(event.to_dict()) is not None
+        return self.event_writer.put(event)
+
+    def _insert_volume_events(self, events):
+        # Runs on the writer thread; returns how many events were stored
+        try:
+            result = self.db.volume_events.insert_many([event.to_dict() for event in events], ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            # ordered=False: the rest of the batch is still inserted
+            errors = e.details['writeErrors']
+            print(f"Error inserting {len(errors)} of {len(events)} volume events: {errors[0].get('errmsg')}")
+            return e.details['nInserted']
+        except PyMongoError as e:
+            print(f"Error inserting volume events: {e}")
+            return 0
+
+    def stop_event_writer(self, timeout=5.0):
+        # Final flush on shutdown; returns False if events were still pending at the timeout
+        if self.event_writer is None:
+            return True
+        writer, self.event_writer = self.event_writer, None
+        done = writer.close(timeout)
+        print(f"Volume events: {writer.written} written, {writer.dropped} dropped, "
+              f"{writer.failed + writer.pending} lost.")
+        return done
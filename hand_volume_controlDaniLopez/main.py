@@ -1,15 +1,136 @@
+import argparse
 import cv2
 import time
 import numpy as np
 
 # Adjust imports carefully
-from HandTrackingModule import HandDetector
+from HandTrackingModule import HandDetector, RUNNING_MODES
 from VolumeHandControl import VolumeController
 from models.session import Session
 from models.volume_event import VolumeEvent
 from dao.mongodb_dao import MongoDBDAO
+from pipeline import FramePipeline, LatencyStats
+
+MIN_DIST = 50
+MAX_DIST = 200 # Adjusted max distance for typical span
+
+
+class GestureResult:
+    # What the inference stage found in a frame, for the main thread to apply and draw
+    def __init__(self, hands, bbox, roi=None, input_scale=1.0):
+        self.hands = hands
+        self.bbox = bbox
+        self.roi = roi
+        self.input_scale = input_scale
+        self.line_info = None
+        self.vol_bar = None
+        self.vol_per = None
+        self.length = None
+        self.t_gesture = None  # Set when the gesture asks for a volume change
+        self.volume_set = False
+
+
+def process_frame(img, t_capture, detector):
+    # Detect Hands (drawing is left to the render stage)
+    detector.find_hands(img, draw=False, timestamp_ms=t_capture * 1000)
+    pixels, bbox = detector.find_position_array(img, draw=False)
+    result = GestureResult(detector.landmarks, bbox, detector.roi_region, detector.input_scale)
+
+    if pixels is not None:
+        # Find dimensions of bounding box for normalization
+        area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1]) // 100
+        
+        if 250 < area < 1000:
+            # Find Distance between index and Thumb
+            length, _, result.line_info = detector.find_distance(4, 8, img, draw=False)
+            
+            # Compute expected volume mapping without applying yet
+            result.vol_bar = np.interp(length, [MIN_DIST, MAX_DIST], [400, 150])
+            result.vol_per = np.interp(length, [MIN_DIST, MAX_DIST], [0, 100])
+
+            # Check fingers up to detect confirmation gesture (Pinky down)
+            fingers = detector.fingers_up()
+            
+            # 4. If pinky is down (intencional change)
+            if fingers[4] == 0:
+                result.length = length
+                # In live_stream mode the landmarks may come from an earlier frame
+                result.t_gesture = detector.result_timestamp_ms / 1000 if detector.result_timestamp_ms else t_capture
+    return result
+
+
+def apply_volume(result, volume_ctrl, db, session, stats):
+    # Runs on the main thread: the pycaw endpoint is a COM object created there,
+    # so it must not be called from the inference thread
+    if result.t_gesture is None:
+        return
+    # Grab previous volume before setting
+    old_vol = volume_ctrl.get_current_volume()
+
+    # Apply volume
+    _, _ = volume_ctrl.set_volume_from_distance(result.length, MIN_DIST, MAX_DIST)
+    result.volume_set = True
+    stats.add("gesture_to_volume", time.perf_counter() - result.t_gesture)
+
+    # Create event in background
+    new_vol = volume_ctrl.get_current_volume()
+    if abs(old_vol - new_vol) > 1.0: # Only record meaningful changes > 1%
+        event = VolumeEvent(session.session_id, old_vol, new_vol, float(result.length))
+        db.queue_volume_event(event)
+
+
+def run_sequential(cap, process, show, stats):
+    # Every stage in one loop: the frame rate is bounded by their sum
+    while True:
+        start = time.perf_counter()
+        success, img = cap.read()
+        if not success:
+           continue
+        t_capture = time.perf_counter()
+        stats.add("capture", t_capture - start)
+
+        result = process(img, t_capture)
+        stats.add("inference", time.perf_counter() - t_capture)
+        if not show(img, result, t_capture):
+            break
+
+
+def run_pipelined(cap, process, show, stats):
+    # Capture and inference on their own threads, rendering here (cv2.imshow needs the main thread)
+    pipeline = FramePipeline(cap, process, stats).start()
+    try:
+        while True:
+            packet = pipeline.get(timeout=0.1)
+            if packet is None:
+                # Keep the window responsive while waiting for a frame
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+                continue
+            if not show(packet.img, packet.result, packet.t_capture):
+                break
+    finally:
+        pipeline.stop()
+        print(f"Dropped {pipeline.dropped} stale frames.")
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Control the system volume with hand gestures")
+    parser.add_argument('--sequential', action='store_true',
+                        help="Run capture, inference and rendering in a single loop instead of the pipeline")
+    parser.add_argument('--mode', choices=list(RUNNING_MODES),
+                        help="Landmarker running mode; video and live_stream track the hand between frames "
+                             "(default: video, or image with --roi)")
+    parser.add_argument('--roi', action='store_true',
+                        help="Only feed the area around the last detected hand to the model")
+    parser.add_argument('--target-fps', type=float,
+                        help="Lower the model input resolution while inference is slower than this")
+    args = parser.parse_args()
+    if args.roi and args.mode not in (None, 'image'):
+        parser.error("--roi needs --mode image")
+    if args.target_fps and args.mode == 'live_stream':
+        parser.error("--target-fps needs --mode image or video")
+    mode = args.mode or ('image' if args.roi else 'video')
+
     # 1. Initialize Camera
     wCam, hCam = 640, 480
     cap = cv2.VideoCapture(0)
@@ -21,9 +142,11 @@ def main():
         return
 
     # 2. Initialize Core Modules
-    detector = HandDetector(detection_con=0.7, max_hands=1)
+    detector = HandDetector(detection_con=0.7, max_hands=1, running_mode=mode,
+                            roi=args.roi, target_fps=args.target_fps)
     volume_ctrl = VolumeController()
     db = MongoDBDAO()
+    db.start_event_writer()
     
     # 3. Create a new Session and save to MongoDB
     session = Session()
@@ -32,81 +155,72 @@ def main():
     # State variables
     volBar = 400
     volPer = 0
-    area = 0
     pTime = 0
+    stats = LatencyStats()
+
+    def process(img, t_capture):
+        return process_frame(img, t_capture, detector)
+
+    def show(img, result, t_capture):
+        # Render stage: returns False when the user asks to quit
+        nonlocal volBar, volPer, pTime
+        apply_volume(result, volume_ctrl, db, session, stats)
+        start = time.perf_counter()
+
+        detector.draw_hands(img, result.hands)
+        detector.draw_bbox(img, result.bbox)
+        if result.roi:
+            # Region that will be fed to the model for the next frame
+            cv2.rectangle(img, result.roi[:2], result.roi[2:], (200, 200, 200), 1)
+        if result.line_info:
+            detector.draw_distance(img, result.line_info)
+            volBar, volPer = result.vol_bar, result.vol_per
+            if result.volume_set:
+                # Visual cue: feedback that volume was set (green circle)
+                cv2.circle(img, (result.line_info[4], result.line_info[5]), 15, (0, 255, 0), cv2.FILLED)
+
+        # 5. Drawings (UI overlays)
+        cv2.rectangle(img, (50, 150), (85, 400), (255, 0, 0), 3)
+        cv2.rectangle(img, (50, int(volBar)), (85, 400), (255, 0, 0), cv2.FILLED)
+        cv2.putText(img, f'{int(volPer)} %', (40, 450), cv2.FONT_HERSHEY_COMPLEX,
+                    1, (255, 0, 0), 3)
+
+        # Frame rate calculation
+        cTime = time.time()
+        fps = 1 / (cTime - pTime) if pTime > 0 else 0
+        pTime = cTime
+        
+        # FPS and Connection Status text
+        cv2.putText(img, f'FPS: {int(fps)}', (40, 50), cv2.FONT_HERSHEY_COMPLEX,
+                    1, (255, 0, 0), 3)
+        
+        db_status = "OK" if db.connected else "--"
+        color_db = (0, 255, 0) if db.connected else (0, 0, 255)
+        cv2.putText(img, f'DB: {db_status}', (40, 90), cv2.FONT_HERSHEY_COMPLEX,
+                    1, color_db, 3)
+        if result.input_scale < 1.0:
+            cv2.putText(img, f'Input scale: {result.input_scale:.2f}', (40, 120), cv2.FONT_HERSHEY_PLAIN,
+                        1, (255, 0, 0), 1)
+
+        # Per-stage latency (mean over the last frames)
+        for i, (stage, (mean, _)) in enumerate(stats.summary().items()):
+            cv2.putText(img, f'{stage}: {mean:.0f} ms', (420, 30 + 20 * i), cv2.FONT_HERSHEY_PLAIN,
+                        1, (255, 0, 0), 1)
+
+        cv2.imshow("Hand Volume Control", img)
+        stats.add("render", time.perf_counter() - start)
+        stats.add("end_to_end", time.perf_counter() - t_capture)
+
+        # Wait for 'q' to quit
+        return not (cv2.waitKey(1) & 0xFF == ord('q'))
     
     print("Starting volume control. Press 'q' to exit.")
 
     try:
-        while True:
-            success, img = cap.read()
-            if not success:
-               continue
-
-            # Detect Hands
-            img = detector.find_hands(img)
-            lmList, bbox = detector.find_position(img, draw=True)
-
-            if len(lmList) != 0:
-                # Find dimensions of bounding box for normalization
-                area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1]) // 100
-                
-                if 250 < area < 1000:
-                    # Find Distance between index and Thumb
-                    length, img, lineInfo = detector.find_distance(4, 8, img)
-                    
-                    # Compute expected volume mapping without applying yet
-                    min_dist = 50
-                    max_dist = 200 # Adjusted max distance for typical span
-                    volBar = np.interp(length, [min_dist, max_dist], [400, 150])
-                    volPer = np.interp(length, [min_dist, max_dist], [0, 100])
-
-                    # Check fingers up to detect confirmation gesture (Pinky down)
-                    fingers = detector.fingers_up()
-                    
-                    # 4. If pinky is down (intencional change)
-                    if fingers[4] == 0:
-                        # Grab previous volume before setting
-                        old_vol = volume_ctrl.get_current_volume()
-                        
-                        # Apply volume
-                        _, _ = volume_ctrl.set_volume_from_distance(length, min_dist, max_dist)
-                        
-                        # Visual cue: feedback that volume was set (green circle)
-                        cv2.circle(img, (lineInfo[4], lineInfo[5]), 15, (0, 255, 0), cv2.FILLED)
-
-                        # Create event in background
-                        new_vol = volume_ctrl.get_current_volume()
-                        if abs(old_vol - new_vol) > 1.0: # Only record meaningful changes > 1%
-                            event = VolumeEvent(session.session_id, old_vol, new_vol, float(length))
-                            db.insert_volume_event(event.to_dict())
-
-
-            # 5. Drawings (UI overlays)
-            cv2.rectangle(img, (50, 150), (85, 400), (255, 0, 0), 3)
-            cv2.rectangle(img, (50, int(volBar)), (85, 400), (255, 0, 0), cv2.FILLED)
-            cv2.putText(img, f'{int(volPer)} %', (40, 450), cv2.FONT_HERSHEY_COMPLEX,
-                        1, (255, 0, 0), 3)
-
-            # Frame rate calculation
-            cTime = time.time()
-            fps = 1 / (cTime - pTime) if pTime > 0 else 0
-            pTime = cTime
-            
-            # FPS and Connection Status text
-            cv2.putText(img, f'FPS: {int(fps)}', (40, 50), cv2.FONT_HERSHEY_COMPLEX,
-                        1, (255, 0, 0), 3)
-            
-            db_status = "OK" if db.connected else "--"
-            color_db = (0, 255, 0) if db.connected else (0, 0, 255)
-            cv2.putText(img, f'DB: {db_status}', (40, 90), cv2.FONT_HERSHEY_COMPLEX,
-                        1, color_db, 3)
-
-            cv2.imshow("Hand Volume Control", img)
-
-            # Wait for 'q' to quit
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+        if args.sequential:
+            run_sequential(cap, process, show, stats)
+        else:
+            run_pipelined(cap, process, show, stats)
 
     except KeyboardInterrupt:
         print("Interrupted by user.")
@@ -114,9 +228,13 @@ def main():
         # 6. Cleanup and update session end time
         print("Cleaning up...")
         session.end_session()
+        db.stop_event_writer()
         db.update_session(session.session_id, {"end_time": session.end_time, "duration": session.get_duration()})
         cap.release()
+        detector.close()
         cv2.destroyAllWindows()
+        print("Latency per stage:")
+        print(stats.report())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,154 @@
+"""
+Multi-stage frame pipeline for the hand volume controller.
+
+Capture and inference run on their own threads and rendering stays on the
+main thread (cv2.imshow needs it), so the frame rate is bounded by the slowest
+stage instead of the sum of all of them. Every hand-off is a latest-only slot:
+when the next stage is still busy the older frame is dropped instead of queued,
+so the controller always reacts to the newest image.
+"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class LatestSlot:
+    """Bounded queue of size one that keeps only the newest item."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        # Returns None on timeout or once the slot is closed
+        with self._cond:
+            self._cond.wait_for(lambda: self._item is not None or self._closed, timeout)
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class LatencyStats:
+    """Rolling latency samples (in seconds) per stage, reported in ms."""
+
+    def __init__(self, window=120):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            if stage not in self._samples:
+                self._samples[stage] = deque(maxlen=self.window)
+            self._samples[stage].append(seconds)
+
+    def summary(self):
+        # {stage: (mean_ms, p95_ms)}
+        with self._lock:
+            samples = {stage: np.array(values) * 1000 for stage, values in self._samples.items() if values}
+        return {stage: (float(values.mean()), float(np.percentile(values, 95)))
+                for stage, values in samples.items()}
+
+    def report(self):
+        return "\n".join(f"{stage:<18} mean {mean:6.1f} ms   p95 {p95:6.1f} ms"
+                         for stage, (mean, p95) in self.summary().items())
+
+
+class FramePacket:
+    """A captured frame travelling through the pipeline."""
+
+    __slots__ = ("frame_id", "img", "t_capture", "result")
+
+    def __init__(self, frame_id, img, t_capture):
+        self.frame_id = frame_id
+        self.img = img
+        self.t_capture = t_capture
+        self.result = None
+
+
+class FramePipeline:
+    """
+    Runs capture and inference concurrently; the caller renders the results.
+    Args:
+        cap: cv2.VideoCapture (only the capture thread touches it)
+        process: Function (img, t_capture) -> result, run on the inference thread
+        stats: LatencyStats that receives the 'capture' and 'inference' timings
+    """
+
+    def __init__(self, cap, process, stats=None):
+        self.cap = cap
+        self.process = process
+        self.stats = stats or LatencyStats()
+        self.frames = LatestSlot()
+        self.results = LatestSlot()
+        self.error = None
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+                         threading.Thread(target=self._inference_loop, name="inference", daemon=True)]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def _capture_loop(self):
+        frame_id = 0
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            success, img = self.cap.read()
+            if not success:
+                time.sleep(0.005)
+                continue
+            t_capture = time.perf_counter()
+            self.stats.add("capture", t_capture - start)
+            frame_id += 1
+            self.frames.put(FramePacket(frame_id, img, t_capture))
+
+    def _inference_loop(self):
+        try:
+            while not self._stop.is_set():
+                packet = self.frames.get(timeout=0.1)
+                if packet is None:
+                    continue
+                start = time.perf_counter()
+                packet.result = self.process(packet.img, packet.t_capture)
+                self.stats.add("inference", time.perf_counter() - start)
+                self.results.put(packet)
+        except Exception as e:
+            # Surface the error to the render loop instead of dying silently
+            self.error = e
+            self._stop.set()
+            self.results.close()
+
+    def get(self, timeout=0.1):
+        """Newest processed packet, or None if nothing new arrived in time"""
+        if self.error is not None:
+            raise self.error
+        return self.results.get(timeout)
+
+    @property
+    def dropped(self):
+        # Frames skipped because the next stage was still busy
+        return self.frames.dropped + self.results.dropped
+
+    def stop(self):
+        self._stop.set()
+        self.frames.close()
+        self.results.close()
+        for thread in self._threads:
+            thread.join(timeout=2)
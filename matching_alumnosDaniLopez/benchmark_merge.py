@@ -0,0 +1,77 @@
+"""
+Benchmark de la combinación de notas: bucle con csv.DictReader frente a la
+ingesta columnar con join vectorizado
+Genera ficheros UF1/UF2 sintéticos de cada tamaño en un directorio temporal
+Uso: python benchmark_merge.py [--filas 10000 1000000] [--repeticiones 3]
+"""
+
+import argparse
+import csv
+import filecmp
+import os
+import random
+import tempfile
+import time
+
+from ingesta_rapida import combinar_columnar
+from main import columnas_salida, combinar_en_memoria
+
+NOMBRES = ['Ana', 'Luis', 'Marta', 'Carlos', 'Lucía', 'Jorge', 'Elena', 'Pablo']
+APELLIDOS = ['Gomez', 'Perez', 'Lopez', 'Ruiz', 'Martín', 'Sanz', 'Navarro', 'Iglesias']
+
+
+def generar_ficheros(filas, directorio, semilla=1):
+    """UF1 con `filas` alumnos y UF2 con un 90 % de ellos más un 10 % nuevos, en otro orden"""
+    aleatorio = random.Random(semilla)
+    ids_uf1 = list(range(1, filas + 1))
+    ids_uf2 = aleatorio.sample(ids_uf1, int(filas * 0.9)) + list(range(filas + 1, filas + filas // 10 + 1))
+
+    rutas = []
+    for unidad, ids in (('UF1', ids_uf1), ('UF2', ids_uf2)):
+        ruta = os.path.join(directorio, f"notas_alumnos_{unidad}.csv")
+        with open(ruta, 'w', newline='', encoding='utf-8') as f:
+            escritor = csv.writer(f, delimiter=';')
+            escritor.writerow(['Id', 'Nombre', 'Apellido', 'Nota'])
+            for id_alumno in ids:
+                escritor.writerow([id_alumno, NOMBRES[id_alumno % len(NOMBRES)],
+                                   APELLIDOS[id_alumno * 7 % len(APELLIDOS)],
+                                   f"{aleatorio.uniform(0, 10):.1f}"])
+        rutas.append(ruta)
+    return rutas
+
+
+def medir(funcion, repeticiones):
+    """Mejor tiempo en segundos de las repeticiones"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la combinación de notas")
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'Filas UF1':>12}{'DictReader (s)':>16}{'Columnar (s)':>14}{'Aceleración':>13}  Resultado")
+    print("-" * 70)
+    for filas in args.filas:
+        with tempfile.TemporaryDirectory() as directorio:
+            ficheros = generar_ficheros(filas, directorio)
+            columnas = columnas_salida(ficheros)
+            salida_dict = os.path.join(directorio, 'dictreader.csv')
+            salida_columnar = os.path.join(directorio, 'columnar.csv')
+
+            t_dict = medir(lambda: combinar_en_memoria(ficheros, salida_dict, columnas), args.repeticiones)
+            t_columnar = medir(lambda: combinar_columnar(ficheros, salida_columnar, columnas), args.repeticiones)
+            iguales = filecmp.cmp(salida_dict, salida_columnar, shallow=False)
+
+        print(f"{filas:>12,}{t_dict:>16.3f}{t_columnar:>14.3f}{t_dict / t_columnar:>12.1f}x  "
+              f"{'idéntico' if iguales else 'DIFERENTE'}")
+
+
+if __name__ == "__main__":
+    main()
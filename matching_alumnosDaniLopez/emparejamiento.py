@@ -0,0 +1,224 @@
+"""
+Emparejamiento aproximado de alumnos sin Id común
+Tras combinar las notas, un alumno con el Id mal escrito en una unidad queda
+partido en dos filas con notas complementarias. Esta etapa las reúne por
+Nombre + Apellido: agrupa las filas por claves de bloqueo (fonética y prefijos)
+y solo compara pares dentro de cada bloque, evitando las comparaciones O(n²)
+"""
+
+import csv
+import difflib
+import os
+import re
+import unicodedata
+from collections import defaultdict
+
+try:
+    from rapidfuzz.distance import Levenshtein
+    RAPIDFUZZ_DISPONIBLE = True
+except ImportError:
+    RAPIDFUZZ_DISPONIBLE = False
+
+
+UMBRAL_POR_DEFECTO = 0.85
+# Si otro candidato queda a menos de este margen, la pareja se considera ambigua
+MARGEN_AMBIGUEDAD = 0.02
+FICHERO_INFORME = 'informe_emparejamiento.csv'
+
+# Peso del apellido y del nombre en la puntuación final
+PESO_APELLIDO = 0.6
+PESO_NOMBRE = 0.4
+
+# Sustituciones para que grafías que suenan igual en castellano compartan clave
+REGLAS_FONETICAS = [
+    (re.compile(r'ch'), 'x'),
+    (re.compile(r'qu'), 'k'),
+    (re.compile(r'g(?=[ei])'), 'j'),
+    (re.compile(r'gu(?=[ei])'), 'g'),
+    (re.compile(r'c(?=[ei])'), 's'),
+    (re.compile(r'z'), 's'),
+    (re.compile(r'c'), 'k'),
+    (re.compile(r'll'), 'y'),
+    (re.compile(r'[vw]'), 'b'),
+    (re.compile(r'h'), ''),
+]
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes ni caracteres que no sean letras"""
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r'[^a-z]+', '', texto.lower())
+
+
+def clave_fonetica(texto):
+    """Esqueleto fonético: primera letra y consonantes tras aplicar REGLAS_FONETICAS"""
+    texto = normalizar(texto)
+    for patron, sustitucion in REGLAS_FONETICAS:
+        texto = patron.sub(sustitucion, texto)
+    esqueleto = texto[:1] + re.sub(r'[aeiouy]', '', texto[1:])
+    return re.sub(r'(.)\1+', r'\1', esqueleto)
+
+
+def claves_bloqueo(nombre, apellido):
+    """Claves que comparten dos escrituras de un mismo alumno con un error en uno de los campos"""
+    nombre_n, apellido_n = normalizar(nombre), normalizar(apellido)
+    return [
+        f"f:{clave_fonetica(apellido)}|{nombre_n[:1]}",
+        f"p:{apellido_n[:3]}|{nombre_n[:2]}",
+        f"n:{clave_fonetica(nombre)}|{apellido_n[:1]}",
+    ]
+
+
+def similitud(a, b):
+    """Similitud entre 0 y 1 de dos textos normalizados"""
+    if RAPIDFUZZ_DISPONIBLE:
+        return Levenshtein.normalized_similarity(a, b)
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def puntuar(nombre_a, apellido_a, nombre_b, apellido_b):
+    """Puntuación ponderada de dos alumnos con los nombres ya normalizados"""
+    return PESO_APELLIDO * similitud(apellido_a, apellido_b) + PESO_NOMBRE * similitud(nombre_a, nombre_b)
+
+
+def _unidades_con_nota(fila):
+    return frozenset(i for i, nota in enumerate(fila[3:]) if nota != '')
+
+
+def buscar_parejas(candidatas, umbral=UMBRAL_POR_DEFECTO, max_bloque=200):
+    """
+    Empareja filas incompletas con notas complementarias.
+    Args:
+        candidatas: Diccionario {posición en el fichero: fila}
+        umbral: Puntuación mínima para aceptar una pareja
+        max_bloque: Los bloques más grandes se ignoran (claves poco selectivas)
+    Returns:
+        (parejas [(pos_a, pos_b, puntuacion)], ambiguas [(pos_a, pos_b, puntuacion)],
+         mejor candidato por fila {pos: (pos, puntuacion)}, comparaciones realizadas)
+    """
+    bloques = defaultdict(list)
+    normalizados = {}
+    for posicion, fila in candidatas.items():
+        normalizados[posicion] = (normalizar(fila[1]), normalizar(fila[2]))
+        if not any(normalizados[posicion]):
+            continue
+        for clave in claves_bloqueo(fila[1], fila[2]):
+            bloques[clave].append(posicion)
+
+    unidades = {posicion: _unidades_con_nota(fila) for posicion, fila in candidatas.items()}
+    puntuaciones = {}
+    for miembros in bloques.values():
+        if len(miembros) > max_bloque:
+            continue
+        for i, pos_a in enumerate(miembros):
+            for pos_b in miembros[i + 1:]:
+                par = (min(pos_a, pos_b), max(pos_a, pos_b))
+                # Solo pueden ser el mismo alumno si no tienen notas de la misma unidad
+                if par in puntuaciones or unidades[pos_a] & unidades[pos_b]:
+                    continue
+                puntuaciones[par] = puntuar(*normalizados[pos_a], *normalizados[pos_b])
+
+    # Las dos mejores puntuaciones de cada fila, para detectar empates
+    mejores = defaultdict(list)
+    for (pos_a, pos_b), puntuacion in puntuaciones.items():
+        for origen, destino in ((pos_a, pos_b), (pos_b, pos_a)):
+            mejores[origen] = sorted(mejores[origen] + [(puntuacion, destino)], reverse=True)[:2]
+    mejor_candidato = {posicion: (lista[0][1], lista[0][0]) for posicion, lista in mejores.items()}
+
+    def ambigua(posicion, pareja, puntuacion):
+        return any(otro != pareja and p >= puntuacion - MARGEN_AMBIGUEDAD for p, otro in mejores[posicion])
+
+    # Asignación voraz uno a uno empezando por las parejas más parecidas;
+    # los empates no se fusionan (p. ej. dos alumnos distintos con el mismo nombre)
+    parejas = []
+    ambiguas = []
+    usadas = set()
+    for (pos_a, pos_b), puntuacion in sorted(puntuaciones.items(), key=lambda p: -p[1]):
+        if puntuacion < umbral:
+            break
+        if pos_a in usadas or pos_b in usadas:
+            continue
+        usadas.update((pos_a, pos_b))
+        if ambigua(pos_a, pos_b, puntuacion) or ambigua(pos_b, pos_a, puntuacion):
+            ambiguas.append((pos_a, pos_b, puntuacion))
+        else:
+            parejas.append((pos_a, pos_b, puntuacion))
+    return parejas, ambiguas, mejor_candidato, len(puntuaciones)
+
+
+def fusionar_filas(fila_a, fila_b):
+    """La fila que aparece antes conserva Id y nombre; se completan sus notas vacías"""
+    fila = list(fila_a)
+    if not fila[0].strip():
+        fila[0] = fila_b[0]
+    for i in range(3, len(fila)):
+        if fila[i] == '':
+            fila[i] = fila_b[i]
+    return fila
+
+
+def escribir_informe(ruta, candidatas, parejas, ambiguas, mejor_candidato):
+    """Informe con las parejas fusionadas, las ambiguas (a revisar a mano) y las filas sin pareja"""
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.writer(f, delimiter=';')
+        escritor.writerow(['Estado', 'Puntuacion', 'Id_A', 'Nombre_A', 'Apellido_A',
+                           'Id_B', 'Nombre_B', 'Apellido_B'])
+        revisadas = set()
+        for estado, lista in (('emparejado', parejas), ('ambiguo', ambiguas)):
+            for pos_a, pos_b, puntuacion in lista:
+                revisadas.update((pos_a, pos_b))
+                escritor.writerow([estado, f"{puntuacion:.3f}", *candidatas[pos_a][:3],
+                                   *candidatas[pos_b][:3]])
+        for posicion, fila in candidatas.items():
+            if posicion in revisadas:
+                continue
+            # Sin pareja: se muestra el candidato más parecido, si lo hubo
+            destino, puntuacion = mejor_candidato.get(posicion, (None, None))
+            otra = candidatas[destino][:3] if destino is not None else ['', '', '']
+            escritor.writerow(['sin_pareja', '' if puntuacion is None else f"{puntuacion:.3f}",
+                               *fila[:3], *otra])
+
+
+def emparejar_fichero(fichero, umbral=UMBRAL_POR_DEFECTO, fichero_informe=FICHERO_INFORME):
+    """
+    Reúne en el fichero combinado las filas del mismo alumno con distinto Id.
+    Solo se mantienen en memoria las filas a las que les falta alguna nota.
+    Returns:
+        Número de parejas fusionadas
+    """
+    # --- Primera pasada: filas incompletas ---
+    candidatas = {}
+    with open(fichero, 'r', newline='', encoding='utf-8') as f:
+        lector = csv.reader(f, delimiter=';')
+        cabecera = next(lector)
+        for posicion, fila in enumerate(lector):
+            if '' in fila[3:]:
+                candidatas[posicion] = fila
+
+    parejas, ambiguas, mejor_candidato, comparaciones = buscar_parejas(candidatas, umbral)
+    sustituciones = {pos_a: fusionar_filas(candidatas[pos_a], candidatas[pos_b])
+                     for pos_a, pos_b, _ in parejas}
+    descartadas = {pos_b for _, pos_b, _ in parejas}
+
+    # --- Segunda pasada: reescribir con las filas fusionadas ---
+    temporal = fichero + '.tmp'
+    with open(fichero, 'r', newline='', encoding='utf-8') as entrada, \
+            open(temporal, 'w', newline='', encoding='utf-8') as salida:
+        lector = csv.reader(entrada, delimiter=';')
+        escritor = csv.writer(salida, delimiter=';')
+        escritor.writerow(next(lector))
+        for posicion, fila in enumerate(lector):
+            if posicion in descartadas:
+                continue
+            escritor.writerow(sustituciones.get(posicion, fila))
+    os.replace(temporal, fichero)
+
+    if fichero_informe:
+        escribir_informe(fichero_informe, candidatas, parejas, ambiguas, mejor_candidato)
+
+    n = len(candidatas)
+    print(f"Emparejamiento: {n} filas incompletas, {comparaciones} comparaciones "
+          f"(frente a {n * (n - 1) // 2} sin bloqueo), {len(parejas)} parejas fusionadas, "
+          f"{len(ambiguas)} ambiguas")
+    return len(parejas)
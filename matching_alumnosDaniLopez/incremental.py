@@ -0,0 +1,292 @@
+"""
+Combinación incremental de notas
+Guarda junto al fichero combinado un estado con la huella de cada fichero de
+entrada y, aparte, la de cada una de sus filas. En la siguiente ejecución
+solo se leen los ficheros que han cambiado y se aplican sus diferencias al
+fichero existente, opcionalmente registrando los alumnos modificados
+"""
+
+import csv
+import hashlib
+import itertools
+import json
+import os
+
+from ordenacion_externa import alumno_sin_id
+
+ESTADO_VERSION = 2
+
+
+def ruta_estado_por_defecto(fichero_salida):
+    return os.path.splitext(fichero_salida)[0] + '.estado.json'
+
+
+def _ruta_huellas(ruta_estado, unidad):
+    """Huellas de fila de una unidad: solo se cargan si algún fichero ha cambiado"""
+    return f"{os.path.splitext(ruta_estado)[0]}.huellas{unidad}.json"
+
+
+def huella_fichero(ruta):
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def huella_fila(nombre, apellido, nota):
+    return hashlib.blake2b(f"{nombre}\x1f{apellido}\x1f{nota}".encode('utf-8'), digest_size=6).hexdigest()
+
+
+def leer_unidad(ruta):
+    """
+    {Id: (Nombre, Apellido, Nota)}; si un Id se repite vale la última fila, como en el modo en memoria.
+    Las filas de alumnos sin Id reciben una clave propia que empieza por '\\0'; las filas
+    vacías se quedan con su Id, igual que al combinar
+    """
+    filas = {}
+    with open(ruta, 'r', newline='', encoding='utf-8') as f:
+        lector = csv.reader(f, delimiter=';')
+        cabecera = next(lector, [])
+        columnas = [cabecera.index(c) for c in ('Id', 'Nombre', 'Apellido', 'Nota')]
+        for numero_fila, fila in enumerate(lector):
+            if len(fila) < len(cabecera):
+                fila += [''] * (len(cabecera) - len(fila))
+            id_alumno, nombre, apellido, nota = (fila[i] for i in columnas)
+            if alumno_sin_id(id_alumno, nombre, apellido, nota):
+                id_alumno = f"\0{numero_fila}"
+            filas[id_alumno] = (nombre, apellido, nota)
+    return filas
+
+
+def _descripcion_fichero(ruta):
+    estado = os.stat(ruta)
+    return {'ruta': os.path.abspath(ruta), 'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns}
+
+
+def construir_estado(ficheros, columnas):
+    """
+    Estado completo tras una combinación desde cero.
+    Returns:
+        (estado, huellas de fila por unidad)
+    """
+    estado = {'version': ESTADO_VERSION, 'columnas': columnas, 'ficheros': []}
+    huellas = []
+    for fichero in ficheros:
+        descripcion = _descripcion_fichero(fichero)
+        descripcion['sha256'] = huella_fichero(fichero)
+        estado['ficheros'].append(descripcion)
+        huellas.append({id_alumno: huella_fila(*datos) for id_alumno, datos in leer_unidad(fichero).items()})
+    return estado, huellas
+
+
+def _escribir_json(datos, ruta):
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        # json.dumps usa el codificador en C; json.dump escribiría trozo a trozo
+        f.write(json.dumps(datos, separators=(',', ':')))
+    os.replace(temporal, ruta)
+
+
+def guardar_estado(estado, ruta, huellas=None, unidades=None):
+    """
+    Guarda el estado y las huellas de fila de `unidades` (None = todas las de `huellas`).
+    Las huellas se escriben antes que el estado: si se interrumpe, la siguiente
+    ejecución vuelve a comparar el fichero con las huellas ya guardadas.
+    """
+    if huellas is not None:
+        for unidad in (range(len(huellas)) if unidades is None else unidades):
+            _escribir_json(huellas[unidad], _ruta_huellas(ruta, unidad))
+    _escribir_json(estado, ruta)
+
+
+def cargar_huellas(ruta, num_unidades):
+    huellas = []
+    for unidad in range(num_unidades):
+        with open(_ruta_huellas(ruta, unidad), encoding='utf-8') as f:
+            huellas.append(json.load(f))
+    return huellas
+
+
+def cargar_estado(ruta, ficheros, columnas):
+    """Estado anterior o None si no existe o no corresponde a estos ficheros"""
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            estado = json.load(f)
+    except (OSError, ValueError):
+        return None
+    rutas = [os.path.abspath(f) for f in ficheros]
+    if (estado.get('version') != ESTADO_VERSION or estado.get('columnas') != columnas
+            or [d['ruta'] for d in estado.get('ficheros', [])] != rutas
+            or not all(os.path.exists(_ruta_huellas(ruta, u)) for u in range(len(ficheros)))):
+        return None
+    return estado
+
+
+def _origen(filas_por_unidad, id_alumno):
+    """Primera unidad que contiene al alumno (de ella se toma el nombre)"""
+    return next((unidad for unidad, filas in enumerate(filas_por_unidad) if id_alumno in filas), None)
+
+
+def detectar_cambios(ficheros, estado, ruta):
+    """
+    Compara los ficheros con el estado guardado en `ruta`. Un fichero con el
+    mismo tamaño y fecha no se lee; si cambia la fecha se compara su hash.
+    Returns:
+        (unidades modificadas {unidad: filas leídas}, huellas de fila anteriores y nuevas
+         por unidad (None si nada ha cambiado), Ids afectados). Los Ids afectados son
+        None si una unidad modificada tiene alumnos sin Id: no se pueden seguir entre
+        ejecuciones y hay que combinar desde cero
+    """
+    cambiados = []
+    for unidad, fichero in enumerate(ficheros):
+        anterior = estado['ficheros'][unidad]
+        descripcion = _descripcion_fichero(fichero)
+        if (descripcion['tamano'], descripcion['mtime_ns']) == (anterior['tamano'], anterior['mtime_ns']):
+            continue
+        descripcion['sha256'] = huella_fichero(fichero)
+        estado['ficheros'][unidad] = descripcion
+        if descripcion['sha256'] != anterior['sha256']:  # si no, solo ha cambiado la fecha
+            cambiados.append(unidad)
+    if not cambiados:
+        return {}, None, None, set()
+
+    anteriores = cargar_huellas(ruta, len(ficheros))
+    huellas = list(anteriores)
+    modificadas = {}
+    afectados = set()
+    for unidad in cambiados:
+        filas = leer_unidad(ficheros[unidad])
+        nuevas = {id_alumno: huella_fila(*datos) for id_alumno, datos in filas.items()}
+        viejas = anteriores[unidad]
+        if any(id_alumno.startswith('\0') for id_alumno in itertools.chain(nuevas, viejas)):
+            return modificadas, anteriores, huellas, None
+        afectados.update(i for i, h in nuevas.items() if viejas.get(i) != h)
+        afectados.update(i for i in viejas if i not in nuevas)
+        modificadas[unidad] = filas
+        huellas[unidad] = nuevas
+    return modificadas, anteriores, huellas, afectados
+
+
+def _describir(columnas, antes, despues):
+    cambiadas = [i for i in range(1, len(columnas)) if antes[i] != despues[i]]
+    return (', '.join(f"{columnas[i]}={antes[i]}" for i in cambiadas),
+            ', '.join(f"{columnas[i]}={despues[i]}" for i in cambiadas))
+
+
+def aplicar_cambios(ficheros, fichero_salida, columnas, modificadas, anteriores, huellas, afectados,
+                    changelog=None):
+    """
+    Reescribe el fichero combinado aplicando solo los cambios de los Ids afectados.
+    Los alumnos nuevos se añaden al final.
+    Returns:
+        Número de alumnos con cambios
+    """
+
+    # Un alumno borrado de la unidad de la que salía su nombre lo toma ahora de
+    # otra: si esa unidad no ha cambiado, se lee solo para eso
+    leidas = dict(modificadas)
+    for id_alumno in afectados:
+        origen = _origen(huellas, id_alumno)
+        if origen is not None and origen not in leidas and origen != _origen(anteriores, id_alumno):
+            leidas[origen] = leer_unidad(ficheros[origen])
+
+    def fila_nueva(id_alumno, actual):
+        origen = _origen(huellas, id_alumno)
+        if origen is None:
+            return None  # ya no aparece en ninguna unidad
+        fila = list(actual) if actual else [id_alumno, '', ''] + [''] * (len(columnas) - 3)
+        if origen in leidas:
+            fila[1], fila[2] = leidas[origen][id_alumno][:2]
+        for unidad, filas in modificadas.items():
+            fila[3 + unidad] = filas[id_alumno][2] if id_alumno in filas else ''
+        return fila
+
+    pendientes = set(afectados)
+    cambios = []
+    temporal = fichero_salida + '.tmp'
+    try:
+        with open(fichero_salida, 'r', newline='', encoding='utf-8') as entrada, \
+                open(temporal, 'w', newline='', encoding='utf-8') as salida:
+            lector = csv.reader(entrada, delimiter=';')
+            escritor = csv.writer(salida, delimiter=';')
+            escritor.writerow(next(lector))
+            for fila in lector:
+                id_alumno = fila[0]
+                if id_alumno not in pendientes:
+                    escritor.writerow(fila)
+                    continue
+                pendientes.discard(id_alumno)
+                nueva = fila_nueva(id_alumno, fila)
+                if nueva is None:
+                    cambios.append((fila, 'baja', *_describir(columnas, fila, [id_alumno] + [''] * (len(fila) - 1))))
+                    continue
+                if nueva != fila:
+                    cambios.append((nueva, 'modificacion', *_describir(columnas, fila, nueva)))
+                escritor.writerow(nueva)
+
+            # Ids que no estaban en el fichero combinado: altas (orden estable)
+            for id_alumno in sorted(pendientes, key=lambda i: (_origen(huellas, i) or 0, i)):
+                nueva = fila_nueva(id_alumno, None)
+                if nueva is None:
+                    continue
+                vacia = [id_alumno] + [''] * (len(nueva) - 1)
+                cambios.append((nueva, 'alta', *_describir(columnas, vacia, nueva)))
+                escritor.writerow(nueva)
+    except BaseException:
+        os.remove(temporal)
+        raise
+    os.replace(temporal, fichero_salida)
+
+    if changelog:
+        escribir_changelog(changelog, cambios)
+    return len(cambios)
+
+
+def _clave_combinada(fila):
+    # Los alumnos sin Id del fichero combinado se reconocen por el nombre
+    return (fila[0], fila[1], fila[2]) if alumno_sin_id(*fila) else fila[0]
+
+
+def leer_combinado(ruta, columnas):
+    """Filas de un fichero combinado por alumno, o {} si no existe o tiene otras columnas"""
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, 'r', newline='', encoding='utf-8') as f:
+        lector = csv.reader(f, delimiter=';')
+        if next(lector, None) != columnas:
+            return {}
+        return {_clave_combinada(fila): fila for fila in lector}
+
+
+def comparar_combinado(anteriores, ruta, columnas):
+    """
+    Cambios entre las filas de leer_combinado y el fichero combinado en `ruta`,
+    para el changelog cuando se ha combinado desde cero.
+    Returns:
+        Lista de cambios como la que recibe escribir_changelog
+    """
+    pendientes = dict(anteriores)
+    cambios = []
+    with open(ruta, 'r', newline='', encoding='utf-8') as f:
+        lector = csv.reader(f, delimiter=';')
+        next(lector)
+        for fila in lector:
+            anterior = pendientes.pop(_clave_combinada(fila), None)
+            if anterior is None:
+                vacia = [fila[0]] + [''] * (len(fila) - 1)
+                cambios.append((fila, 'alta', *_describir(columnas, vacia, fila)))
+            elif anterior != fila:
+                cambios.append((fila, 'modificacion', *_describir(columnas, anterior, fila)))
+    for fila in pendientes.values():
+        cambios.append((fila, 'baja', *_describir(columnas, fila, [fila[0]] + [''] * (len(fila) - 1))))
+    return cambios
+
+
+def escribir_changelog(ruta, cambios):
+    """CSV con una fila por alumno dado de alta, modificado o dado de baja"""
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.writer(f, delimiter=';')
+        escritor.writerow(['Id', 'Nombre', 'Apellido', 'Cambio', 'Antes', 'Despues'])
+        for fila, tipo, antes, despues in cambios:
+            escritor.writerow([*fila[:3], tipo, antes, despues])
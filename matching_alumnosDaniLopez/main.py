@@ -1,45 +1,181 @@
+"""
+Combina las notas de varias unidades formativas en un único fichero
+Uso: python main.py [notas_alumnos_UF1.csv notas_alumnos_UF2.csv ...] [-o notas_alumnos.csv]
+                    [--modo auto|memoria|columnar|externo] [--tamano-bloque 200000]
+                    [--emparejar [--umbral 0.85] [--informe informe_emparejamiento.csv]]
+                    [--incremental [--estado notas_alumnos.estado.json] [--changelog cambios.csv]]
+"""
+
+import argparse
 import csv
+import importlib.util
+import os
+import re
+
+from emparejamiento import UMBRAL_POR_DEFECTO, FICHERO_INFORME, emparejar_fichero
+from incremental import (aplicar_cambios, cargar_estado, comparar_combinado, construir_estado,
+                         detectar_cambios, escribir_changelog, guardar_estado, leer_combinado,
+                         ruta_estado_por_defecto)
+from ordenacion_externa import alumno_sin_id, combinar_externo
 
 # Archivos de entrada
-fichero_uf1 = 'notas_alumnos_UF1.csv'
-fichero_uf2 = 'notas_alumnos_UF2.csv'
-fichero_salida = 'notas_alumnos.csv'
-
-# --- Leer las notas de UF1 ---
-notas_uf1 = {}
-with open(fichero_uf1, 'r', encoding='utf-8') as f1:
-    lector1 = csv.DictReader(f1, delimiter=';')
-    for fila in lector1:
-        notas_uf1[fila['Id']] = {
-            'Nombre': fila['Nombre'],
-            'Apellido': fila['Apellido'],
-            'Nota_UF1': fila['Nota']
-        }
-
-# --- Leer las notas de UF2 y combinar ---
-with open(fichero_uf2, 'r', encoding='utf-8') as f2:
-    lector2 = csv.DictReader(f2, delimiter=';')
-    for fila in lector2:
-        id_alumno = fila['Id']
-        if id_alumno in notas_uf1:
-            notas_uf1[id_alumno]['Nota_UF2'] = fila['Nota']
+FICHEROS_ENTRADA = ['notas_alumnos_UF1.csv', 'notas_alumnos_UF2.csv']
+FICHERO_SALIDA = 'notas_alumnos.csv'
+
+# Tamaños totales a partir de los que el modo auto usa la ingesta columnar
+# (si pandas está instalado) y la fusión externa
+UMBRAL_COLUMNAR = 4 * 1024 * 1024
+UMBRAL_EXTERNO = 64 * 1024 * 1024
+
+PANDAS_DISPONIBLE = importlib.util.find_spec('pandas') is not None
+
+
+def nombre_unidad(fichero):
+    """'notas_alumnos_UF3.csv' -> 'UF3' (o el nombre del fichero si no sigue ese patrón)"""
+    base = os.path.splitext(os.path.basename(fichero))[0]
+    encontrada = re.search(r'UF\d+$', base, re.IGNORECASE)
+    return encontrada.group(0).upper() if encontrada else base
+
+
+def columnas_salida(ficheros):
+    return ['Id', 'Nombre', 'Apellido'] + [f"Nota_{nombre_unidad(f)}" for f in ficheros]
+
+
+def combinar_en_memoria(ficheros, fichero_salida, columnas):
+    """
+    Combina los ficheros con un diccionario por Id, en el orden en que aparecen
+    los alumnos. Adecuado para grupos pequeños.
+    Cada fila sin Id es un alumno distinto: no hay clave con la que juntarlas,
+    y es la etapa de emparejamiento la que decide por nombre si son el mismo.
+    Las filas vacías sí se agrupan por su Id, como las demás.
+    Returns:
+        Número de alumnos escritos
+    """
+    notas = {}
+    origen = {}  # Id -> fichero del que se ha tomado el nombre
+
+    # --- Leer las notas de cada unidad y combinar ---
+    for unidad, (fichero, columna) in enumerate(zip(ficheros, columnas[3:])):
+        with open(fichero, 'r', newline='', encoding='utf-8') as f:
+            for numero_fila, fila in enumerate(csv.DictReader(f, delimiter=';')):
+                id_alumno = fila['Id']
+                if alumno_sin_id(id_alumno, fila['Nombre'], fila['Apellido'], fila['Nota']):
+                    clave = ('', unidad, numero_fila)
+                else:
+                    clave = id_alumno
+                if clave not in notas:
+                    notas[clave] = {'Id': id_alumno}
+                    origen[clave] = unidad
+                if origen[clave] == unidad:
+                    notas[clave]['Nombre'] = fila['Nombre']
+                    notas[clave]['Apellido'] = fila['Apellido']
+                notas[clave][columna] = fila['Nota']
+
+    # --- Escribir el fichero combinado ---
+    with open(fichero_salida, 'w', newline='', encoding='utf-8') as salida:
+        escritor = csv.DictWriter(salida, fieldnames=columnas, delimiter=';')
+        escritor.writeheader()
+
+        for datos in notas.values():
+            escritor.writerow(datos)
+
+    return len(notas)
+
+
+def combinar(ficheros, fichero_salida=FICHERO_SALIDA, modo='auto', tamano_bloque=200_000):
+    """
+    Combina las notas de N unidades en un fichero con una columna por unidad.
+    Args:
+        modo: 'memoria', 'columnar' (pandas/pyarrow, mismo resultado que en memoria),
+              'externo' (sort-merge con memoria acotada, salida ordenada por Id)
+              o 'auto' (según el tamaño de los ficheros)
+    Returns:
+        Número de alumnos escritos
+    """
+    columnas = columnas_salida(ficheros)
+    if modo == 'auto':
+        tamano = sum(os.path.getsize(f) for f in ficheros)
+        if tamano > UMBRAL_EXTERNO:
+            modo = 'externo'
+        elif tamano > UMBRAL_COLUMNAR and PANDAS_DISPONIBLE:
+            modo = 'columnar'
+        else:
+            modo = 'memoria'
+
+    if modo == 'externo':
+        return combinar_externo(ficheros, fichero_salida, columnas, tamano_bloque)
+    if modo == 'columnar':
+        from ingesta_rapida import combinar_columnar
+        return combinar_columnar(ficheros, fichero_salida, columnas)
+    return combinar_en_memoria(ficheros, fichero_salida, columnas)
+
+
+def combinar_incremental(ficheros, fichero_salida=FICHERO_SALIDA, modo='auto', tamano_bloque=200_000,
+                         ruta_estado=None, changelog=None):
+    """
+    Actualiza el fichero combinado aplicando solo los cambios desde la última ejecución.
+    Sin estado válido (primera ejecución, otros ficheros de entrada...) combina desde cero;
+    en ese caso el changelog compara el fichero nuevo con el anterior, si lo había.
+    Returns:
+        Número de alumnos con cambios, o None si se ha combinado desde cero
+    """
+    columnas = columnas_salida(ficheros)
+    ruta_estado = ruta_estado or ruta_estado_por_defecto(fichero_salida)
+    estado = cargar_estado(ruta_estado, ficheros, columnas) if os.path.exists(fichero_salida) else None
+
+    if estado is not None:
+        modificadas, anteriores, huellas, afectados = detectar_cambios(ficheros, estado, ruta_estado)
+    if estado is not None and afectados is not None:
+        cambios = 0
+        if afectados:
+            cambios = aplicar_cambios(ficheros, fichero_salida, columnas, modificadas, anteriores,
+                                      huellas, afectados, changelog)
+        elif changelog:
+            escribir_changelog(changelog, [])
+        guardar_estado(estado, ruta_estado, huellas, modificadas)
+        return cambios
+
+    anteriores = leer_combinado(fichero_salida, columnas) if changelog else None
+    combinar(ficheros, fichero_salida, modo, tamano_bloque)
+    if changelog:
+        escribir_changelog(changelog, comparar_combinado(anteriores, fichero_salida, columnas))
+    estado, huellas = construir_estado(ficheros, columnas)
+    guardar_estado(estado, ruta_estado, huellas)
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Combina las notas de varias unidades formativas")
+    parser.add_argument('ficheros', nargs='*', default=FICHEROS_ENTRADA,
+                        help="Ficheros de notas (Id;Nombre;Apellido;Nota), uno por unidad")
+    parser.add_argument('-o', '--salida', default=FICHERO_SALIDA)
+    parser.add_argument('--modo', choices=['auto', 'memoria', 'columnar', 'externo'], default='auto')
+    parser.add_argument('--tamano-bloque', type=int, default=200_000,
+                        help="Filas ordenadas en memoria por tramo en el modo externo")
+    parser.add_argument('--emparejar', action='store_true',
+                        help="Reúne por Nombre + Apellido los alumnos con Id distinto en cada unidad")
+    parser.add_argument('--umbral', type=float, default=UMBRAL_POR_DEFECTO,
+                        help="Puntuación mínima (0-1) para emparejar dos filas")
+    parser.add_argument('--informe', default=FICHERO_INFORME,
+                        help="Informe CSV de filas emparejadas y sin pareja")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Aplica solo los cambios desde la última ejecución")
+    parser.add_argument('--estado', help="Fichero de estado del modo incremental "
+                                         "(por defecto <salida>.estado.json)")
+    parser.add_argument('--changelog', help="CSV con los alumnos modificados en el modo incremental")
+    args = parser.parse_args()
+
+    if args.incremental:
+        if args.emparejar:
+            parser.error("--incremental no se puede combinar con --emparejar")
+        cambios = combinar_incremental(args.ficheros, args.salida, args.modo, args.tamano_bloque,
+                                       args.estado, args.changelog)
+        if cambios is None:
+            print(f"Archivo '{args.salida}' generado desde cero y estado guardado.")
         else:
-            notas_uf1[id_alumno] = {
-                'Nombre': fila['Nombre'],
-                'Apellido': fila['Apellido'],
-                'Nota_UF1': '',
-                'Nota_UF2': fila['Nota']
-            }
-
-# --- Escribir el fichero combinado ---
-with open(fichero_salida, 'w', newline='', encoding='utf-8') as salida:
-    campos = ['Id', 'Nombre', 'Apellido', 'Nota_UF1', 'Nota_UF2']
-    escritor = csv.DictWriter(salida, fieldnames=campos, delimiter=';')
-    escritor.writeheader()
-
-    for id_alumno, datos in notas_uf1.items():
-        fila = {'Id': id_alumno}
-        fila.update(datos)
-        escritor.writerow(fila)
-
-print(f"Archivo '{fichero_salida}' generado correctamente.")
+            print(f"Archivo '{args.salida}' actualizado ({cambios} alumnos con cambios).")
+    else:
+        alumnos = combinar(args.ficheros, args.salida, args.modo, args.tamano_bloque)
+        if args.emparejar:
+            alumnos -= emparejar_fichero(args.salida, args.umbral, args.informe)
+        print(f"Archivo '{args.salida}' generado correctamente ({alumnos} alumnos).")
@@ -0,0 +1,148 @@
+"""
+Fusión externa (sort-merge) de ficheros de notas
+Ordena cada fichero por Id en bloques que se vuelcan a disco y los combina
+con una mezcla de k vías, de modo que la memoria depende del tamaño del
+bloque y no del número de alumnos
+"""
+
+import csv
+import heapq
+import itertools
+import os
+import shutil
+import tempfile
+
+
+def clave_id(id_alumno):
+    """Orden numérico para los Id numéricos y alfabético para el resto"""
+    texto = id_alumno.strip()
+    return (0, int(texto), id_alumno) if texto.isdigit() else (1, 0, id_alumno)
+
+
+def alumno_sin_id(id_alumno, *datos):
+    """
+    True si la fila no tiene Id pero sí algún dato (Nombre, Apellido o Nota).
+    Las filas vacías, como la última línea de relleno de los ficheros de notas,
+    no cuentan: se agrupan por su Id como cualquier otra fila
+    """
+    return not id_alumno.strip() and any(dato.strip() for dato in datos)
+
+
+def _clave_registro(registro):
+    # (Id, fichero de origen, posición en el fichero): a igualdad de Id se
+    # respeta el orden de lectura del modo en memoria
+    unidad, secuencia, id_alumno = registro[:3]
+    return clave_id(id_alumno), unidad, secuencia
+
+
+def _clave_alumno(registro):
+    # Las filas sin Id no se agrupan: cada una es un alumno distinto, como en memoria
+    unidad, secuencia, id_alumno = registro[:3]
+    return ('', unidad, secuencia) if alumno_sin_id(*registro[2:]) else id_alumno
+
+
+def _volcar_tramo(registros, directorio, numero):
+    """Ordena un bloque y lo escribe como tramo en disco"""
+    registros.sort(key=_clave_registro)
+    ruta = os.path.join(directorio, f"tramo_{numero:05d}.csv")
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f, delimiter=';').writerows(registros)
+    return ruta
+
+
+def _leer_tramo(ruta):
+    with open(ruta, 'r', newline='', encoding='utf-8') as f:
+        for unidad, secuencia, id_alumno, nombre, apellido, nota in csv.reader(f, delimiter=';'):
+            yield int(unidad), int(secuencia), id_alumno, nombre, apellido, nota
+
+
+def _mezclar(rutas):
+    return heapq.merge(*(_leer_tramo(ruta) for ruta in rutas), key=_clave_registro)
+
+
+def generar_tramos(ficheros, directorio, tamano_bloque):
+    """
+    Lee los ficheros de notas y los vuelca en tramos ordenados de como máximo
+    `tamano_bloque` filas.
+    Returns:
+        Lista de rutas de los tramos
+    """
+    rutas = []
+    bloque = []
+    for unidad, fichero in enumerate(ficheros):
+        with open(fichero, 'r', newline='', encoding='utf-8') as f:
+            lector = csv.reader(f, delimiter=';')
+            cabecera = next(lector, [])
+            columnas = [cabecera.index(c) for c in ('Id', 'Nombre', 'Apellido', 'Nota')]
+            for secuencia, fila in enumerate(lector):
+                if len(fila) < len(cabecera):
+                    fila += [''] * (len(cabecera) - len(fila))
+                bloque.append((unidad, secuencia, *(fila[i] for i in columnas)))
+                if len(bloque) >= tamano_bloque:
+                    rutas.append(_volcar_tramo(bloque, directorio, len(rutas)))
+                    bloque = []
+    if bloque:
+        rutas.append(_volcar_tramo(bloque, directorio, len(rutas)))
+    return rutas
+
+
+def reducir_tramos(rutas, directorio, max_abiertos):
+    """Mezcla tramos por grupos hasta que quedan como mucho `max_abiertos` ficheros"""
+    numero = len(rutas)
+    while len(rutas) > max_abiertos:
+        nuevas = []
+        for inicio in range(0, len(rutas), max_abiertos):
+            grupo = rutas[inicio:inicio + max_abiertos]
+            if len(grupo) == 1:
+                nuevas.append(grupo[0])
+                continue
+            destino = os.path.join(directorio, f"tramo_{numero:05d}.csv")
+            numero += 1
+            with open(destino, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f, delimiter=';').writerows(_mezclar(grupo))
+            for ruta in grupo:
+                os.remove(ruta)
+            nuevas.append(destino)
+        rutas = nuevas
+    return rutas
+
+
+def combinar_externo(ficheros, fichero_salida, columnas, tamano_bloque=200_000,
+                     max_abiertos=64, directorio_temporal=None):
+    """
+    Combina N ficheros de notas con memoria acotada.
+    Args:
+        ficheros: Ficheros de notas (Id;Nombre;Apellido;Nota), uno por unidad
+        fichero_salida: Fichero combinado, ordenado por Id
+        columnas: Cabecera de salida (Id, Nombre, Apellido y una columna de nota por fichero)
+        tamano_bloque: Filas que se ordenan en memoria antes de volcarlas a disco
+        max_abiertos: Tramos que se mezclan a la vez
+        directorio_temporal: Dónde guardar los tramos (por defecto el temporal del sistema)
+    Returns:
+        Número de alumnos escritos
+    """
+    directorio = tempfile.mkdtemp(prefix='notas_', dir=directorio_temporal)
+    alumnos = 0
+    try:
+        rutas = reducir_tramos(generar_tramos(ficheros, directorio, tamano_bloque),
+                               directorio, max_abiertos)
+
+        with open(fichero_salida, 'w', newline='', encoding='utf-8') as salida:
+            escritor = csv.writer(salida, delimiter=';')
+            escritor.writerow(columnas)
+            for _, registros in itertools.groupby(_mezclar(rutas), key=_clave_alumno):
+                registros = list(registros)
+                fila = [registros[0][2], '', ''] + [''] * len(ficheros)
+                unidad_nombre = None
+                for unidad, _, _, nombre, apellido, nota in registros:
+                    # Como en memoria: el nombre es el del primer fichero en que aparece el alumno
+                    if unidad_nombre is None:
+                        unidad_nombre = unidad
+                    if unidad == unidad_nombre:
+                        fila[1], fila[2] = nombre, apellido
+                    fila[3 + unidad] = nota
+                escritor.writerow(fila)
+                alumnos += 1
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    return alumnos
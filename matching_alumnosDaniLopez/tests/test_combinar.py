@@ -0,0 +1,122 @@
+"""
+Pruebas de regresión de la combinación de notas
+Uso: python -m pytest tests
+"""
+
+import csv
+import filecmp
+import os
+import sys
+
+import pytest
+
+DIRECTORIO_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_PROYECTO)
+
+from emparejamiento import emparejar_fichero
+from ingesta_rapida import combinar_columnar
+from main import columnas_salida, combinar, combinar_en_memoria, combinar_incremental
+
+MODOS = ['memoria', 'columnar', 'externo']
+
+
+def escribir_unidad(ruta, filas):
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.writer(f, delimiter=';')
+        escritor.writerow(['Id', 'Nombre', 'Apellido', 'Nota'])
+        escritor.writerows(filas)
+    return str(ruta)
+
+
+def leer(ruta):
+    with open(ruta, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f, delimiter=';'))[1:]
+
+
+@pytest.fixture
+def sin_id(tmp_path):
+    return [escribir_unidad(tmp_path / 'notas_alumnos_UF1.csv',
+                            [['', 'Luis', 'Perez', '7.5'], ['', 'Marta', 'Lopez', '9.5']]),
+            escribir_unidad(tmp_path / 'notas_alumnos_UF2.csv',
+                            [['', 'Luis', 'Peres', '6.5'], ['', 'Marta', 'Lopes', '8.25']])]
+
+
+@pytest.mark.parametrize('modo', MODOS)
+def test_filas_sin_id_no_se_combinan_por_id(tmp_path, sin_id, modo):
+    salida = str(tmp_path / 'notas_alumnos.csv')
+    assert combinar(sin_id, salida, modo) == 4
+    assert sorted(leer(salida)) == sorted([['', 'Luis', 'Perez', '7.5', ''], ['', 'Marta', 'Lopez', '9.5', ''],
+                                           ['', 'Luis', 'Peres', '', '6.5'], ['', 'Marta', 'Lopes', '', '8.25']])
+
+
+@pytest.mark.parametrize('modo', MODOS)
+def test_ficheros_incluidos_igual_que_la_salida_de_referencia(tmp_path, modo):
+    # Los dos ficheros terminan con una fila vacía ("\t\t\t";;;) que se agrupa por
+    # su Id: la salida debe seguir siendo la notas_alumnos.csv del repositorio
+    ficheros = [os.path.join(DIRECTORIO_PROYECTO, f'notas_alumnos_UF{n}.csv') for n in (1, 2)]
+    salida = str(tmp_path / 'notas_alumnos.csv')
+    combinar(ficheros, salida, modo)
+    assert filecmp.cmp(salida, os.path.join(DIRECTORIO_PROYECTO, 'notas_alumnos.csv'), shallow=False)
+
+
+@pytest.mark.parametrize('modo', MODOS)
+def test_emparejar_filas_sin_id(tmp_path, sin_id, modo):
+    salida = str(tmp_path / 'notas_alumnos.csv')
+    combinar(sin_id, salida, modo)
+    assert emparejar_fichero(salida, fichero_informe=None) == 2
+    assert sorted(leer(salida)) == [['', 'Luis', 'Perez', '7.5', '6.5'], ['', 'Marta', 'Lopez', '9.5', '8.25']]
+
+
+def test_incremental_con_filas_sin_id_combina_desde_cero(tmp_path, sin_id):
+    salida = str(tmp_path / 'notas_alumnos.csv')
+    assert combinar_incremental(sin_id, salida, 'memoria') is None
+    escribir_unidad(sin_id[1], [['', 'Luis', 'Peres', '6.5'], ['', 'Marta', 'Lopes', '5.5']])
+    assert combinar_incremental(sin_id, salida, 'memoria') is None
+    assert ['', 'Marta', 'Lopes', '', '5.5'] in leer(salida)
+    assert len(leer(salida)) == 4
+
+
+def test_incremental_con_fila_vacia_aplica_cambios(tmp_path):
+    # Como en los ficheros incluidos, cada unidad termina con una fila vacía
+    vacia = ['\t\t\t', '', '', '']
+    ficheros = [escribir_unidad(tmp_path / 'notas_alumnos_UF1.csv', [['1', 'Ana', 'Ruiz', '7.5'], vacia]),
+                escribir_unidad(tmp_path / 'notas_alumnos_UF2.csv', [['1', 'Ana', 'Ruiz', '6.5'], vacia])]
+    salida = str(tmp_path / 'notas_alumnos.csv')
+    assert combinar_incremental(ficheros, salida, 'memoria') is None
+    escribir_unidad(ficheros[1], [['1', 'Ana', 'Ruiz', '8.5'], ['2', 'Eva', 'Gil', '5.5'], vacia])
+    assert combinar_incremental(ficheros, salida, 'memoria') == 2
+
+    esperado = str(tmp_path / 'desde_cero.csv')
+    combinar_en_memoria(ficheros, esperado, columnas_salida(ficheros))
+    assert filecmp.cmp(salida, esperado, shallow=False)
+
+
+def test_changelog_al_combinar_desde_cero(tmp_path, sin_id):
+    salida = str(tmp_path / 'notas_alumnos.csv')
+    changelog = str(tmp_path / 'cambios.csv')
+    assert combinar_incremental(sin_id, salida, 'memoria', changelog=changelog) is None
+    assert sorted(fila[:4] for fila in leer(changelog)) == [['', 'Luis', 'Peres', 'alta'], ['', 'Luis', 'Perez', 'alta'],
+                                                            ['', 'Marta', 'Lopes', 'alta'], ['', 'Marta', 'Lopez', 'alta']]
+
+    escribir_unidad(sin_id[1], [['', 'Luis', 'Peres', '6.5'], ['', 'Marta', 'Lopes', '5.5']])
+    assert combinar_incremental(sin_id, salida, 'memoria', changelog=changelog) is None
+    assert leer(changelog) == [['', 'Marta', 'Lopes', 'modificacion', 'Nota_UF2=8.25', 'Nota_UF2=5.5']]
+
+
+@pytest.mark.parametrize('ids', ['numericos', 'texto'])
+def test_columnar_igual_byte_a_byte_que_memoria(tmp_path, ids):
+    uf1 = [['1', 'Ana', 'Gomez', '10'], ['2', 'Luis', 'Perez', '8.30'], ['3', 'Marta', 'Lopez', 'NP'],
+           ['4', 'Jorge', 'Ruiz; hijo', '6'], ['2', 'Luis', 'Perez', '7.50'], ['5', 'Elena', 'Sanz "La"', '']]
+    uf2 = [['3', 'Marta', 'Lopes', '9.0'], ['6', 'Pablo', 'Navarro', '1e3'], ['1', 'Ana', 'Gómez', ' 5 ']]
+    if ids == 'texto':
+        uf1 += [['', 'Carlos', 'Martin', '4'], ['A7', 'Lucia', 'Iglesias', '5.25']]
+        uf2 += [['', 'Carlos', 'Martín', 'NP'], ['A7', 'Lucia', 'Iglesias', '05']]
+    ficheros = [escribir_unidad(tmp_path / 'notas_alumnos_UF1.csv', uf1),
+                escribir_unidad(tmp_path / 'notas_alumnos_UF2.csv', uf2)]
+    columnas = columnas_salida(ficheros)
+    memoria, columnar = str(tmp_path / 'memoria.csv'), str(tmp_path / 'columnar.csv')
+
+    assert combinar_en_memoria(ficheros, memoria, columnas) == combinar_columnar(ficheros, columnar, columnas)
+    assert filecmp.cmp(memoria, columnar, shallow=False)
+    assert ['2', 'Luis', 'Perez', '7.50', ''] in leer(columnar)
+    assert ['3', 'Marta', 'Lopez', 'NP', '9.0'] in leer(columnar)
@@ -0,0 +1,77 @@
+"""
+Compara la matrícula alumno a alumno con la matrícula por lotes
+Cada modo matricula los mismos N alumnos en un fichero nuevo dentro de un
+directorio temporal y se comprueba que todos acaban con el mismo contenido.
+Uso: python benchmark_matriculas.py [--alumnos 50000] [--lote 1000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dominio.alumno import Alumno
+from servicios.alumnos_matriculados import AlumnosMatriculados
+
+
+def individual(alumnos, args):
+    for alumno in alumnos:
+        AlumnosMatriculados.matricular_alumno(alumno)
+
+
+def lotes_flush(alumnos, args):
+    AlumnosMatriculados.matricular_alumnos(alumnos, args.lote, "flush")
+
+
+def lotes_fsync(alumnos, args):
+    AlumnosMatriculados.matricular_alumnos(alumnos, args.lote, "fsync")
+
+
+MODOS = {
+    'individual': individual,
+    'lotes (flush)': lotes_flush,
+    'lotes (fsync)': lotes_fsync,
+}
+
+
+def medir(funcion, alumnos, args, ruta):
+    AlumnosMatriculados.ruta_archivo = ruta
+    inicio = time.perf_counter()
+    funcion(alumnos, args)
+    segundos = time.perf_counter() - inicio
+    with open(AlumnosMatriculados.ruta_archivo, encoding='utf-8') as f:
+        contenido = f.read()
+    return segundos, contenido
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la matrícula individual frente a por lotes")
+    parser.add_argument('--alumnos', type=int, default=50_000)
+    parser.add_argument('--lote', type=int, default=1000, help="Alumnos por escritura en los modos por lotes")
+    parser.add_argument('--modos', nargs='+', choices=sorted(MODOS), default=list(MODOS))
+    args = parser.parse_args()
+
+    alumnos = [Alumno(f"Alumno {i:06d}") for i in range(args.alumnos)]
+    print(f"Matriculando {args.alumnos} alumnos (lotes de {args.lote})\n")
+    print(f"{'Modo':<16}{'Tiempo (s)':>12}{'Alumnos/s':>14}")
+    print("-" * 42)
+
+    contenidos = set()
+    with tempfile.TemporaryDirectory() as directorio:
+        for indice, nombre in enumerate(args.modos):
+            ruta = os.path.join(directorio, f"modo{indice}.txt")
+            segundos, contenido = medir(MODOS[nombre], alumnos, args, ruta)
+            contenidos.add(contenido)
+            print(f"{nombre:<16}{segundos:>12.3f}{args.alumnos / segundos:>14.0f}")
+
+    if len(contenidos) != 1:
+        print("\n✗ Los modos han generado ficheros distintos")
+        sys.exit(1)
+    print("\n✓ Todos los modos generan el mismo fichero")
+
+
+if __name__ == "__main__":
+    main()
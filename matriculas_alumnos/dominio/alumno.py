@@ -1,7 +1,10 @@
 class Alumno:
     """
     Representa un alumno con un único atributo: nombre.
+    Usa __slots__ para que cada instancia ocupe poco al manejar listas grandes.
     """
+    __slots__ = ("nombre",)
+
     def __init__(self, nombre: str):
         if not isinstance(nombre, str):
             raise TypeError("El nombre debe ser una cadena.")
@@ -0,0 +1,198 @@
+"""
+Prueba de estrés de ServicioMatriculas con varios procesos a la vez
+Fase 1: varios procesos (con varios hilos cada uno) matriculan por lotes sus
+propios alumnos y compiten por matricular los mismos alumnos comunes uno a uno,
+mientras otro proceso toma instantáneas sin parar. Se comprueba que ninguna
+instantánea contiene un lote a medias ni duplicados, y que al final están
+todos los alumnos una sola vez.
+Fase 2: los escritores siguen matriculando mientras otro proceso borra el
+fichero varias veces; lo que queda debe estar formado por lotes completos.
+El borrador se para cuando acaban los escritores y una última ronda de
+escritura debe quedar entera, así que el fichero final nunca está vacío.
+Uso: python estres_matriculas.py [--procesos 4] [--hilos 2] [--lotes 50] [--tamano-lote 200]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dominio.alumno import Alumno
+from servicios.almacen_alumnos import clave_nombre
+from servicios.servicio_matriculas import ServicioMatriculas
+
+
+def nombre_lote(proceso, hilo, lote):
+    return f"P{proceso}-H{hilo}-L{lote}"
+
+
+def escribir(ruta, proceso, hilo, args, comunes):
+    servicio = ServicioMatriculas.para(ruta)
+    with servicio.escritor(tamano_lote=args.tamano_lote) as escritor:
+        for lote in range(args.lotes):
+            for i in range(args.tamano_lote):
+                escritor.anadir(f"{nombre_lote(proceso, hilo, lote)}-{i}")
+            escritor.vaciar()
+            # Los alumnos comunes se matriculan uno a uno desde todos los procesos
+            for i in range(lote * comunes // args.lotes, (lote + 1) * comunes // args.lotes):
+                servicio.matricular(Alumno(f"Comun {i}"))
+
+
+def proceso_escritor(ruta, proceso, args, comunes):
+    hilos = [threading.Thread(target=escribir, args=(ruta, proceso, hilo, args, comunes))
+             for hilo in range(args.hilos)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+
+def errores_lotes(nombres, tamano_lote):
+    """Lotes incompletos o nombres repetidos en una lista de nombres"""
+    errores = []
+    repetidos = [clave for clave, veces in Counter(map(clave_nombre, nombres)).items() if veces > 1]
+    if repetidos:
+        errores.append(f"{len(repetidos)} alumnos repetidos (p. ej. {repetidos[0]})")
+    lotes = Counter(nombre.rsplit('-', 1)[0] for nombre in nombres if not nombre.startswith("Comun"))
+    incompletos = {lote: veces for lote, veces in lotes.items() if veces != tamano_lote}
+    if incompletos:
+        lote, veces = next(iter(incompletos.items()))
+        errores.append(f"{len(incompletos)} lotes incompletos (p. ej. {lote} con {veces} alumnos)")
+    return errores
+
+
+def proceso_lector(ruta, tamano_lote, parar, resultado):
+    servicio = ServicioMatriculas.para(ruta)
+    instantaneas, anterior, errores = 0, 0, []
+    while not parar.is_set() and not errores:
+        nombres = [alumno.nombre for alumno in servicio.instantanea()]
+        instantaneas += 1
+        errores = errores_lotes(nombres, tamano_lote)
+        if len(nombres) < anterior:
+            errores.append(f"la instantánea ha encogido de {anterior} a {len(nombres)} alumnos")
+        anterior = len(nombres)
+    resultado.put((instantaneas, errores))
+
+
+def proceso_borrador(ruta, veces, pausa, parar, hechos):
+    # Solo borra mientras haya escritores: `parar` se activa cuando terminan
+    servicio = ServicioMatriculas.para(ruta)
+    while hechos.value < veces and not parar.is_set():
+        servicio.eliminar()
+        hechos.value += 1
+        parar.wait(pausa)
+
+
+def leer_fichero(ruta):
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, encoding="utf-8") as f:
+        contenido = f.read()
+    if contenido and not contenido.endswith("\n"):
+        raise AssertionError("El fichero termina con una línea a medias")
+    return [linea.strip() for linea in contenido.splitlines() if linea.strip()]
+
+
+def lanzar_escritores(ruta, args, comunes):
+    return [multiprocessing.Process(target=proceso_escritor, args=(ruta, p, args, comunes))
+            for p in range(args.procesos)]
+
+
+def fase_instantaneas(directorio, args):
+    ruta = os.path.join(directorio, "fase1.txt")
+    parar = multiprocessing.Event()
+    resultado = multiprocessing.Queue()
+    lector = multiprocessing.Process(target=proceso_lector, args=(ruta, args.tamano_lote, parar, resultado))
+    escritores = lanzar_escritores(ruta, args, args.comunes)
+
+    lector.start()
+    inicio = time.perf_counter()
+    for proceso in escritores:
+        proceso.start()
+    for proceso in escritores:
+        proceso.join()
+    segundos = time.perf_counter() - inicio
+    parar.set()
+    instantaneas, errores = resultado.get()
+    lector.join()
+
+    nombres = leer_fichero(ruta)
+    esperados = args.procesos * args.hilos * args.lotes * args.tamano_lote + args.comunes
+    errores += errores_lotes(nombres, args.tamano_lote)
+    if len(nombres) != esperados:
+        errores.append(f"el fichero tiene {len(nombres)} alumnos y se esperaban {esperados}")
+    if ServicioMatriculas(ruta).contar() != len(nombres):
+        errores.append("un índice nuevo no coincide con el fichero")
+    if any(code != 0 for code in [lector.exitcode] + [p.exitcode for p in escritores]):
+        errores.append("algún proceso ha terminado con error")
+
+    print(f"Fase 1: {len(nombres)} alumnos en {segundos:.2f}s ({len(nombres) / segundos:,.0f} alumnos/s) "
+          f"con {args.procesos} procesos x {args.hilos} hilos; {instantaneas} instantáneas comprobadas")
+    return errores
+
+
+def fase_borrado(directorio, args):
+    ruta = os.path.join(directorio, "fase2.txt")
+    parar = multiprocessing.Event()
+    hechos = multiprocessing.Value('i', 0)
+    borrador = multiprocessing.Process(target=proceso_borrador,
+                                       args=(ruta, args.borrados, 0.05, parar, hechos))
+    escritores = lanzar_escritores(ruta, args, 0)
+    for proceso in escritores + [borrador]:
+        proceso.start()
+    for proceso in escritores:
+        proceso.join()
+    parar.set()
+    borrador.join()
+
+    # Última ronda sin borrador, con nombres de proceso que no usan los escritores
+    escribir(ruta, args.procesos, 0, args, 0)
+    ultima_ronda = nombre_lote(args.procesos, 0, '')
+
+    nombres = leer_fichero(ruta)
+    errores = errores_lotes(nombres, args.tamano_lote)
+    if not nombres:
+        errores.append("el fichero ha quedado vacío")
+    if sum(nombre.startswith(ultima_ronda) for nombre in nombres) != args.lotes * args.tamano_lote:
+        errores.append("falta parte de la última ronda, escrita después de los borrados")
+    if hechos.value == 0:
+        errores.append("el borrador no ha llegado a borrar mientras se escribía")
+    if ServicioMatriculas(ruta).contar() != len(nombres):
+        errores.append("un índice nuevo no coincide con el fichero")
+    if any(p.exitcode != 0 for p in escritores + [borrador]):
+        errores.append("algún proceso ha terminado con error")
+    print(f"Fase 2: {hechos.value} borrados durante la escritura; quedan {len(nombres)} alumnos "
+          f"en {len(nombres) // args.tamano_lote} lotes completos")
+    return errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de estrés de la matrícula con varios procesos")
+    parser.add_argument('--procesos', type=int, default=4)
+    parser.add_argument('--hilos', type=int, default=2, help="Hilos escritores por proceso")
+    parser.add_argument('--lotes', type=int, default=50, help="Lotes por hilo")
+    parser.add_argument('--tamano-lote', type=int, default=200)
+    parser.add_argument('--comunes', type=int, default=500,
+                        help="Alumnos que todos los procesos intentan matricular")
+    parser.add_argument('--borrados', type=int, default=5, help="Borrados del fichero en la fase 2")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        errores = fase_instantaneas(directorio, args) + fase_borrado(directorio, args)
+
+    if errores:
+        print("\n✗ Errores encontrados:")
+        for error in errores:
+            print(f"  - {error}")
+        sys.exit(1)
+    print("\n✓ Sin lotes a medias, duplicados ni líneas perdidas")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
 from .alumnos_matriculados import AlumnosMatriculados
+from .almacen_alumnos import AlmacenAlumnos, EscritorAlumnos
+from .servicio_matriculas import ServicioMatriculas
 
-__all__ = ["AlumnosMatriculados"]
+__all__ = ["AlumnosMatriculados", "AlmacenAlumnos", "EscritorAlumnos", "ServicioMatriculas"]
@@ -0,0 +1,344 @@
+import os
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from servicios.bloqueo import BloqueoFichero, generacion
+
+# "flush": cada lote se entrega al sistema operativo al escribirse
+# "fsync": además se espera a que llegue al disco (sobrevive a un corte de luz)
+DURABILIDADES = ("flush", "fsync")
+
+
+def clave_nombre(nombre: str) -> str:
+    """
+    Clave con la que se comparan los nombres: sin espacios sobrantes y sin
+    distinguir mayúsculas, de modo que "Ana  García" y "ana garcía" son el mismo alumno.
+    """
+    return " ".join(nombre.split()).casefold()
+
+
+class AlmacenAlumnos:
+    """
+    Fichero de alumnos de solo añadido (una línea por alumno) con un índice
+    hash en memoria para consultar si un nombre existe en O(1).
+    El índice se construye la primera vez que se consulta y después solo lee
+    las líneas añadidas al final del fichero desde la última consulta; si el
+    fichero se ha reemplazado, recortado o borrado, se reconstruye entero.
+    Los nombres repetidos en el fichero aparecen una sola vez (cuenta el primero).
+    Es seguro usarlo desde varios hilos, y desde varios procesos a la vez
+    gracias al bloqueo de fichero que toman las escrituras.
+    """
+
+    def __init__(self, ruta_archivo: str):
+        self.ruta_archivo = ruta_archivo
+        self._mutex = threading.RLock()        # protege el índice entre hilos
+        self._nombres: List[str] = []          # en orden de matrícula, sin duplicados
+        self._posiciones: Dict[str, int] = {}  # clave -> índice en _nombres
+        self._lineas = 0                       # líneas no vacías leídas (con duplicados)
+        self._desplazamiento = 0               # bytes del fichero ya indexados
+        self._inodo: Optional[Tuple[int, int]] = None  # (inodo, generación) del fichero indexado
+        self._firma: Optional[Tuple[int, int, int, int]] = None  # (inodo, generación, tamaño, mtime)
+        self._ordenados: List[Tuple[str, int]] = []  # (clave, índice) para buscar por prefijo
+
+    def _reiniciar(self) -> None:
+        self._nombres = []
+        self._posiciones = {}
+        self._ordenados = []
+        self._lineas = 0
+        self._desplazamiento = 0
+        self._inodo = None
+        self._firma = None
+
+    def _indexar(self, nombre: str) -> None:
+        self._lineas += 1
+        clave = clave_nombre(nombre)
+        if clave not in self._posiciones:
+            self._posiciones[clave] = len(self._nombres)
+            self._nombres.append(nombre)
+
+    def _firma_actual(self) -> Optional[Tuple[int, int, int, int]]:
+        try:
+            actual = generacion(self.ruta_archivo)
+            estado = os.stat(self.ruta_archivo)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            raise RuntimeError(f"No se pudo leer el archivo: {e}")
+        return estado.st_ino, actual, estado.st_size, estado.st_mtime_ns
+
+    def sincronizar(self) -> None:
+        """
+        Pone el índice al día con el fichero. Si no ha cambiado solo cuesta dos stat;
+        si ha cambiado, lo nuevo se lee con el bloqueo compartido, de modo que nunca
+        se ve un lote a medio escribir por otro proceso.
+        """
+        with self._mutex:
+            firma = self._firma_actual()
+            if firma is None:
+                self._reiniciar()
+            elif firma != self._firma:
+                with BloqueoFichero(self.ruta_archivo, compartido=True):
+                    self._leer_cambios()
+
+    def _leer_cambios(self) -> None:
+        """
+        Indexa lo añadido al fichero desde la última lectura. Hay que llamarlo con
+        el fichero bloqueado. La generación del bloqueo cambia cada vez que el
+        fichero se borra o se reescribe, así que un fichero nuevo nunca se toma
+        por el anterior aunque el sistema reutilice su inodo.
+        """
+        firma = self._firma_actual()
+        if firma is None:
+            self._reiniciar()
+            return
+        if firma == self._firma:
+            return
+        if firma[:2] != self._inodo or firma[2] < self._desplazamiento:
+            self._reiniciar()
+
+        try:
+            with open(self.ruta_archivo, "rb") as f:
+                f.seek(self._desplazamiento)
+                datos = f.read()
+        except OSError as e:
+            raise RuntimeError(f"No se pudo leer el archivo: {e}")
+
+        # Una última línea sin salto es de un escritor que no terminó: se deja para la próxima
+        completo = datos.rfind(b"\n") + 1
+        for linea in datos[:completo].decode("utf-8").splitlines():
+            nombre = linea.strip()
+            if nombre:  # ignorar líneas vacías
+                self._indexar(nombre)
+        self._desplazamiento += completo
+        self._inodo = firma[:2]
+        self._firma = firma if completo == len(datos) else None
+
+    def existe(self, nombre: str) -> bool:
+        with self._mutex:
+            self.sincronizar()
+            return clave_nombre(nombre) in self._posiciones
+
+    def anadir(self, nombre: str) -> bool:
+        """
+        Añade el nombre al final del fichero si no estaba ya.
+        Devuelve True si se añadió y False si era un duplicado.
+        """
+        if self.existe(nombre):
+            return False
+        return self._escribir_lote([nombre]) == 1
+
+    def anadir_varios(self, nombres: Iterable[str], tamano_lote: int = 1000,
+                      durabilidad: str = "flush") -> int:
+        """
+        Añade muchos nombres escribiendo por lotes. Devuelve cuántos eran nuevos.
+        """
+        with self.escritor(tamano_lote, durabilidad) as escritor:
+            for nombre in nombres:
+                escritor.anadir(nombre)
+        return escritor.escritos
+
+    def escritor(self, tamano_lote: int = 1000, durabilidad: str = "flush") -> "EscritorAlumnos":
+        return EscritorAlumnos(self, tamano_lote, durabilidad)
+
+    def _escribir_lote(self, nombres: List[str], fsync: bool = False) -> int:
+        """
+        Escribe de una vez los nombres que aún no están en el fichero.
+        Se hace con el fichero bloqueado y tras leer lo que hayan añadido otros
+        procesos, así que dos escritores a la vez no duplican ni mezclan líneas.
+        Devuelve cuántos nombres se escribieron.
+        """
+        with self._mutex, BloqueoFichero(self.ruta_archivo):
+            self._leer_cambios()
+            nuevos = []
+            claves = set()
+            for nombre in nombres:
+                clave = clave_nombre(nombre)
+                if clave not in self._posiciones and clave not in claves:
+                    claves.add(clave)
+                    nuevos.append(nombre)
+            if not nuevos:
+                return 0
+
+            try:
+                with open(self.ruta_archivo, "ab") as f:
+                    fragmento = f.seek(0, os.SEEK_END) != self._desplazamiento
+                    # Una línea sin terminar de otro escritor se cierra para no pegarse a la nuestra
+                    datos = "".join(f"{nombre}{os.linesep}" for nombre in nuevos)
+                    f.write(((os.linesep if fragmento else "") + datos).encode("utf-8"))
+                    f.flush()
+                    if fsync:
+                        os.fsync(f.fileno())
+                    estado = os.fstat(f.fileno())
+            except OSError as e:
+                raise RuntimeError(f"No se pudo escribir en el archivo: {e}")
+
+            if fragmento:
+                self._leer_cambios()
+            else:
+                # Lo recién escrito se indexa sin volver a leerlo
+                for nombre in nuevos:
+                    self._indexar(nombre)
+                self._desplazamiento = estado.st_size
+                self._inodo = (estado.st_ino, generacion(self.ruta_archivo))
+                self._firma = (*self._inodo, estado.st_size, estado.st_mtime_ns)
+        return len(nuevos)
+
+    def contar(self) -> int:
+        with self._mutex:
+            self.sincronizar()
+            return len(self._nombres)
+
+    def listar(self, pagina: int = 1, tamano_pagina: Optional[int] = None) -> List[str]:
+        """
+        Nombres sin duplicados en orden de matrícula. Con tamano_pagina se
+        devuelve solo esa página (la primera es la 1).
+        """
+        if tamano_pagina is not None and (pagina < 1 or tamano_pagina < 1):
+            raise ValueError("La página y su tamaño deben ser mayores que cero.")
+        with self._mutex:
+            self.sincronizar()
+            if tamano_pagina is None:
+                return list(self._nombres)
+            inicio = (pagina - 1) * tamano_pagina
+            return self._nombres[inicio:inicio + tamano_pagina]
+
+    def instantanea(self) -> Tuple[str, ...]:
+        """
+        Copia inmutable de los nombres matriculados en este momento. Como toda
+        lectura del fichero se hace con el bloqueo compartido, nunca incluye un
+        lote a medio escribir por otro proceso.
+        """
+        with self._mutex:
+            self.sincronizar()
+            return tuple(self._nombres)
+
+    def iterar(self) -> Iterator[str]:
+        """
+        Recorre los nombres en orden de matrícula sin copiarlos.
+        Se ven los alumnos que había al empezar a recorrer aunque entre tanto se matriculen más.
+        """
+        with self._mutex:
+            self.sincronizar()
+            nombres, total = self._nombres, len(self._nombres)
+        for indice in range(total):
+            yield nombres[indice]
+
+    def buscar_prefijo(self, prefijo: str) -> Iterator[str]:
+        """
+        Nombres que empiezan por el prefijo (sin distinguir mayúsculas), en orden alfabético.
+        Usa una lista de claves ordenada que solo se completa con los alumnos nuevos.
+        """
+        with self._mutex:
+            self.sincronizar()
+            if len(self._ordenados) < len(self._nombres):
+                nuevos = [(clave_nombre(self._nombres[indice]), indice)
+                          for indice in range(len(self._ordenados), len(self._nombres))]
+                # Dos tramos ya ordenados: sorted los mezcla en tiempo lineal
+                self._ordenados = sorted(self._ordenados + sorted(nuevos))
+            nombres, ordenados = self._nombres, self._ordenados
+        prefijo = clave_nombre(prefijo)
+        for posicion in range(bisect_left(ordenados, (prefijo,)), len(ordenados)):
+            clave, indice = ordenados[posicion]
+            if not clave.startswith(prefijo):
+                break
+            yield nombres[indice]
+
+    def duplicados(self) -> int:
+        """Líneas del fichero que repiten un alumno ya matriculado"""
+        with self._mutex:
+            self.sincronizar()
+            return self._lineas - len(self._nombres)
+
+    def compactar(self) -> int:
+        """
+        Reescribe el fichero sin líneas duplicadas ni vacías y devuelve cuántas
+        se han quitado. El fichero nuevo sustituye al anterior de forma atómica.
+        """
+        with self._mutex, BloqueoFichero(self.ruta_archivo) as bloqueo:
+            self._leer_cambios()
+            quitados = self._lineas - len(self._nombres)
+            if not quitados:
+                return 0
+            temporal = self.ruta_archivo + ".tmp"
+            try:
+                with open(temporal, "w", encoding="utf-8") as f:
+                    f.writelines(f"{nombre}\n" for nombre in self._nombres)
+                bloqueo.nueva_generacion()
+                os.replace(temporal, self.ruta_archivo)
+            except OSError as e:
+                raise RuntimeError(f"No se pudo reescribir el archivo: {e}")
+            self._reiniciar()
+        return quitados
+
+    def eliminar(self) -> bool:
+        """
+        Borra el fichero esperando a que terminen las escrituras en curso.
+        Devuelve True si se eliminó y False si no existía.
+        """
+        with self._mutex, BloqueoFichero(self.ruta_archivo) as bloqueo:
+            if not os.path.exists(self.ruta_archivo):
+                return False
+            try:
+                bloqueo.nueva_generacion()
+                os.remove(self.ruta_archivo)
+            except OSError as e:
+                raise RuntimeError(f"No se pudo eliminar el archivo: {e}")
+            self._reiniciar()
+        return True
+
+
+class EscritorAlumnos:
+    """
+    Escritor por lotes para matricular muchos alumnos con pocas llamadas al sistema.
+    Los nombres se acumulan en memoria y se escriben de tamano_lote en tamano_lote
+    (y al salir del bloque with) con el fichero bloqueado entre procesos.
+    Args:
+        almacen: AlmacenAlumnos en el que se escribe
+        tamano_lote: Nombres acumulados antes de escribir
+        durabilidad: "flush" o "fsync" (ver DURABILIDADES)
+    Uso:
+        with almacen.escritor(tamano_lote=5000, durabilidad="fsync") as escritor:
+            for nombre in nombres:
+                escritor.anadir(nombre)
+    """
+
+    def __init__(self, almacen: AlmacenAlumnos, tamano_lote: int = 1000, durabilidad: str = "flush"):
+        if durabilidad not in DURABILIDADES:
+            raise ValueError(f"Durabilidad desconocida: {durabilidad!r} (opciones: {', '.join(DURABILIDADES)}).")
+        if tamano_lote < 1:
+            raise ValueError("El tamaño de lote debe ser mayor que cero.")
+        self.almacen = almacen
+        self.tamano_lote = tamano_lote
+        self.fsync = durabilidad == "fsync"
+        self.escritos = 0    # nombres nuevos escritos
+        self.duplicados = 0  # nombres descartados por estar ya matriculados
+        self._pendientes: List[str] = []
+        self._claves_pendientes = set()
+
+    def anadir(self, nombre: str) -> None:
+        clave = clave_nombre(nombre)
+        if clave in self._claves_pendientes:
+            self.duplicados += 1
+            return
+        self._claves_pendientes.add(clave)
+        self._pendientes.append(nombre)
+        if len(self._pendientes) >= self.tamano_lote:
+            self.vaciar()
+
+    def vaciar(self) -> int:
+        """Escribe los nombres pendientes y devuelve cuántos eran nuevos"""
+        if not self._pendientes:
+            return 0
+        escritos = self.almacen._escribir_lote(self._pendientes, self.fsync)
+        self.escritos += escritos
+        self.duplicados += len(self._pendientes) - escritos
+        self._pendientes = []
+        self._claves_pendientes = set()
+        return escritos
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.vaciar()
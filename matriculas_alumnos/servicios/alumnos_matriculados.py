@@ -1,63 +1,103 @@
-import os
 from dominio.alumno import Alumno
-from typing import List
+from servicios.servicio_matriculas import ServicioMatriculas
+from typing import Callable, Iterable, Iterator, List, Union
 
 class AlumnosMatriculados:
     """
     Clase que gestiona el fichero de alumnos matriculados.
     Todos los métodos son estáticos según el diagrama UML.
+    Cada método delega en el ServicioMatriculas de ruta_archivo, que indexa el
+    fichero en memoria y lo bloquea frente a otros procesos. Para trabajar con
+    varios ficheros a la vez es mejor usar ServicioMatriculas directamente.
     """
     # Ruta por defecto del archivo (en la carpeta del proyecto)
     ruta_archivo: str = "alumnos_matriculados.txt"
 
     @staticmethod
-    def matricular_alumno(alumno: Alumno) -> None:
+    def _servicio() -> ServicioMatriculas:
+        return ServicioMatriculas.para(AlumnosMatriculados.ruta_archivo)
+
+    @staticmethod
+    def matricular_alumno(alumno: Alumno) -> bool:
         """
         Añade el nombre del alumno al archivo (una línea por alumno).
-        Crea el archivo si no existe.
+        Crea el archivo si no existe. Si el alumno ya estaba matriculado no
+        se vuelve a escribir y devuelve False.
+        """
+        return AlumnosMatriculados._servicio().matricular(alumno)
+
+    @staticmethod
+    def matricular_alumnos(alumnos: Iterable[Alumno], tamano_lote: int = 1000,
+                           durabilidad: str = "flush") -> int:
+        """
+        Matricula muchos alumnos escribiendo por lotes en lugar de abrir el
+        archivo una vez por alumno. Los ya matriculados se omiten.
+        durabilidad: "flush" (por defecto) o "fsync" para esperar a que cada lote llegue al disco.
+        Devuelve cuántos alumnos se han matriculado.
+        """
+        return AlumnosMatriculados._servicio().matricular_varios(alumnos, tamano_lote, durabilidad)
+
+    @staticmethod
+    def existe_alumno(alumno: Union[Alumno, str]) -> bool:
+        """
+        Indica si el alumno (o un nombre) ya está matriculado, sin distinguir
+        mayúsculas ni espacios sobrantes.
         """
-        if not isinstance(alumno, Alumno):
-            raise TypeError("Se esperaba un objeto Alumno.")
-        try:
-            with open(AlumnosMatriculados.ruta_archivo, "a", encoding="utf-8") as f:
-                f.write(f"{alumno.nombre}\n")
-        except OSError as e:
-            raise RuntimeError(f"No se pudo escribir en el archivo: {e}")
+        return AlumnosMatriculados._servicio().existe(alumno)
 
     @staticmethod
     def listar_alumnos() -> List[Alumno]:
         """
-        Lee el archivo y devuelve una lista de objetos Alumno.
+        Devuelve una lista de objetos Alumno en orden de matrícula, sin repetidos.
         Si el archivo no existe, devuelve lista vacía.
         """
-        alumnos = []
-        if not os.path.exists(AlumnosMatriculados.ruta_archivo):
-            return alumnos
-
-        try:
-            with open(AlumnosMatriculados.ruta_archivo, "r", encoding="utf-8") as f:
-                for linea in f:
-                    nombre = linea.strip()
-                    if nombre:  # ignorar líneas vacías
-                        try:
-                            alumnos.append(Alumno(nombre))
-                        except ValueError:
-                            # Si hay una línea inválida, la saltamos
-                            continue
-            return alumnos
-        except OSError as e:
-            raise RuntimeError(f"No se pudo leer el archivo: {e}")
+        return list(AlumnosMatriculados._servicio().instantanea())
+
+    @staticmethod
+    def iterar_alumnos() -> Iterator[Alumno]:
+        """
+        Como listar_alumnos pero devuelve los alumnos de uno en uno, sin crear
+        la lista completa: la memoria no crece con el número de alumnos recorridos.
+        """
+        return AlumnosMatriculados._servicio().iterar()
+
+    @staticmethod
+    def filtrar_alumnos(condicion: Callable[[Alumno], bool]) -> Iterator[Alumno]:
+        """
+        Alumnos que cumplen la condición, en orden de matrícula.
+        """
+        return AlumnosMatriculados._servicio().filtrar(condicion)
+
+    @staticmethod
+    def buscar_alumnos(prefijo: str) -> Iterator[Alumno]:
+        """
+        Alumnos cuyo nombre empieza por el prefijo, sin distinguir mayúsculas,
+        en orden alfabético.
+        """
+        return AlumnosMatriculados._servicio().buscar(prefijo)
+
+    @staticmethod
+    def listar_alumnos_paginado(pagina: int = 1, tamano_pagina: int = 20) -> List[Alumno]:
+        """
+        Devuelve solo una página de alumnos (la primera es la 1).
+        """
+        return AlumnosMatriculados._servicio().pagina(pagina, tamano_pagina)
+
+    @staticmethod
+    def contar_alumnos() -> int:
+        return AlumnosMatriculados._servicio().contar()
+
+    @staticmethod
+    def eliminar_duplicados() -> int:
+        """
+        Reescribe el archivo sin alumnos repetidos. Devuelve cuántas líneas se quitaron.
+        """
+        return AlumnosMatriculados._servicio().eliminar_duplicados()
 
     @staticmethod
     def eliminar_alumnos() -> bool:
         """
         Elimina el archivo con los alumnos. Devuelve True si se eliminó, False si no existía.
+        Espera a que terminen las matrículas que otros procesos estén escribiendo.
         """
-        if os.path.exists(AlumnosMatriculados.ruta_archivo):
-            try:
-                os.remove(AlumnosMatriculados.ruta_archivo)
-                return True
-            except OSError as e:
-                raise RuntimeError(f"No se pudo eliminar el archivo: {e}")
-        else:
-            return False
+        return AlumnosMatriculados._servicio().eliminar()
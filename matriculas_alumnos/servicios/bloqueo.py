@@ -0,0 +1,68 @@
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def generacion(ruta_archivo: str) -> int:
+    """
+    Número de veces que el fichero se ha borrado o reescrito entero
+    (ver BloqueoFichero.nueva_generacion). Cuesta un stat.
+    """
+    try:
+        return os.stat(ruta_archivo + ".lock").st_size
+    except FileNotFoundError:
+        return 0
+
+
+class BloqueoFichero:
+    """
+    Bloqueo entre procesos (e hilos) asociado a un fichero.
+    Se bloquea un fichero auxiliar <ruta>.lock y no el de datos, para que el
+    bloqueo siga valiendo aunque el de datos se reemplace o se borre.
+    Con compartido=True varios lectores pueden tenerlo a la vez mientras nadie
+    escribe (en Windows, donde msvcrt no tiene bloqueos compartidos, es exclusivo).
+    Uso: with BloqueoFichero(ruta): ...
+    """
+
+    def __init__(self, ruta_archivo: str, compartido: bool = False):
+        self.ruta_bloqueo = ruta_archivo + ".lock"
+        self.compartido = compartido
+        self._f = None
+
+    def __enter__(self):
+        try:
+            self._f = open(self.ruta_bloqueo, "a+b")
+            if fcntl:
+                fcntl.flock(self._f.fileno(), fcntl.LOCK_SH if self.compartido else fcntl.LOCK_EX)
+            else:
+                self._f.seek(0)
+                msvcrt.locking(self._f.fileno(), msvcrt.LK_LOCK, 1)
+        except OSError as e:
+            if self._f:
+                self._f.close()
+                self._f = None
+            raise RuntimeError(f"No se pudo bloquear el archivo: {e}")
+        return self
+
+    def nueva_generacion(self) -> None:
+        """
+        Avisa a los demás procesos de que el fichero se va a borrar o reescribir
+        entero: el fichero de bloqueo crece un byte, y eso es la generación.
+        """
+        self._f.write(b"\0")
+        self._f.flush()
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if fcntl:
+                fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+            else:
+                self._f.seek(0)
+                msvcrt.locking(self._f.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._f.close()
+            self._f = None
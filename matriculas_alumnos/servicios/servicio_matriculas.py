@@ -0,0 +1,100 @@
+import os
+import threading
+from dominio.alumno import Alumno
+from servicios.almacen_alumnos import AlmacenAlumnos, EscritorAlumnos
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+class ServicioMatriculas:
+    """
+    Servicio de matrícula sobre un fichero concreto, seguro con varios hilos
+    y con varios procesos trabajando a la vez sobre el mismo fichero.
+    Las escrituras y el borrado toman un bloqueo exclusivo entre procesos y las
+    lecturas uno compartido, así que ningún proceso ve un lote a medio escribir
+    ni se pierden líneas al borrar el fichero mientras otros matriculan.
+    Para importaciones grandes, matricular_varios o escritor() agrupan las
+    escrituras en lotes y reducen el tiempo que cada proceso retiene el bloqueo.
+    Lo normal es obtenerlo con ServicioMatriculas.para(ruta), que devuelve el
+    mismo servicio (y el mismo índice en memoria) a todos los hilos del proceso.
+    """
+
+    _servicios: Dict[str, "ServicioMatriculas"] = {}
+    _mutex_servicios = threading.Lock()
+
+    def __init__(self, ruta_archivo: str = "alumnos_matriculados.txt"):
+        self.ruta_archivo = ruta_archivo
+        self.almacen = AlmacenAlumnos(ruta_archivo)
+
+    @classmethod
+    def para(cls, ruta_archivo: str) -> "ServicioMatriculas":
+        ruta = os.path.abspath(ruta_archivo)
+        with cls._mutex_servicios:
+            servicio = cls._servicios.get(ruta)
+            if servicio is None:
+                servicio = cls._servicios[ruta] = cls(ruta)
+            return servicio
+
+    def matricular(self, alumno: Alumno) -> bool:
+        """
+        Matricula un alumno. Devuelve False si ya estaba matriculado.
+        """
+        if not isinstance(alumno, Alumno):
+            raise TypeError("Se esperaba un objeto Alumno.")
+        return self.almacen.anadir(alumno.nombre)
+
+    def matricular_varios(self, alumnos: Iterable[Alumno], tamano_lote: int = 1000,
+                          durabilidad: str = "flush") -> int:
+        """
+        Matricula muchos alumnos escribiendo por lotes. Los ya matriculados se omiten.
+        Devuelve cuántos alumnos se han matriculado.
+        """
+        with self.escritor(tamano_lote, durabilidad) as escritor:
+            for alumno in alumnos:
+                if not isinstance(alumno, Alumno):
+                    raise TypeError("Se esperaba un objeto Alumno.")
+                escritor.anadir(alumno.nombre)
+        return escritor.escritos
+
+    def escritor(self, tamano_lote: int = 1000, durabilidad: str = "flush") -> EscritorAlumnos:
+        """
+        Escritor por lotes para usar con with; recibe nombres (ver EscritorAlumnos).
+        Cada hilo o proceso que importa debe usar el suyo.
+        """
+        return self.almacen.escritor(tamano_lote, durabilidad)
+
+    def existe(self, alumno: Union[Alumno, str]) -> bool:
+        nombre = alumno.nombre if isinstance(alumno, Alumno) else Alumno(alumno).nombre
+        return self.almacen.existe(nombre)
+
+    def instantanea(self) -> Tuple[Alumno, ...]:
+        """
+        Alumnos matriculados en este momento, leídos de una vez: incluye cada
+        lote de otro proceso entero o no lo incluye.
+        """
+        return tuple(Alumno(nombre) for nombre in self.almacen.instantanea())
+
+    def iterar(self) -> Iterator[Alumno]:
+        for nombre in self.almacen.iterar():
+            yield Alumno(nombre)
+
+    def filtrar(self, condicion: Callable[[Alumno], bool]) -> Iterator[Alumno]:
+        return (alumno for alumno in self.iterar() if condicion(alumno))
+
+    def buscar(self, prefijo: str) -> Iterator[Alumno]:
+        for nombre in self.almacen.buscar_prefijo(prefijo):
+            yield Alumno(nombre)
+
+    def pagina(self, pagina: int = 1, tamano_pagina: int = 20) -> List[Alumno]:
+        return [Alumno(nombre) for nombre in self.almacen.listar(pagina, tamano_pagina)]
+
+    def contar(self) -> int:
+        return self.almacen.contar()
+
+    def eliminar_duplicados(self) -> int:
+        return self.almacen.compactar()
+
+    def eliminar(self) -> bool:
+        """
+        Borra el fichero cuando terminan las escrituras en curso.
+        Devuelve True si se eliminó y False si no existía.
+        """
+        return self.almacen.eliminar()
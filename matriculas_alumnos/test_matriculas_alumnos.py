@@ -6,18 +6,22 @@ def menu():
     print("1) Matricular alumno")
     print("2) Listar alumnos")
     print("3) Eliminar archivo de alumnos")
-    print("4) Salir")
+    print("4) Comprobar si un alumno está matriculado")
+    print("5) Buscar alumnos por el inicio del nombre")
+    print("6) Salir")
 
 def main():
     while True:
         menu()
-        opcion = input("Elige una opción (1-4): ").strip()
+        opcion = input("Elige una opción (1-6): ").strip()
         if opcion == "1":
             nombre = input("Nombre del alumno a matricular: ").strip()
             try:
                 alumno = Alumno(nombre)
-                AlumnosMatriculados.matricular_alumno(alumno)
-                print(f"Alumno '{alumno}' matriculado correctamente.\n")
+                if AlumnosMatriculados.matricular_alumno(alumno):
+                    print(f"Alumno '{alumno}' matriculado correctamente.\n")
+                else:
+                    print(f"El alumno '{alumno}' ya estaba matriculado.\n")
             except (TypeError, ValueError) as e:
                 print(f"Error: {e}\n")
             except RuntimeError as e:
@@ -25,14 +29,12 @@ def main():
 
         elif opcion == "2":
             try:
-                lista = AlumnosMatriculados.listar_alumnos()
-                if not lista:
-                    print("No hay alumnos matriculados.\n")
-                else:
-                    print("Alumnos matriculados:")
-                    for i, al in enumerate(lista, start=1):
-                        print(f"{i}. {al}")
-                    print()
+                i = 0
+                for i, al in enumerate(AlumnosMatriculados.iterar_alumnos(), start=1):
+                    if i == 1:
+                        print("Alumnos matriculados:")
+                    print(f"{i}. {al}")
+                print("No hay alumnos matriculados.\n" if i == 0 else "")
             except RuntimeError as e:
                 print(f"Error de E/S: {e}\n")
 
@@ -51,6 +53,28 @@ def main():
                 print("Operación cancelada.\n")
 
         elif opcion == "4":
+            nombre = input("Nombre del alumno a buscar: ").strip()
+            try:
+                if AlumnosMatriculados.existe_alumno(nombre):
+                    print(f"'{nombre}' está matriculado.\n")
+                else:
+                    print(f"'{nombre}' no está matriculado.\n")
+            except (TypeError, ValueError) as e:
+                print(f"Error: {e}\n")
+            except RuntimeError as e:
+                print(f"Error de E/S: {e}\n")
+
+        elif opcion == "5":
+            prefijo = input("Inicio del nombre: ").strip()
+            try:
+                encontrados = 0
+                for encontrados, al in enumerate(AlumnosMatriculados.buscar_alumnos(prefijo), start=1):
+                    print(f"{encontrados}. {al}")
+                print(f"{encontrados} alumnos encontrados.\n")
+            except RuntimeError as e:
+                print(f"Error de E/S: {e}\n")
+
+        elif opcion == "6":
             print("Saliendo. ¡Hasta luego!")
             break
         else: